@@ -0,0 +1,2 @@
+# Pytest configuration - conftest.py
+# Its presence puts the repository root on sys.path so tests can import the top-level modules.
@@ -0,0 +1,278 @@
+# Device Health - device_health.py
+"""
+SMART / NVMe health collection.
+
+Health comes from `smartctl --json -a`, or from `nvme smart-log -o json` on
+NVMe devices where smartctl is not installed. The tools are run as async
+subprocesses, at most HEALTH_CONCURRENCY at a time, so checking a rack of
+drives costs about as long as its slowest drive rather than the sum of all of
+them. Results are cached per device for HEALTH_TTL seconds, and concurrent
+checks of the same device share one run.
+
+The parsers are pure functions of the tool's JSON output (plus smartctl's exit
+status) so they can be exercised against recorded reports. Each returns a
+health dict:
+
+    {"available": True, "source": "smartctl", "status": "healthy" | "warning" | "failing",
+     "passed": bool | None, "reasons": [...], "model", "serial",
+     "temperature_c", "power_on_hours", "attributes": {...}}
+
+or {"available": False, "reason": ...} when no health data could be read.
+"failing" is what the pre-wipe health gate rejects; "warning" only reports.
+"""
+
+import json
+import time
+import shutil
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HEALTH_TTL = 60.0          # seconds a device's health result is reused
+HEALTH_CONCURRENCY = 8     # health tool processes running at once
+HEALTH_TIMEOUT = 30.0      # seconds before a health tool process is killed
+
+# smartctl exit status bits (see smartctl(8), "RETURN VALUES")
+SMARTCTL_COMMAND_LINE_ERROR = 0x01
+SMARTCTL_OPEN_FAILED = 0x02
+SMARTCTL_COMMAND_FAILED = 0x04
+SMARTCTL_DISK_FAILING = 0x08
+SMARTCTL_PREFAIL_BELOW_THRESHOLD = 0x10
+SMARTCTL_PAST_BELOW_THRESHOLD = 0x20
+SMARTCTL_ERROR_LOG = 0x40
+SMARTCTL_SELF_TEST_ERRORS = 0x80
+
+# ATA attributes whose raw value counts damaged sectors
+ATA_SECTOR_ATTRIBUTES = {
+    5: "reallocated_sectors",
+    197: "pending_sectors",
+    198: "offline_uncorrectable",
+}
+
+# NVMe critical warning bits
+NVME_CRITICAL_WARNINGS = {
+    0x01: "available spare below threshold",
+    0x02: "temperature outside threshold",
+    0x04: "NVM subsystem reliability degraded",
+    0x08: "media placed in read-only mode",
+    0x10: "volatile memory backup failed",
+    0x20: "persistent memory region read-only",
+}
+
+
+def _unavailable(reason: str) -> Dict:
+    return {"available": False, "reason": reason}
+
+
+def _status(failing: List[str], warnings: List[str]) -> str:
+    if failing:
+        return "failing"
+    return "warning" if warnings else "healthy"
+
+
+def _nvme_findings(critical_warning: int, percentage_used: Optional[int], media_errors: Optional[int],
+                   failing: List[str], warnings: List[str]):
+    """Shared NVMe health log checks for both smartctl and nvme-cli reports"""
+    for bit, description in NVME_CRITICAL_WARNINGS.items():
+        if critical_warning & bit:
+            # Running hot is worth reporting but is not a dying drive
+            (warnings if bit == 0x02 else failing).append(f"NVMe critical warning: {description}")
+    if percentage_used is not None and percentage_used >= 100:
+        warnings.append(f"Rated endurance used up ({percentage_used}%)")
+    if media_errors:
+        warnings.append(f"{media_errors} media errors logged")
+
+
+def parse_smartctl(report: Dict, exit_status: Optional[int] = None) -> Dict:
+    """Health from a `smartctl --json -a` report (exit_status defaults to the one in the report)"""
+    smartctl = report.get("smartctl") or {}
+    if exit_status is None:
+        exit_status = smartctl.get("exit_status", 0)
+    if exit_status & (SMARTCTL_COMMAND_LINE_ERROR | SMARTCTL_OPEN_FAILED) or "smart_status" not in report:
+        messages = [m.get("string") for m in smartctl.get("messages") or [] if m.get("string")]
+        return _unavailable("; ".join(messages) or f"smartctl could not read the device (exit status {exit_status})")
+
+    failing: List[str] = []
+    warnings: List[str] = []
+    attributes: Dict[str, int] = {}
+
+    passed = (report.get("smart_status") or {}).get("passed")
+    if passed is False or exit_status & SMARTCTL_DISK_FAILING:
+        failing.append("SMART overall health self-assessment failed")
+    if exit_status & SMARTCTL_PREFAIL_BELOW_THRESHOLD:
+        failing.append("Pre-failure attributes at or below threshold")
+    if exit_status & SMARTCTL_PAST_BELOW_THRESHOLD:
+        warnings.append("Attributes were at or below threshold in the past")
+    if exit_status & SMARTCTL_SELF_TEST_ERRORS:
+        warnings.append("Self-test log contains errors")
+
+    # ATA
+    for attribute in (report.get("ata_smart_attributes") or {}).get("table") or []:
+        if attribute.get("when_failed") == "now":
+            failing.append(f"Attribute {attribute.get('name')} failing now")
+        name = ATA_SECTOR_ATTRIBUTES.get(attribute.get("id"))
+        if name is None:
+            continue
+        raw = (attribute.get("raw") or {}).get("value", 0)
+        attributes[name] = raw
+        if raw:
+            warnings.append(f"{raw} {name.replace('_', ' ')}")
+
+    # NVMe
+    nvme_log = report.get("nvme_smart_health_information_log")
+    if nvme_log:
+        attributes.update({
+            key: nvme_log.get(key)
+            for key in ("critical_warning", "available_spare", "available_spare_threshold",
+                        "percentage_used", "media_errors", "num_err_log_entries")
+        })
+        _nvme_findings(nvme_log.get("critical_warning", 0), nvme_log.get("percentage_used"),
+                       nvme_log.get("media_errors"), failing, warnings)
+
+    # SCSI / SAS
+    grown_defects = report.get("scsi_grown_defect_list")
+    if grown_defects:
+        attributes["grown_defects"] = grown_defects
+        warnings.append(f"{grown_defects} grown defects")
+
+    return {
+        "available": True,
+        "source": "smartctl",
+        "status": _status(failing, warnings),
+        "passed": passed,
+        "reasons": failing + warnings,
+        "model": report.get("model_name"),
+        "serial": report.get("serial_number"),
+        "temperature_c": (report.get("temperature") or {}).get("current"),
+        "power_on_hours": (report.get("power_on_time") or {}).get("hours"),
+        "attributes": attributes,
+    }
+
+
+def parse_nvme_smart_log(report: Dict) -> Dict:
+    """Health from an `nvme smart-log -o json` report (nvme-cli)"""
+    if "critical_warning" not in report:
+        return _unavailable("nvme smart-log returned no health log")
+
+    failing: List[str] = []
+    warnings: List[str] = []
+    critical_warning = report.get("critical_warning", 0)
+    percentage_used = report.get("percent_used", report.get("percentage_used"))
+    media_errors = report.get("media_errors")
+    _nvme_findings(critical_warning, percentage_used, media_errors, failing, warnings)
+
+    temperature = report.get("temperature")
+    return {
+        "available": True,
+        "source": "nvme-cli",
+        "status": _status(failing, warnings),
+        "passed": not failing,
+        "reasons": failing + warnings,
+        "model": None,
+        "serial": None,
+        # nvme-cli reports the composite temperature in kelvin
+        "temperature_c": temperature - 273 if isinstance(temperature, int) else None,
+        "power_on_hours": report.get("power_on_hours"),
+        "attributes": {
+            "critical_warning": critical_warning,
+            "available_spare": report.get("avail_spare"),
+            "available_spare_threshold": report.get("spare_thresh"),
+            "percentage_used": percentage_used,
+            "media_errors": media_errors,
+            "num_err_log_entries": report.get("num_err_log_entries"),
+        },
+    }
+
+
+def unhealthy_reason(health: Optional[Dict]) -> Optional[str]:
+    """Why a device should not be wiped, or None (no health data is not a reason)"""
+    if health and health.get("status") == "failing":
+        return "; ".join(health.get("reasons") or ["SMART reports the device as failing"])
+    return None
+
+
+class HealthMonitor:
+    """Runs health tools concurrently with a process limit and caches their results"""
+
+    def __init__(self, ttl: float = HEALTH_TTL, concurrency: int = HEALTH_CONCURRENCY,
+                 timeout: float = HEALTH_TIMEOUT):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.smartctl = shutil.which("smartctl")
+        self.nvme = shutil.which("nvme")
+        self._slots = asyncio.Semaphore(concurrency)
+        self._cache: Dict[str, tuple] = {}  # device_path -> (monotonic time, health)
+        self._checks: Dict[str, asyncio.Task] = {}
+        if not (self.smartctl or self.nvme):
+            logger.info("Neither smartctl nor nvme-cli found; device health is not available")
+
+    async def check(self, device_path: str, refresh: bool = False) -> Dict:
+        """Health of one device, from the cache unless it is older than the TTL"""
+        cached = self._cache.get(device_path)
+        if cached and not refresh and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        task = self._checks.get(device_path)
+        if task is None:
+            task = self._checks[device_path] = asyncio.create_task(self._collect(device_path))
+            task.add_done_callback(lambda _: self._checks.pop(device_path, None))
+        return await asyncio.shield(task)
+
+    async def check_many(self, device_paths: Iterable[str], refresh: bool = False) -> Dict[str, Dict]:
+        """Health of several devices, collected in parallel"""
+        paths = list(dict.fromkeys(device_paths))
+        results = await asyncio.gather(*(self.check(path, refresh) for path in paths))
+        return dict(zip(paths, results))
+
+    def invalidate(self, device_path: Optional[str] = None):
+        if device_path is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(device_path, None)
+
+    async def _collect(self, device_path: str) -> Dict:
+        if self.smartctl:
+            output, exit_status = await self._run(self.smartctl, "--json", "-a", device_path)
+            health = self._parse(parse_smartctl, device_path, output, exit_status)
+            # smartctl without NVMe support (old releases) still leaves nvme-cli to try
+            if not health["available"] and self.nvme and "nvme" in device_path:
+                output, _ = await self._run(self.nvme, "smart-log", device_path, "-o", "json")
+                health = self._parse(parse_nvme_smart_log, device_path, output)
+        elif self.nvme and "nvme" in device_path:
+            output, _ = await self._run(self.nvme, "smart-log", device_path, "-o", "json")
+            health = self._parse(parse_nvme_smart_log, device_path, output)
+        else:
+            health = _unavailable("SMART data requires smartctl (smartmontools) or nvme-cli")
+        health["checked_at"] = datetime.utcnow().isoformat()
+        self._cache[device_path] = (time.monotonic(), health)
+        return health
+
+    def _parse(self, parser, device_path: str, output: Optional[bytes], *args) -> Dict:
+        if not output:
+            return _unavailable("Health tool produced no output")
+        try:
+            return parser(json.loads(output), *args)
+        except (ValueError, AttributeError, TypeError) as e:
+            logger.warning(f"Unreadable health report for {device_path}: {e}")
+            return _unavailable(f"Unreadable health report: {e}")
+
+    async def _run(self, *command: str):
+        """(stdout, exit status) of a tool, or (None, None) if it could not run in time"""
+        async with self._slots:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+                )
+            except OSError as e:
+                logger.warning(f"Could not run {command[0]}: {e}")
+                return None, None
+            try:
+                output, _ = await asyncio.wait_for(process.communicate(), self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                logger.warning(f"{' '.join(command)} timed out after {self.timeout}s")
+                return None, None
+            return output, process.returncode
@@ -0,0 +1,184 @@
+# Device Inventory - device_inventory.py
+"""
+Cached inventory of attached storage devices.
+
+A full DeviceScanner scan walks every mount, stats each filesystem and asks
+udev about each device, which takes hundreds of milliseconds on hosts with
+many bind mounts. The inventory scans once and then serves every API read
+from memory. On Linux a pyudev.Monitor watches block-device events: a removed
+disk is dropped from the inventory on the spot, and only the disk an added or
+changed device belongs to is probed again and its entry replaced (the kernel
+emits a change event every time a wipe pass closes the device, so a full
+rescan per event would be far too costly). Where udev is not
+available the inventory simply expires after a short TTL; with udev a much
+longer TTL remains as a safety net for changes udev does not report (mounts).
+Device IDs are stable, so an id -> device index kept alongside the list makes
+single-device lookups a dictionary read.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from device_scanner import DeviceScanner, PYUDEV_AVAILABLE
+
+if PYUDEV_AVAILABLE:
+    import pyudev
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_TTL = 10.0           # seconds between rescans when nothing reports device changes
+INVENTORY_TTL_WITH_UDEV = 300.0
+
+
+class DeviceInventory:
+    """Device list built by one scan and kept current by udev events or a TTL"""
+
+    def __init__(self, scanner: DeviceScanner, ttl: float = INVENTORY_TTL,
+                 udev_ttl: float = INVENTORY_TTL_WITH_UDEV):
+        self.scanner = scanner
+        self.ttl = ttl
+        self.udev_ttl = udev_ttl
+        self._devices: List[Dict] = []
+        self._by_id: Dict[str, Dict] = {}
+        self._scanned_at: Optional[float] = None
+        self._generation = 0  # bumped by every invalidation
+        self._refreshing: Dict[str, bool] = {}  # disk path -> another event arrived during its probe
+        self._scan_lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._observer = None
+
+    @property
+    def watching(self) -> bool:
+        return self._observer is not None
+
+    def start(self):
+        """Watch udev for block-device events (call on the event loop; no-op without pyudev)"""
+        self._loop = asyncio.get_running_loop()
+        if not PYUDEV_AVAILABLE:
+            logger.info(f"pyudev not available; device inventory refreshes every {self.ttl}s")
+            return
+        try:
+            monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+            monitor.filter_by(subsystem="block")
+            self._observer = pyudev.MonitorObserver(monitor, callback=self._on_udev_event,
+                                                    name="device-inventory-udev")
+            self._observer.start()
+            logger.info("Device inventory follows udev block events")
+        except Exception as e:
+            self._observer = None
+            logger.warning(f"Could not monitor udev, device inventory falls back to a {self.ttl}s TTL: {e}")
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def _on_udev_event(self, device):
+        """Observer thread: hand the event to the event loop"""
+        self._loop.call_soon_threadsafe(self._apply_event, device.action, device.device_node)
+
+    def _apply_event(self, action: Optional[str], device_node: Optional[str]):
+        if not device_node:
+            self.invalidate()
+        elif action == "remove" and any(d.get("device_path") == device_node for d in self._devices):
+            # A removed disk needs no probe: just forget it
+            self._set_devices([d for d in self._devices if d.get("device_path") != device_node])
+            if self._scan_lock.locked():
+                # The scan in flight may still have seen it
+                self.invalidate()
+            logger.info(f"Device {device_node} removed from inventory")
+        elif self._scanned_at is not None and not self._scan_lock.locked():
+            self._refresh(self._disk_of(device_node))
+        else:
+            # No inventory yet, or a scan in flight that may miss the event
+            self.invalidate()
+
+    def _disk_of(self, device_node: str) -> str:
+        """Disk a device node belongs to (a removed partition no longer resolves through sysfs)"""
+        for device in self._devices:
+            if any(p.get("device_path") == device_node for p in device.get("partitions") or []):
+                return device["device_path"]
+        return self.scanner.whole_disk(device_node)
+
+    def _refresh(self, disk_path: str):
+        """Re-probe one disk, once more if further events arrive while it is being probed"""
+        if disk_path in self._refreshing:
+            self._refreshing[disk_path] = True
+            return
+        self._refreshing[disk_path] = False
+        asyncio.create_task(self._reprobe(disk_path))
+
+    async def _reprobe(self, disk_path: str):
+        try:
+            found = None
+            again = True
+            while again:
+                self._refreshing[disk_path] = False
+                found = await self.scanner.scan_device(disk_path)
+                again = self._refreshing[disk_path]
+        finally:
+            del self._refreshing[disk_path]
+
+        if found is None or self._scan_lock.locked():
+            self.invalidate()
+            return
+        others = [d for d in self._devices if d.get("device_path") != disk_path]
+        if any(d["id"] == device["id"] for d in others for device in found):
+            # Another disk shares its identity; only a full scan tells them apart by path
+            self.invalidate()
+            return
+        devices = []
+        for device in self._devices:
+            if device.get("device_path") == disk_path:
+                devices += found
+                found = []
+            else:
+                devices.append(device)
+        self._set_devices(devices + found)
+        logger.debug(f"Device {disk_path} re-probed after a udev event")
+
+    def invalidate(self):
+        """Make the next read rescan"""
+        self._generation += 1
+        self._scanned_at = None
+
+    def _fresh(self) -> bool:
+        if self._scanned_at is None:
+            return False
+        ttl = self.udev_ttl if self.watching else self.ttl
+        return time.monotonic() - self._scanned_at < ttl
+
+    async def devices(self, refresh: bool = False) -> List[Dict]:
+        """Current devices (copies, safe to modify); refresh forces a rescan"""
+        if refresh:
+            self.invalidate()
+        if not self._fresh():
+            await self._rescan()
+        return [dict(device) for device in self._devices]
+
+    async def get(self, device_id: str) -> Optional[Dict]:
+        if not self._fresh():
+            await self._rescan()
+        device = self._by_id.get(device_id)
+        return dict(device) if device else None
+
+    async def get_details(self, device_id: str) -> Optional[Dict]:
+        """A device with the extra details of a single-device view"""
+        device = await self.get(device_id)
+        return await self.scanner.describe(device) if device else None
+
+    async def _rescan(self):
+        # Concurrent readers share one scan instead of each starting their own
+        async with self._scan_lock:
+            if self._fresh():
+                return
+            generation = self._generation
+            self._set_devices(await self.scanner.scan_devices())
+            # An event that arrived mid-scan may not be reflected: stay stale
+            self._scanned_at = time.monotonic() if generation == self._generation else None
+
+    def _set_devices(self, devices: List[Dict]):
+        self._devices = devices
+        self._by_id = {device["id"]: device for device in devices}
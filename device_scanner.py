@@ -1,11 +1,20 @@
 # Device Scanner - device_scanner.py
+import os
+import re
 import psutil
+import hashlib
 import platform
 import asyncio
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import subprocess
 import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from wipe_metrics import DEVICE_SCAN_LATENCY
+from device_health import HealthMonitor
 
 # Optional OS-specific imports
 try:
@@ -28,54 +37,330 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+SYS_BLOCK = "/sys/block"
+PROC_MOUNTS = "/proc/self/mounts"
+PROC_SWAPS = "/proc/swaps"
+
+# A disk holding any of these is never offered as a wipe target
+SYSTEM_MOUNTPOINTS = ("/", "/boot", "/boot/efi", "/usr", "/var", "/home", "[SWAP]")
+
+# Every blocking probe (sysfs/mount reads, disk_usage, udev, WMI) runs on a
+# bounded pool with its own timeout, so a hung NFS mount or a slow USB hub
+# costs that one device some details instead of stalling the event loop
+PROBE_WORKERS = 8
+PROBE_TIMEOUT = 2.0   # seconds per device probe
+SCAN_TIMEOUT = 10.0   # seconds for enumerating the devices themselves
+
+_MOUNT_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+
+def _read_sysfs(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_sysfs_int(path: str) -> Optional[int]:
+    value = _read_sysfs(path)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _read_mounts() -> Dict[str, List[Dict]]:
+    """Mounted and swap block devices keyed by resolved /dev path, from /proc (no subprocesses)"""
+    mounts: Dict[str, List[Dict]] = {}
+    try:
+        with open(PROC_MOUNTS) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 4 or not fields[0].startswith("/dev/"):
+                    continue
+                source = os.path.realpath(_MOUNT_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), fields[0]))
+                mountpoint = _MOUNT_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), fields[1])
+                mounts.setdefault(source, []).append({"mountpoint": mountpoint, "fstype": fields[2],
+                                                      "opts": fields[3]})
+    except OSError as e:
+        logger.warning(f"Could not read {PROC_MOUNTS}: {e}")
+    try:
+        with open(PROC_SWAPS) as f:
+            for line in list(f)[1:]:
+                fields = line.split()
+                if fields and fields[0].startswith("/dev/"):
+                    mounts.setdefault(os.path.realpath(fields[0]), []).append(
+                        {"mountpoint": "[SWAP]", "fstype": "swap", "opts": ""})
+    except OSError:
+        pass
+    return mounts
+
+
+def _holders(sys_path: str) -> List[str]:
+    """Devices stacked on a block device (device-mapper, md RAID)"""
+    try:
+        return os.listdir(os.path.join(sys_path, "holders"))
+    except OSError:
+        return []
+
+
+def _mounts_of(sys_path: str, name: str, mounts: Dict[str, List[Dict]]) -> List[Dict]:
+    """Mounts of a block device, including those of device-mapper volumes stacked on it"""
+    found = list(mounts.get(f"/dev/{name}", []))
+    for holder in _holders(sys_path):
+        found += mounts.get(f"/dev/{holder}", [])
+    return found
+
+
+def device_mounts(device_path: str) -> List[Dict]:
+    """Mounts and swaps of a block device, of its partitions and of volumes stacked on either"""
+    real_path = os.path.realpath(device_path)
+    mounts = _read_mounts()
+    name = os.path.basename(real_path)
+    sys_path = f"/sys/class/block/{name}"
+    if not os.path.exists(sys_path):
+        # Not a block device (an image file): only the path itself can be mounted
+        return list(mounts.get(real_path, []))
+    sys_path = os.path.realpath(sys_path)
+    found = _mounts_of(sys_path, name, mounts)
+    for entry in os.listdir(sys_path):
+        if os.path.exists(os.path.join(sys_path, entry, "partition")):
+            found += _mounts_of(os.path.join(sys_path, entry), entry, mounts)
+    return found
+
+
+def _transport(name: str, sys_path: str) -> str:
+    """Bus a disk hangs off, from its sysfs device path"""
+    if name.startswith("nvme"):
+        return "nvme"
+    if name.startswith("mmcblk") or "/mmc_host/" in sys_path:
+        return "mmc"
+    if "/usb" in sys_path:
+        return "usb"
+    if "/virtio" in sys_path:
+        return "virtio"
+    if "/ata" in sys_path:
+        return "sata"
+    if "/host" in sys_path:
+        return "scsi"
+    return "unknown"
+
+
 class DeviceScanner:
     """Cross-platform device scanner for storage devices"""
     
-    def __init__(self):
+    def __init__(self, probe_workers: int = PROBE_WORKERS, probe_timeout: float = PROBE_TIMEOUT,
+                 health: Optional[HealthMonitor] = None):
         self.os_type = platform.system()
+        self.health = health or HealthMonitor()
+        self.probe_timeout = probe_timeout
+        self._executor = ThreadPoolExecutor(max_workers=probe_workers, thread_name_prefix="device-probe")
+        self._hung_probes = set()  # Keys of probes still stuck after timing out
+        self._udev_local = threading.local()  # pyudev contexts are not shared between threads
         logger.info(f"Initialized DeviceScanner for {self.os_type}")
+    
+    async def _probe(self, key: str, func, *args, timeout: Optional[float] = None, default=None):
+        """Run a blocking probe on the pool; default if it fails or overruns its timeout
+        
+        A probe that timed out keeps its thread until it returns; until then the
+        same probe (e.g. the same hung mount) is not retried, so one bad device
+        cannot occupy the whole pool.
+        """
+        if key in self._hung_probes:
+            return default
+        future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.probe_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Device probe {key} timed out after {timeout or self.probe_timeout}s")
+            self._hung_probes.add(key)
+            future.add_done_callback(lambda _: self._hung_probes.discard(key))
+            return default
+        except Exception as e:
+            logger.warning(f"Device probe {key} failed: {e}")
+            return default
         
     async def scan_devices(self) -> List[Dict]:
         """Scan for all attached storage devices"""
+        started = time.perf_counter()
         devices = []
         
-        # Get basic partition information using psutil
-        partitions = psutil.disk_partitions(all=True)
-        
-        for partition in partitions:
-            try:
-                device_info = await self._analyze_partition(partition)
-                if device_info:
-                    devices.append(device_info)
-            except Exception as e:
-                logger.warning(f"Error analyzing partition {partition.device}: {e}")
+        if self.os_type == "Linux" and os.path.isdir(SYS_BLOCK):
+            # Whole disks straight from sysfs, mounted or not
+            devices = await self._scan_sysfs()
+        else:
+            # Get basic partition information using psutil
+            partitions = await self._probe("partitions", psutil.disk_partitions, True,
+                                           timeout=SCAN_TIMEOUT, default=[])
+            
+            # Every partition is analyzed concurrently; a slow one only loses its usage figures
+            analyzed = await asyncio.gather(*(self._analyze_partition(p) for p in partitions))
+            devices = [device_info for device_info in analyzed if device_info]
                 
-        # Enhance with OS-specific information
+        external_devices = await self._complete(devices)
+        
+        DEVICE_SCAN_LATENCY.observe(time.perf_counter() - started)
+        logger.info(f"Found {len(external_devices)} external devices out of {len(devices)} total")
+        return external_devices
+    
+    async def scan_device(self, device_path: str) -> Optional[List[Dict]]:
+        """Re-probe one whole disk instead of scanning them all
+        
+        Returns [device] if the disk is listed, [] if it is not (gone, empty,
+        internal), or None if it could not be probed or disks do not come from
+        sysfs here, in which case only a full scan will do.
+        """
+        if not (self.os_type == "Linux" and os.path.isdir(SYS_BLOCK)):
+            return None
+        name = os.path.basename(device_path)
+        sys_path = os.path.realpath(os.path.join(SYS_BLOCK, name))
+        if not os.path.isdir(sys_path) or "/virtual/" in sys_path:
+            return []
+        mounts = await self._probe("mounts", _read_mounts)
+        if mounts is None:
+            return None
+        device = await self._probe(f"sysfs:{name}", self._analyze_sysfs_disk, name, sys_path, mounts,
+                                   default=False)
+        if device is False:
+            return None
+        return await self._complete([device] if device else [])
+    
+    def whole_disk(self, device_path: str) -> str:
+        """/dev path of the disk a block device belongs to (itself unless it is a partition)"""
+        name = os.path.basename(os.path.realpath(device_path))
+        sys_path = f"/sys/class/block/{name}"
+        if os.path.exists(os.path.join(sys_path, "partition")):
+            return f"/dev/{os.path.basename(os.path.dirname(os.path.realpath(sys_path)))}"
+        return f"/dev/{name}"
+    
+    async def _complete(self, devices: List[Dict]) -> List[Dict]:
+        """Add OS-specific details and stable IDs, keeping only removable/external devices"""
         if self.os_type == "Linux" and PYUDEV_AVAILABLE:
             devices = await self._enhance_linux_devices(devices)
         elif self.os_type == "Windows" and WMI_AVAILABLE:
             devices = await self._enhance_windows_devices(devices)
             
-        # Filter for removable/external devices
-        external_devices = [d for d in devices if self._is_external_device(d)]
+        devices = self._assign_device_ids(devices)
+        return [d for d in devices if self._is_external_device(d)]
+    
+    async def _scan_sysfs(self) -> List[Dict]:
+        """Enumerate whole disks from /sys/block, each disk read by its own timed probe
         
-        logger.info(f"Found {len(external_devices)} external devices out of {len(devices)} total")
-        return external_devices
+        Virtual devices (loop, ram, zram, device-mapper) are skipped. Mounts
+        and swaps are only cross-referenced to flag disks that are in use. A
+        disk whose attributes cannot be read in time is left out; the others
+        are still returned.
+        """
+        mounts = await self._probe("mounts", _read_mounts)
+        disks = await self._probe("sysfs", self._sysfs_disks, default=[])
+        analyzed = await asyncio.gather(*(
+            self._probe(f"sysfs:{name}", self._analyze_sysfs_disk, name, sys_path, mounts or {})
+            for name, sys_path in disks
+        ))
+        devices = [device_info for device_info in analyzed if device_info]
+        if mounts is None:
+            # Without the mount table a mounted disk would look idle, so none may be wiped
+            for device in devices:
+                device["in_use"] = True
+                device.setdefault("incomplete", []).append("mounts")
+        return devices
+    
+    def _sysfs_disks(self) -> List[Tuple[str, str]]:
+        """Probe thread: (name, sysfs path) of the non-virtual disks in /sys/block"""
+        disks = []
+        for name in sorted(os.listdir(SYS_BLOCK)):
+            sys_path = os.path.realpath(os.path.join(SYS_BLOCK, name))
+            if "/virtual/" not in sys_path:
+                disks.append((name, sys_path))
+        return disks
+    
+    def _analyze_sysfs_disk(self, name: str, sys_path: str, mounts: Dict[str, List[Dict]]) -> Optional[Dict]:
+        """Describe one /sys/block disk and its partitions"""
+        sectors = _read_sysfs_int(os.path.join(sys_path, "size")) or 0
+        if not sectors:
+            # Empty card reader slot or ejected medium
+            return None
+        
+        disk_mounts = _mounts_of(sys_path, name, mounts)
+        held = bool(_holders(sys_path))
+        partitions = []
+        for entry in sorted(os.listdir(sys_path)):
+            part_path = os.path.join(sys_path, entry)
+            number = _read_sysfs_int(os.path.join(part_path, "partition"))
+            if number is None:
+                continue
+            part_mounts = _mounts_of(part_path, entry, mounts)
+            disk_mounts += part_mounts
+            held = held or bool(_holders(part_path))
+            partitions.append({
+                "name": entry,
+                "device_path": f"/dev/{entry}",
+                "number": number,
+                "start": (_read_sysfs_int(os.path.join(part_path, "start")) or 0) * 512,
+                "total_size": (_read_sysfs_int(os.path.join(part_path, "size")) or 0) * 512,
+                "mountpoints": [m["mountpoint"] for m in part_mounts]
+            })
+        mountpoints = [m["mountpoint"] for m in disk_mounts]
+        
+        rotational = _read_sysfs(os.path.join(sys_path, "queue", "rotational"))
+        transport = _transport(name, sys_path)
+        if transport == "usb":
+            device_type = "USB"
+        elif transport == "mmc":
+            device_type = "SD_CARD"
+        elif transport == "nvme":
+            device_type = "NVME_SSD"
+        elif rotational == "0":
+            device_type = "SSD"
+        else:
+            device_type = "HDD"
+        
+        first_mount = disk_mounts[0] if disk_mounts else {}
+        return {
+            "id": None,  # Assigned once serial/WWN are known
+            "name": f"/dev/{name}",
+            "device_path": f"/dev/{name}",
+            "mountpoint": first_mount.get("mountpoint"),
+            "mountpoints": mountpoints,
+            "fstype": first_mount.get("fstype"),
+            "type": device_type,
+            "total_size": sectors * 512,  # sysfs sizes are always in 512-byte units
+            "used_size": 0,
+            "free_size": 0,
+            "opts": first_mount.get("opts", ""),
+            "serial": _read_sysfs(os.path.join(sys_path, "serial"))
+                      or _read_sysfs(os.path.join(sys_path, "device", "serial")),
+            "model": _read_sysfs(os.path.join(sys_path, "device", "model")),
+            "vendor": _read_sysfs(os.path.join(sys_path, "device", "vendor")),
+            "wwn": _read_sysfs(os.path.join(sys_path, "wwid"))
+                   or _read_sysfs(os.path.join(sys_path, "device", "wwid")),
+            "removable": _read_sysfs(os.path.join(sys_path, "removable")) == "1",
+            "rotational": rotational == "1",
+            "transport": transport,
+            "logical_block_size": _read_sysfs_int(os.path.join(sys_path, "queue", "logical_block_size")) or 512,
+            "physical_block_size": _read_sysfs_int(os.path.join(sys_path, "queue", "physical_block_size")) or 512,
+            "partitions": partitions,
+            "mounted": bool(disk_mounts),
+            "in_use": bool(disk_mounts) or held,
+            "system_disk": any(m in SYSTEM_MOUNTPOINTS for m in mountpoints),
+            "sys_path": sys_path,
+            "partition_number": None,
+            "identification_method": "sysfs",
+            "os_type": self.os_type
+        }
     
     async def _analyze_partition(self, partition) -> Optional[Dict]:
         """Analyze a partition and extract device information"""
         try:
-            # Get usage statistics
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-            except (PermissionError, OSError):
-                usage = None
+            # Get usage statistics (statfs on a hung network mount never returns)
+            usage = await self._probe(f"usage:{partition.mountpoint}", psutil.disk_usage, partition.mountpoint)
                 
             # Determine device type
             device_type = self._determine_device_type(partition)
             
             device_info = {
-                "id": self._generate_device_id(partition.device),
+                "id": None,  # Assigned once serial/WWN are known
                 "name": partition.device,
                 "device_path": partition.device,
                 "mountpoint": partition.mountpoint,
@@ -88,10 +373,14 @@ class DeviceScanner:
                 "serial": None,  # Will be populated by OS-specific enhancement
                 "model": None,
                 "vendor": None,
+                "wwn": None,
                 "removable": False,
                 "identification_method": "psutil",
-                "os_type": self.os_type
+                "os_type": self.os_type,
+                "incomplete": [] if usage else ["usage"]
             }
+            if self.os_type == "Linux":
+                device_info.update(self._sysfs_identity(partition.device))
             
             return device_info
             
@@ -117,76 +406,162 @@ class DeviceScanner:
         else:
             return "UNKNOWN"
     
-    def _generate_device_id(self, device_path: str) -> str:
-        """Generate a unique ID for the device"""
-        return f"dev_{hash(device_path) % 10000}"
+    def _sysfs_identity(self, device_path: str) -> Dict:
+        """Disk sysfs path, partition number and WWN of a block device (Linux, no udev needed)"""
+        info = {"sys_path": None, "partition_number": None}
+        sys_path = f"/sys/class/block/{os.path.basename(os.path.realpath(device_path))}"
+        if not os.path.exists(sys_path):
+            return info
+        disk_path = os.path.realpath(sys_path)
+        try:
+            with open(os.path.join(disk_path, "partition")) as f:
+                info["partition_number"] = int(f.read().strip())
+            disk_path = os.path.dirname(disk_path)
+        except (OSError, ValueError):
+            pass
+        info["sys_path"] = disk_path
+        for wwid_file in ("wwid", "device/wwid"):
+            try:
+                with open(os.path.join(disk_path, wwid_file)) as f:
+                    info["wwn"] = f.read().strip() or None
+                break
+            except OSError:
+                continue
+        return info
+    
+    def _generate_device_id(self, device: Dict, by_path: bool = False) -> str:
+        """Stable ID for a device, the same in every process and across restarts
+        
+        Derived from the disk's WWN, else its model and serial, else (or when
+        by_path) its sysfs path, plus the partition number for partitions.
+        """
+        if device.get("wwn") and not by_path:
+            identity = f"wwn:{device['wwn']}"
+        elif device.get("serial") and not by_path:
+            identity = f"serial:{device.get('model') or ''}:{device['serial']}"
+        else:
+            identity = f"path:{device.get('sys_path') or device['device_path']}"
+        if device.get("partition_number"):
+            identity += f"#{device['partition_number']}"
+        return f"dev_{hashlib.sha256(identity.encode()).hexdigest()[:16]}"
+    
+    def _assign_device_ids(self, devices: List[Dict]) -> List[Dict]:
+        """Give every device its stable ID, one entry per device
+        
+        Further mounts of a device already listed (bind mounts) are dropped;
+        distinct devices sharing a serial (cloned sticks) fall back to their paths.
+        """
+        unique: Dict[str, Dict] = {}
+        for device in devices:
+            unique.setdefault(device["device_path"], device)
+        by_id: Dict[str, List[Dict]] = {}
+        for device in unique.values():
+            device["id"] = self._generate_device_id(device)
+            by_id.setdefault(device["id"], []).append(device)
+        for device_id, same in by_id.items():
+            if len(same) > 1:
+                logger.warning(f"{len(same)} devices share identity {device_id}; identifying them by path")
+                for device in same:
+                    device["id"] = self._generate_device_id(device, by_path=True)
+        return list(unique.values())
     
     async def _enhance_linux_devices(self, devices: List[Dict]) -> List[Dict]:
-        """Enhance device information using Linux-specific tools"""
+        """Enhance device information using Linux-specific tools (udev, one probe per device)"""
         if not PYUDEV_AVAILABLE:
             return devices
             
-        try:
-            context = pyudev.Context()
-            
-            for device in devices:
-                try:
-                    # Find the device in udev
-                    udev_device = pyudev.Devices.from_device_file(context, device['device_path'])
-                    
-                    if udev_device:
-                        # Get additional properties
-                        device['serial'] = udev_device.get('ID_SERIAL_SHORT')
-                        device['model'] = udev_device.get('ID_MODEL')
-                        device['vendor'] = udev_device.get('ID_VENDOR')
-                        device['removable'] = udev_device.get('REMOVABLE') == '1'
-                        device['identification_method'] = "pyudev"
-                        
-                except Exception as e:
-                    logger.warning(f"Could not enhance device {device['device_path']} with pyudev: {e}")
-                    
-        except Exception as e:
-            logger.error(f"pyudev enhancement failed: {e}")
+        properties = await asyncio.gather(*(
+            self._probe(f"udev:{device['device_path']}", self._udev_properties, device['device_path'])
+            for device in devices
+        ))
+        for device, props in zip(devices, properties):
+            if props is None:
+                device.setdefault('incomplete', []).append("udev")
+                continue
+            # Keep what sysfs already found where udev has nothing better
+            device['serial'] = props.get('ID_SERIAL_SHORT') or device.get('serial')
+            device['model'] = props.get('ID_MODEL') or device.get('model')
+            device['wwn'] = props.get('ID_WWN_WITH_EXTENSION') or props.get('ID_WWN') or device.get('wwn')
+            device['vendor'] = props.get('ID_VENDOR') or device.get('vendor')
+            if props.get('REMOVABLE') is not None:
+                device['removable'] = props.get('REMOVABLE') == '1'
+            device['identification_method'] = "pyudev"
             
         return devices
     
+    def _udev_properties(self, device_path: str) -> Dict:
+        """Probe thread: udev properties of one device"""
+        context = getattr(self._udev_local, "context", None)
+        if context is None:
+            context = self._udev_local.context = pyudev.Context()
+        udev_device = pyudev.Devices.from_device_file(context, device_path)
+        return dict(udev_device.properties)
+    
     async def _enhance_windows_devices(self, devices: List[Dict]) -> List[Dict]:
         """Enhance device information using Windows WMI"""
         if not WMI_AVAILABLE:
             return devices
             
-        try:
-            c = wmi.WMI()
-            
-            # Get disk drives
-            disk_drives = c.Win32_DiskDrive()
-            
+        disk_drives = await self._probe("wmi", self._wmi_disk_drives, timeout=SCAN_TIMEOUT)
+        if disk_drives is None:
             for device in devices:
-                for disk in disk_drives:
-                    try:
-                        # Match by device path
-                        if device['device_path'].replace('\\', '').replace(':', '') in str(disk.DeviceID).replace('\\', ''):
-                            device['serial'] = disk.SerialNumber
-                            device['model'] = disk.Model
-                            device['vendor'] = disk.Manufacturer
-                            device['removable'] = disk.MediaType == 'Removable Media'
-                            device['interface_type'] = disk.InterfaceType
-                            device['identification_method'] = "wmi"
-                            break
-                            
-                    except Exception as e:
-                        logger.warning(f"Could not enhance device with WMI: {e}")
-                        
-        except Exception as e:
-            logger.error(f"WMI enhancement failed: {e}")
+                device.setdefault('incomplete', []).append("wmi")
+            return devices
             
+        for device in devices:
+            for disk in disk_drives:
+                # Match by device path
+                if device['device_path'].replace('\\', '').replace(':', '') in disk['device_id'].replace('\\', ''):
+                    device['serial'] = disk['serial']
+                    device['model'] = disk['model']
+                    device['vendor'] = disk['vendor']
+                    device['removable'] = disk['media_type'] == 'Removable Media'
+                    device['interface_type'] = disk['interface_type']
+                    device['identification_method'] = "wmi"
+                    break
+                    
         return devices
     
+    def _wmi_disk_drives(self) -> List[Dict]:
+        """Probe thread: disk drives from WMI, as plain dicts (COM objects stay in this thread)"""
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pythoncom = None
+        try:
+            return [
+                {
+                    "device_id": str(disk.DeviceID),
+                    "serial": disk.SerialNumber,
+                    "model": disk.Model,
+                    "vendor": disk.Manufacturer,
+                    "media_type": disk.MediaType,
+                    "interface_type": disk.InterfaceType
+                }
+                for disk in wmi.WMI().Win32_DiskDrive()
+            ]
+        finally:
+            if pythoncom:
+                pythoncom.CoUninitialize()
+    
     def _is_external_device(self, device: Dict) -> bool:
         """Determine if a device is external/removable"""
+        # Never offer the disk the system runs from, whatever it looks like
+        if device.get('system_disk'):
+            return False
+            
         # Check if explicitly marked as removable
         if device.get('removable'):
             return True
+        
+        # On Linux the kernel knows how a disk is attached; its name does not tell
+        # (internal SATA/SAS disks are /dev/sd* just like USB sticks)
+        sys_path = device.get('sys_path')
+        if self.os_type == "Linux" and sys_path:
+            return (_read_sysfs(os.path.join(sys_path, 'removable')) == '1'
+                    or _transport(os.path.basename(sys_path), sys_path) in ('usb', 'mmc')
+                    or _read_sysfs(os.path.join(sys_path, 'device', 'transport')) == 'usb')
             
         # Check device type
         if device['type'] in ['USB', 'SD_CARD']:
@@ -199,11 +574,7 @@ class DeviceScanner:
             
         # Check device path patterns
         device_path = device.get('device_path', '').lower()
-        if self.os_type == "Linux":
-            # Common USB/removable device patterns
-            if any(pattern in device_path for pattern in ['/dev/sd', '/dev/usb', '/media', '/mnt']):
-                return True
-        elif self.os_type == "Windows":
+        if self.os_type == "Windows":
             # Windows removable drive patterns
             if device_path.startswith(('d:', 'e:', 'f:', 'g:', 'h:', 'i:', 'j:', 'k:')):
                 return True
@@ -216,22 +587,20 @@ class DeviceScanner:
         
         for device in devices:
             if device['id'] == device_id:
-                # Add additional details
-                device['smart_data'] = await self._get_smart_data(device)
-                device['detailed_scan_time'] = psutil.boot_time()
-                return device
+                return await self.describe(device)
                 
         return None
     
+    async def describe(self, device: Dict) -> Dict:
+        """Add the details only a single-device view needs to a scanned device"""
+        device['smart_data'] = await self._get_smart_data(device)
+        device['detailed_scan_time'] = psutil.boot_time()
+        return device
+    
     async def _get_smart_data(self, device: Dict) -> Optional[Dict]:
-        """Get SMART attributes if available (bonus feature)"""
+        """Get SMART / NVMe health (cached for a short while by the health monitor)"""
         try:
-            # This would require additional tools like smartctl
-            # For now, return placeholder
-            return {
-                "available": False,
-                "reason": "SMART data requires additional tools (smartctl)"
-            }
+            return await self.health.check(device['device_path'])
         except Exception as e:
             logger.warning(f"Could not get SMART data: {e}")
             return None
\ No newline at end of file
@@ -1,21 +1,37 @@
 # FastAPI Backend - main.py
-from fastapi import FastAPI, WebSocket, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse, Response
 import asyncio
 import uuid
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
 
 # Local imports
 from device_scanner import DeviceScanner
+from device_inventory import DeviceInventory
+from device_health import HealthMonitor, unhealthy_reason
 from wipe_simulator import WipeSimulator
 from pdf_generator import CertificateGenerator
-from models import WipeRequest, WipeSession, Device
+from models import WipeRequest, WipeSession, Device, BatchWipeRequest, Certificate
+from wipe_scheduler import WipeScheduler, WipeJob, physical_device_key, device_bus_key
+from wipe_progress import ProgressHub, ProgressEncoder, ENCODINGS, negotiate_encoding
+from wipe_batch import BatchRegistry
+from wipe_runner import EngineWipeRunner
+from wipe_engine import aligned_block_size
+from wipe_journal import CheckpointJournal, CHECKPOINT_INTERVAL
+from wipe_store import WipeStore, DB_PATH
+from wipe_cluster import WorkerNode
+from wipe_discard import DISCARD_METHODS
+from wipe_metrics import REGISTRY, CONTENT_TYPE, WIPES, CERTIFICATE_LATENCY
+import real_wipe_stubs
 
 # Create directories
 os.makedirs("logs", exist_ok=True)
@@ -32,7 +48,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="SecureWipe API", version="1.0.0")
+# Seconds a shutdown waits for running wipes to checkpoint and certificates to finish
+SHUTDOWN_TIMEOUT = float(os.environ.get("SECUREWIPE_SHUTDOWN_TIMEOUT", "30"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.accepting_wipes = True
+    device_inventory.start()
+    await resume_interrupted_wipes()
+    yield
+    device_inventory.stop()
+    await shutdown_gracefully(app)
+
+app = FastAPI(title="SecureWipe API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware for frontend
 app.add_middleware(
@@ -47,9 +75,106 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
 # Global state
-device_scanner = DeviceScanner()
+device_health = HealthMonitor()
+device_scanner = DeviceScanner(health=device_health)
+device_inventory = DeviceInventory(device_scanner)
 certificate_generator = CertificateGenerator()
-active_wipes = {}
+progress_hub = ProgressHub()
+SSE_KEEPALIVE_INTERVAL = 15.0
+wipe_store = WipeStore(os.environ.get("SECUREWIPE_DB", DB_PATH))
+progress_hub.add_listener(wipe_store.record_progress)
+# Other server workers see this worker's wipes through the store
+worker_node = WorkerNode(wipe_store)
+progress_hub.add_listener(worker_node.record_snapshot, on_close=worker_node.close_snapshot)
+checkpoint_journal = CheckpointJournal(wipe_store, CHECKPOINT_INTERVAL)
+batch_registry = BatchRegistry(store=wipe_store)
+
+async def finalize_wipe(job: WipeJob):
+    """Issue the certificate for a completed wipe, whether or not anyone is watching"""
+    try:
+        if job.status == "completed":
+            started = time.perf_counter()
+            cert_id = await certificate_generator.generate_certificate(job.session, job.latest)
+            CERTIFICATE_LATENCY.observe(time.perf_counter() - started)
+            job.certificate_id = cert_id
+            wipe_store.save_certificate(Certificate(
+                cert_id=cert_id,
+                wipe_id=job.wipe_id,
+                device_id=job.session.device_id,
+                device_serial=job.session.device_serial,
+                standard=job.session.standard,
+                generated_at=datetime.utcnow(),
+                file_path=certificate_generator.get_certificate_path(cert_id)
+            ))
+            job.publish(dict(
+                job.latest,
+                certificate_id=cert_id,
+                download_url=f"/api/certificate/{cert_id}"
+            ))
+    finally:
+        batch_registry.wipe_finished(job.wipe_id, job.status, job.certificate_id, job.error)
+
+wipe_scheduler = WipeScheduler(
+    max_concurrent=int(os.environ.get("SECUREWIPE_MAX_CONCURRENT_WIPES", "16")),
+    max_per_bus=int(os.environ.get("SECUREWIPE_MAX_WIPES_PER_BUS", "4")),
+    hub=progress_hub,
+    on_finished=finalize_wipe,
+    device_locks=worker_node
+)
+
+def _wipe_counts() -> Dict:
+    stats = wipe_scheduler.stats()
+    return {("running",): stats["running"], ("queued",): stats["queued"]}
+
+WIPES.set_function(_wipe_counts)
+
+def _apply_command(wipe_id: str, command: str):
+    """Carry out cancel/pause/resume sent by another worker for a wipe running here"""
+    job = wipe_scheduler.get(wipe_id)
+    if job and not job.done.is_set():
+        getattr(wipe_scheduler, command)(job)
+
+async def resume_interrupted_wipes():
+    """Resume wipes whose checkpoints survived a restart"""
+    worker_node.start(_apply_command)
+    for checkpoint in checkpoint_journal.load_all():
+        try:
+            session = WipeSession(**checkpoint["session"])
+            if session.mode == "real" and not real_wipe_stubs.REAL_WIPE_ENABLED:
+                logger.warning(f"Not resuming real wipe {session.wipe_id}: real wipe operations are disabled")
+                continue
+            # Every worker sees every checkpoint; only one may resume it
+            if not worker_node.claim_wipe(session.wipe_id):
+                continue
+            job = await _create_job(session, resume=checkpoint)
+            wipe_store.save_session(session)
+            wipe_scheduler.submit(job)
+            logger.info(
+                f"Resuming wipe {session.wipe_id} at pass {checkpoint['pass_index'] + 1}, "
+                f"offset {checkpoint['offset']}"
+            )
+        except HTTPException as e:
+            logger.warning(f"Not resuming wipe {checkpoint.get('wipe_id')}: {e.detail}; its checkpoint is kept")
+        except Exception as e:
+            logger.error(f"Could not resume wipe {checkpoint.get('wipe_id')}: {e}")
+
+async def shutdown_gracefully(app: FastAPI):
+    """Stop taking wipes, checkpoint running ones at a block boundary and flush everything
+
+    Suspended wipes keep their checkpoints, so the next start resumes them
+    instead of starting over. Wipes still busy after SHUTDOWN_TIMEOUT keep
+    their last periodic checkpoint.
+    """
+    app.state.accepting_wipes = False
+    logger.info(f"Shutting down: suspending wipes (up to {SHUTDOWN_TIMEOUT}s)")
+    try:
+        if not await wipe_scheduler.shutdown(SHUTDOWN_TIMEOUT):
+            logger.warning("Shutdown deadline passed with wipes still stopping; they resume from their last checkpoint")
+    finally:
+        worker_node.stop()
+        wipe_store.close()
+        for handler in logging.getLogger().handlers:
+            handler.flush()
 
 @app.get("/")
 async def root():
@@ -57,10 +182,10 @@ async def root():
     return FileResponse("frontend/index.html")
 
 @app.get("/api/devices")
-async def get_devices():
-    """Get list of all attached storage devices"""
+async def get_devices(refresh: bool = False):
+    """Get list of all attached storage devices (from the inventory; refresh forces a rescan)"""
     try:
-        devices = await device_scanner.scan_devices()
+        devices = await device_inventory.devices(refresh=refresh)
         logger.info(f"Found {len(devices)} devices")
         return {"devices": devices}
     except Exception as e:
@@ -71,85 +196,445 @@ async def get_devices():
 async def get_device_details(device_id: str):
     """Get detailed information about a specific device"""
     try:
-        device = await device_scanner.get_device_details(device_id)
+        device = await device_inventory.get_details(device_id)
         if not device:
             raise HTTPException(status_code=404, detail="Device not found")
         return device
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Device details error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/device/{device_id}/health")
+async def get_device_health(device_id: str, refresh: bool = False):
+    """Get SMART / NVMe health of a device (cached briefly unless refresh is set)"""
+    device = await device_inventory.get(device_id)
+    if not device:
+        raise HTTPException(status_code=404, detail="Device not found")
+    return await device_health.check(device["device_path"], refresh=refresh)
+
+def _validate_wipe_request(mode: str, method: str):
+    if not app.state.accepting_wipes:
+        raise HTTPException(status_code=503, detail="Server is shutting down")
+    if mode == "real" and not real_wipe_stubs.REAL_WIPE_ENABLED:
+        raise HTTPException(status_code=403, detail="Real wipe operations are disabled")
+    if method != "overwrite" and method not in DISCARD_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown sanitization method: {method}")
+
+def _refuse_busy_device(device: Dict):
+    """409 if a real wipe must not write to the device: it holds the system or something is mounted on it"""
+    # Mounts are cross-referenced at scan time; never write under a live filesystem
+    if device.get("system_disk"):
+        raise HTTPException(status_code=409, detail="Refusing to wipe a disk that holds a system filesystem")
+    if device.get("in_use"):
+        raise HTTPException(status_code=409, detail=(
+            f"Device is in use (mounted at {', '.join(device.get('mountpoints') or []) or 'a stacked volume'}); "
+            "unmount it first"
+        ))
+
+async def _refuse_unhealthy_device(device: Dict, allow_unhealthy: bool):
+    """409 if SMART reports the device as failing, unless the request accepts that"""
+    if allow_unhealthy:
+        return
+    # Don't commit hours of overwriting to a drive that is already dying
+    reason = unhealthy_reason(await device_health.check(device["device_path"]))
+    if reason:
+        raise HTTPException(status_code=409, detail=(
+            f"Device health check failed: {reason}; set allow_unhealthy to wipe it anyway"
+        ))
+
+def _confirm_resume_device(session: WipeSession, device: Dict):
+    """409 unless the device is verifiably the disk the interrupted wipe was writing"""
+    if not (device.get("serial") or device.get("wwn")):
+        # Its stable id then only stands for a /dev path, which proves nothing after a restart
+        raise HTTPException(status_code=409, detail=(
+            f"Device {session.device_id} has no serial or WWN to confirm it is the disk being wiped"
+        ))
+    for field, recorded in (("serial", session.device_serial), ("wwn", session.device_wwn),
+                            ("total_size", session.device_size)):
+        if recorded is not None and device.get(field) != recorded:
+            raise HTTPException(status_code=409, detail=(
+                f"Device {session.device_id} no longer matches the interrupted wipe "
+                f"({field} was {recorded}, now {device.get(field)})"
+            ))
+
+async def _prepare_wipe(wipe_request: WipeRequest, device: Optional[Dict] = None) -> WipeJob:
+    """Create a session and its job for a request, without queueing it yet"""
+    session = WipeSession(
+        wipe_id=str(uuid.uuid4()),
+        device_id=wipe_request.device_id,
+        mode=wipe_request.mode,
+        # A discard is a single operation regardless of the requested pass count
+        passes=1 if wipe_request.method in DISCARD_METHODS else wipe_request.passes,
+        standard=wipe_request.standard,
+        method=wipe_request.method,
+        verify=wipe_request.verify,
+        verify_percent=wipe_request.verify_percent,
+        allow_unhealthy=wipe_request.allow_unhealthy,
+        started_at=datetime.utcnow()
+    )
+    return await _create_job(session, device=device)
+
+def _queue_wipe(job: WipeJob):
+    wipe_store.save_session(job.session)
+    wipe_scheduler.submit(job)
+    logger.info(f"Started wipe {job.wipe_id} for device {job.session.device_id}")
+
+async def _submit_wipe(wipe_request: WipeRequest, device: Optional[Dict] = None) -> WipeJob:
+    """Create a session for a request and queue it on the scheduler"""
+    job = await _prepare_wipe(wipe_request, device)
+    _queue_wipe(job)
+    return job
+
 @app.post("/api/wipe/start")
 async def start_wipe(wipe_request: WipeRequest):
-    """Start a wipe operation (simulation mode)"""
+    """Queue a wipe operation on the scheduler (simulation unless real wipes are enabled)"""
+    _validate_wipe_request(wipe_request.mode, wipe_request.method)
+    
     try:
-        wipe_id = str(uuid.uuid4())
-        
-        # Create wipe session
-        session = WipeSession(
-            wipe_id=wipe_id,
-            device_id=wipe_request.device_id,
-            mode=wipe_request.mode,
-            passes=wipe_request.passes,
-            standard=wipe_request.standard,
-            started_at=datetime.utcnow()
-        )
-        
-        # Initialize wipe simulator
-        simulator = WipeSimulator(session)
-        active_wipes[wipe_id] = {
-            "session": session,
-            "simulator": simulator
-        }
-        
-        logger.info(f"Started wipe {wipe_id} for device {wipe_request.device_id}")
-        
+        job = await _submit_wipe(wipe_request)
         return {
-            "wipe_id": wipe_id,
-            "status": "started",
-            "mode": "SIMULATION",
-            "estimated_duration": simulator.estimated_duration
+            "wipe_id": job.wipe_id,
+            "status": job.status,
+            "queue_position": wipe_scheduler.queue_position(job),
+            "mode": "REAL" if wipe_request.mode == "real" else "SIMULATION",
+            "estimated_duration": getattr(job.runner, "estimated_duration", None)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Wipe start error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/wipe/batch")
+async def start_batch_wipe(batch_request: BatchWipeRequest):
+    """Queue wipes for a list of devices, or every device matching a selector, as one batch"""
+    shared = batch_request.model_dump(exclude={"device_ids", "devices", "selector"})
+    requests = [WipeRequest(device_id=device_id, **shared) for device_id in batch_request.device_ids]
+    for item in batch_request.devices:
+        overrides = item.model_dump(exclude_none=True)
+        requests.append(WipeRequest(**dict(shared, **overrides)))
+    
+    try:
+        # One inventory read serves every device in the batch
+        devices = {d["id"]: d for d in await device_inventory.devices()}
+    except Exception as e:
+        logger.error(f"Device scan error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    selector = batch_request.selector
+    if selector:
+        listed = {r.device_id for r in requests}
+        for device in devices.values():
+            if device["id"] in listed:
+                continue
+            if selector.type and device.get("type") != selector.type:
+                continue
+            if selector.removable is not None and device.get("removable") != selector.removable:
+                continue
+            requests.append(WipeRequest(device_id=device["id"], **shared))
+    
+    if not requests:
+        raise HTTPException(status_code=400, detail="Batch selects no devices")
+    if len({r.device_id for r in requests}) != len(requests):
+        raise HTTPException(status_code=400, detail="A device appears more than once in the batch")
+    for wipe_request in requests:
+        _validate_wipe_request(wipe_request.mode, wipe_request.method)
+        if wipe_request.mode == "real" and wipe_request.device_id not in devices:
+            raise HTTPException(status_code=404, detail=f"Device not found: {wipe_request.device_id}")
+    
+    # Every device check runs before anything is queued, so a batch is accepted or rejected
+    # whole; health is checked for all devices in parallel (and _create_job finds it cached)
+    for wipe_request in requests:
+        if wipe_request.mode == "real":
+            try:
+                _refuse_busy_device(devices[wipe_request.device_id])
+            except HTTPException as e:
+                raise HTTPException(status_code=e.status_code, detail=f"{wipe_request.device_id}: {e.detail}")
+    gated = {r.device_id: devices[r.device_id]["device_path"]
+             for r in requests if r.mode == "real" and not r.allow_unhealthy}
+    if gated:
+        health = await device_health.check_many(gated.values())
+        unhealthy = {device_id: reason for device_id, path in gated.items()
+                     if (reason := unhealthy_reason(health[path]))}
+        if unhealthy:
+            raise HTTPException(status_code=409, detail={
+                "message": "Device health check failed; set allow_unhealthy to wipe anyway",
+                "devices": unhealthy
+            })
+    
+    try:
+        # Devices absent from the scan ({}) are simulated at the default size without rescanning
+        jobs = [await _prepare_wipe(r, devices.get(r.device_id, {})) for r in requests]
+        # The batch exists before its first wipe can finish
+        batch = batch_registry.create([
+            {
+                "wipe_id": job.wipe_id,
+                "device_id": job.session.device_id,
+                "device_size": (devices.get(job.session.device_id) or {}).get("total_size")
+            }
+            for job in jobs
+        ])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch wipe start error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    for job in jobs:
+        _queue_wipe(job)
+    
+    return {
+        "batch_id": batch.batch_id,
+        "wipes": [
+            {
+                "wipe_id": job.wipe_id,
+                "device_id": job.session.device_id,
+                "status": job.status,
+                "queue_position": wipe_scheduler.queue_position(job),
+                "estimated_duration": getattr(job.runner, "estimated_duration", None)
+            }
+            for job in jobs
+        ],
+        "progress_url": f"/api/wipe/batch/{batch.batch_id}"
+    }
+
+@app.get("/api/wipe/batch/{batch_id}")
+async def get_batch_progress(batch_id: str):
+    """Get aggregate progress and throughput of a batch"""
+    batch = batch_registry.get(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch.progress(_progress_snapshot)
+
+@app.get("/api/wipe/batch/{batch_id}/certificates")
+async def get_batch_certificates(batch_id: str):
+    """Get the certificate index of a finished batch"""
+    batch = batch_registry.get(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if not batch.index_path:
+        raise HTTPException(status_code=409, detail="Batch has not finished yet")
+    return FileResponse(batch.index_path, media_type="application/json",
+                        filename=f"SecureWipe_Batch_{batch_id}.json")
+
+async def _create_job(session: WipeSession, resume: Optional[Dict] = None,
+                      device: Optional[Dict] = None) -> WipeJob:
+    """Build the runner for a session and key it to its physical device and bus"""
+    if session.mode != "real":
+        # Simulated wipes never touch hardware, so each one gets its own device and bus;
+        # the device (if attached) only sizes the simulated timing
+        if device is None:
+            try:
+                device = await device_inventory.get(session.device_id)
+            except Exception as e:
+                logger.warning(f"Could not size simulated device {session.device_id}: {e}")
+        session.device_serial = (device or {}).get("serial")
+        simulator = WipeSimulator(session, journal=checkpoint_journal, resume=resume, device=device)
+        return WipeJob(session, simulator, session.device_id, session.device_id)
+    
+    if resume:
+        # The checkpointed /dev path may name another disk after a reboot or hotplug;
+        # the stable id finds the disk that was being wiped, wherever it is attached now
+        device = await device_inventory.get(session.device_id)
+        if not device:
+            raise HTTPException(status_code=404, detail=f"Device {session.device_id} is not attached")
+        # Refusing leaves the checkpoint in place for when the right disk is back
+        _confirm_resume_device(session, device)
+        if device["device_path"] != resume["device_path"]:
+            logger.info(f"Wipe {session.wipe_id} resumes on {device['device_path']} (was {resume['device_path']})")
+    else:
+        if device is None:
+            device = await device_inventory.get(session.device_id)
+        if not device:
+            raise HTTPException(status_code=404, detail="Device not found")
+        session.device_serial = device.get("serial")
+        session.device_wwn = device.get("wwn")
+        session.device_size = device.get("total_size")
+    # A resumed wipe gets the same checks as a new one: the disk may have been mounted meanwhile
+    _refuse_busy_device(device)
+    await _refuse_unhealthy_device(device, session.allow_unhealthy)
+    device_path, device_type = device["device_path"], device.get("type", "UNKNOWN")
+    device_size = device.get("total_size")
+    block_size = aligned_block_size(device.get("logical_block_size"), device.get("physical_block_size"))
+    session.device_path = device_path
+    
+    runner = EngineWipeRunner(
+        session, device_path, device_type=device_type, block_size=block_size,
+        journal=checkpoint_journal, resume=resume, device_size=device_size
+    )
+    return WipeJob(session, runner, physical_device_key(device_path), device_bus_key(device_path))
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/api/scheduler")
+async def get_scheduler_stats():
+    """Get running and queued wipe counts of this worker"""
+    return dict(wipe_scheduler.stats(), worker_id=worker_node.worker_id,
+                workers=len(worker_node.live_workers()))
+
+def _progress_snapshot(wipe_id: str) -> Optional[Dict]:
+    """Latest published progress of a wipe, with its live queue position while queued
+
+    Wipes running on another worker are read from the store.
+    """
+    channel = progress_hub.get(wipe_id)
+    if not channel or channel.snapshot is None:
+        return worker_node.snapshot(wipe_id)
+    snapshot = dict(channel.snapshot, version=channel.version)
+    job = wipe_scheduler.get(wipe_id)
+    if job and job.status == "queued":
+        snapshot["queue_position"] = wipe_scheduler.queue_position(job)
+    return snapshot
+
+@app.get("/api/wipe/{wipe_id}")
+async def get_wipe_progress(wipe_id: str):
+    """Get the latest progress snapshot of a wipe"""
+    snapshot = _progress_snapshot(wipe_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Wipe session not found")
+    return snapshot
+
+def _control_wipe(wipe_id: str, command: str):
+    """Cancel, pause or resume a wipe here, or forward the command to the worker running it"""
+    job = wipe_scheduler.get(wipe_id)
+    if job:
+        if job.done.is_set():
+            raise HTTPException(status_code=409, detail=f"Wipe already {job.status}")
+        getattr(wipe_scheduler, command)(job)
+        return
+    record = worker_node.remote_wipe(wipe_id)
+    if not record or record["progress"] is None:
+        raise HTTPException(status_code=404, detail="Wipe session not found")
+    if record["closed"]:
+        raise HTTPException(status_code=409, detail=f"Wipe already {record['progress'].get('status')}")
+    if not worker_node.send_command(record["owner"], wipe_id, command):
+        raise HTTPException(status_code=409, detail="The worker running this wipe has stopped")
+
+@app.post("/api/wipe/{wipe_id}/cancel")
+async def cancel_wipe(wipe_id: str):
+    """Cancel a wipe; a running pass stops at its next I/O block"""
+    _control_wipe(wipe_id, "cancel")
+    logger.info(f"Cancellation requested for wipe {wipe_id}")
+    return {"wipe_id": wipe_id, "status": "cancelling"}
+
+@app.post("/api/wipe/{wipe_id}/pause")
+async def pause_wipe(wipe_id: str):
+    """Pause a wipe at its next I/O block (written data is synced and checkpointed)"""
+    _control_wipe(wipe_id, "pause")
+    return {"wipe_id": wipe_id, "status": "pausing"}
+
+@app.post("/api/wipe/{wipe_id}/resume")
+async def resume_wipe(wipe_id: str):
+    """Resume a paused wipe"""
+    _control_wipe(wipe_id, "resume")
+    return {"wipe_id": wipe_id, "status": "resuming"}
+
+@app.get("/api/wipe/{wipe_id}/events")
+async def wipe_progress_events(wipe_id: str, request: Request, delta: bool = False):
+    """Server-Sent Events stream of a wipe's progress, starting from the latest snapshot"""
+    subscription = progress_hub.subscribe(wipe_id) or worker_node.follow(wipe_id)
+    if not subscription:
+        raise HTTPException(status_code=404, detail="Wipe session not found")
+    encoder = ProgressEncoder("json", delta=delta)
+    
+    async def stream():
+        with subscription:
+            while True:
+                try:
+                    progress = await asyncio.wait_for(subscription.__anext__(), SSE_KEEPALIVE_INTERVAL)
+                except StopAsyncIteration:
+                    yield "event: end\ndata: {}\n\n"
+                    return
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Comment line keeps proxies and load balancers from timing the stream out
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {subscription.version}\nevent: progress\ndata: {encoder.encode(progress)}\n\n"
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
 @app.websocket("/ws/progress/{wipe_id}")
-async def websocket_progress(websocket: WebSocket, wipe_id: str):
-    """WebSocket endpoint for real-time wipe progress"""
-    await websocket.accept()
+async def websocket_progress(websocket: WebSocket, wipe_id: str, delta: bool = True):
+    """WebSocket endpoint for real-time wipe progress (any number of viewers per wipe)
+    
+    Clients may offer the "securewipe.msgpack" subprotocol for binary frames;
+    after the first full snapshot only changed fields are sent unless ?delta=false.
+    """
+    subprotocol = negotiate_encoding(websocket.scope.get("subprotocols"))
+    await websocket.accept(subprotocol=subprotocol)
+    encoder = ProgressEncoder(ENCODINGS[subprotocol] if subprotocol else "json", delta=delta)
+    
+    async def send(message: Dict):
+        data = encoder.encode(message)
+        if isinstance(data, bytes):
+            await websocket.send_bytes(data)
+        else:
+            await websocket.send_text(data)
     
-    if wipe_id not in active_wipes:
-        await websocket.send_json({"error": "Wipe session not found"})
+    subscription = progress_hub.subscribe(wipe_id) or worker_node.follow(wipe_id)
+    if not subscription:
+        await send({"error": "Wipe session not found"})
         await websocket.close()
         return
     
-    simulator = active_wipes[wipe_id]["simulator"]
-    session = active_wipes[wipe_id]["session"]
-    
+    # The wipe runs on the scheduler; this socket only relays its progress,
+    # starting from the latest snapshot, and leaving does not affect the wipe
     try:
-        # Start the simulation
-        async for progress in simulator.simulate_wipe():
-            await websocket.send_json(progress)
-            
-            if progress.get("completed"):
-                # Generate certificate
-                cert_id = await certificate_generator.generate_certificate(session, progress)
-                await websocket.send_json({
-                    "completed": True,
-                    "certificate_id": cert_id,
-                    "download_url": f"/api/certificate/{cert_id}"
-                })
-                break
-                
+        with subscription:
+            async for progress in subscription:
+                if progress.get("status") == "queued":
+                    job = wipe_scheduler.get(wipe_id)
+                    if job:
+                        progress = dict(progress, queue_position=wipe_scheduler.queue_position(job))
+                await send(progress)
+    except WebSocketDisconnect:
+        logger.info(f"Progress viewer of wipe {wipe_id} disconnected")
+        return
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         await websocket.send_json({"error": str(e)})
-    finally:
-        # Clean up
-        if wipe_id in active_wipes:
-            del active_wipes[wipe_id]
-        await websocket.close()
+    await websocket.close()
+
+def _utc_iso(value: Optional[datetime]) -> Optional[str]:
+    """Query timestamps compare against the store's naive-UTC ISO strings"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+@app.get("/api/wipes")
+async def list_wipes(device: Optional[str] = None, standard: Optional[str] = None,
+                     status: Optional[str] = None, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = 100):
+    """List wipe history newest first; follow next_cursor for further pages"""
+    try:
+        return wipe_store.list_wipes(device, standard, status, _utc_iso(since), _utc_iso(until), cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/certificates")
+async def list_certificates(device: Optional[str] = None, standard: Optional[str] = None,
+                            status: Optional[str] = None, since: Optional[datetime] = None,
+                            until: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = 100):
+    """List issued certificates newest first; follow next_cursor for further pages"""
+    try:
+        page = wipe_store.list_certificates(device, standard, status, _utc_iso(since), _utc_iso(until),
+                                            cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for certificate in page["items"]:
+        certificate["download_url"] = f"/api/certificate/{certificate['cert_id']}"
+    return page
 
 @app.get("/api/certificate/{cert_id}")
 async def download_certificate(cert_id: str):
@@ -198,4 +683,9 @@ async def get_audit_logs():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    workers = int(os.environ.get("SECUREWIPE_WORKERS", "1"))
+    if workers > 1:
+        # Workers share wipe state through the store (see wipe_cluster); reload needs a single process
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -27,6 +27,35 @@ class WipeRequest(BaseModel):
     mode: str = "simulation"  # simulation, dry-run, or real (disabled)
     passes: int = 3
     standard: str = "dod"  # nist, dod, gutmann
+    method: str = "overwrite"  # overwrite, discard, secure_discard
+    verify: str = "sample"  # none, sample, full
+    verify_percent: float = 10.0
+    allow_unhealthy: bool = False  # real mode: wipe even if SMART reports the device as failing
+
+class BatchDevice(BaseModel):
+    """One device in a batch wipe, optionally overriding the batch defaults"""
+    device_id: str
+    passes: Optional[int] = None
+    standard: Optional[str] = None
+    method: Optional[str] = None
+
+class DeviceSelector(BaseModel):
+    """Selects attached devices by attribute, e.g. all removable USB drives"""
+    type: Optional[str] = None  # USB, SD_CARD, HDD, SSD, NVME_SSD
+    removable: Optional[bool] = None
+
+class BatchWipeRequest(BaseModel):
+    """Request to wipe several devices at once with shared defaults"""
+    device_ids: List[str] = []
+    devices: List[BatchDevice] = []
+    selector: Optional[DeviceSelector] = None
+    mode: str = "simulation"
+    passes: int = 3
+    standard: str = "dod"
+    method: str = "overwrite"
+    verify: str = "sample"
+    verify_percent: float = 10.0
+    allow_unhealthy: bool = False
 
 class WipeSession(BaseModel):
     """Wipe session information"""
@@ -35,6 +64,14 @@ class WipeSession(BaseModel):
     mode: str
     passes: int
     standard: str
+    method: str = "overwrite"
+    verify: str = "sample"
+    verify_percent: float = 10.0
+    device_serial: Optional[str] = None
+    device_wwn: Optional[str] = None
+    device_size: Optional[int] = None
+    device_path: Optional[str] = None
+    allow_unhealthy: bool = False
     started_at: datetime
     completed_at: Optional[datetime] = None
     status: str = "initialized"
@@ -57,5 +94,7 @@ class Certificate(BaseModel):
     cert_id: str
     wipe_id: str
     device_id: str
+    device_serial: Optional[str] = None
+    standard: Optional[str] = None
     generated_at: datetime
     file_path: str
\ No newline at end of file
@@ -7,6 +7,8 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.platypus.flowables import HRFlowable
 import uuid
 import os
+import json
+import hashlib
 from datetime import datetime
 import logging
 from models import WipeSession
@@ -97,9 +99,11 @@ class CertificateGenerator:
             
             operation_data = [
                 ["Device ID:", session.device_id],
-                ["Wipe Standard:", self._get_standard_name(session.standard)],
+                ["Sanitization Method:", self._get_method_name(session.method)],
+                ["Wipe Standard:", self._get_standard_name(session.standard)
+                 if session.method == "overwrite" else "N/A (discard)"],
                 ["Number of Passes:", str(session.passes)],
-                ["Operation Mode:", "<b><font color='red'>SIMULATION</font></b>"],
+                ["Operation Mode:", self._get_mode_label(session.mode)],
                 ["Start Time:", session.started_at.strftime("%Y-%m-%d %H:%M:%S UTC")],
                 ["Duration:", f"{progress_data.get('elapsed_time', 0):.1f} seconds"],
                 ["Status:", "<b><font color='green'>COMPLETED</font></b>"]
@@ -116,6 +120,28 @@ class CertificateGenerator:
             story.append(op_table)
             story.append(Spacer(1, 20))
             
+            # Write evidence: digests computed inline while each pass was written
+            pass_digests = progress_data.get("summary", {}).get("pass_digests") or []
+            if pass_digests:
+                story.append(Paragraph("<b>WRITE EVIDENCE</b>", styles['Heading3']))
+                story.append(Spacer(1, 10))
+                
+                evidence_data = [["Pass", "Pattern", "Digest of written data"]] + [
+                    [str(d["pass"]), d["pattern"], f"{d['algorithm'].upper()}:{d['digest']}"]
+                    for d in pass_digests
+                ]
+                evidence_table = Table(evidence_data, colWidths=[0.5*inch, 1.3*inch, 4.4*inch])
+                evidence_table.setStyle(TableStyle([
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTNAME', (2, 1), (2, -1), 'Courier'),
+                    ('FONTSIZE', (0, 0), (-1, -1), 7),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+                    ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+                ]))
+                story.append(evidence_table)
+                story.append(Spacer(1, 20))
+            
             # Compliance section
             story.append(Paragraph("<b>COMPLIANCE & STANDARDS</b>", styles['Heading3']))
             story.append(Spacer(1, 10))
@@ -141,7 +167,18 @@ class CertificateGenerator:
                 spaceAfter=12
             )
             
-            disclaimer_text = """
+            if session.mode == "real":
+                disclaimer_text = """
+            <b>⚠️ IMPORTANT SECURITY NOTICE</b><br/><br/>
+            This certificate records a <b>REAL</b> data sanitization operation: the device was 
+            overwritten as described above, and the pass digests and verification results it was 
+            issued for are bound into the certificate hash below.<br/><br/>
+            
+            Overwriting may not reach remapped or over-provisioned areas of flash media. For 
+            production data sanitization, follow NIST SP 800-88 guidelines.
+            """
+            else:
+                disclaimer_text = """
             <b>⚠️ IMPORTANT SECURITY NOTICE</b><br/><br/>
             This certificate verifies a <b>SIMULATED</b> data sanitization operation performed for 
             demonstration purposes only. No actual data destruction occurred during this operation.<br/><br/>
@@ -167,7 +204,7 @@ class CertificateGenerator:
                 ["Authorized Signature:", "Mani Verma"],
                 ["Inspector Certification:", "CERT-MV-2025"],
                 ["Digital Timestamp:", datetime.utcnow().isoformat() + "Z"],
-                ["Certificate Hash:", f"SHA256:{hash(cert_id + session.wipe_id) % 1000000:06d}"]
+                ["Certificate Hash:", f"SHA256:{self._certificate_hash(cert_id, session, progress_data)}"]
             ]
             
             sig_table = Table(signature_data, colWidths=[2*inch, 4*inch])
@@ -201,6 +238,25 @@ class CertificateGenerator:
             logger.error(f"Certificate generation failed: {e}")
             raise
     
+    def _certificate_hash(self, cert_id: str, session: WipeSession, progress_data: dict) -> str:
+        """SHA-256 over the certificate's evidence (session, per-pass digests, verification)"""
+        summary = progress_data.get("summary", {})
+        evidence = {
+            "cert_id": cert_id,
+            "wipe_id": session.wipe_id,
+            "device_id": session.device_id,
+            "standard": session.standard,
+            "method": session.method,
+            "mode": session.mode,
+            "passes": session.passes,
+            "started_at": session.started_at.isoformat(),
+            "completed_at": progress_data.get("completed_at"),
+            "pass_digests": summary.get("pass_digests") or [],
+            "verification": summary.get("verification")
+        }
+        canonical = json.dumps(evidence, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+    
     def _get_standard_name(self, standard: str) -> str:
         """Get full name for wipe standard"""
         standards = {
@@ -210,6 +266,24 @@ class CertificateGenerator:
         }
         return standards.get(standard, f"Custom Standard: {standard}")
     
+    def _get_mode_label(self, mode: str) -> str:
+        """Operation mode as shown on the certificate"""
+        labels = {
+            "real": "<b><font color='green'>REAL</font></b>",
+            "dry-run": "<b><font color='red'>DRY RUN</font></b>",
+            "simulation": "<b><font color='red'>SIMULATION</font></b>"
+        }
+        return labels.get(mode, f"<b><font color='red'>{mode.upper()}</font></b>")
+    
+    def _get_method_name(self, method: str) -> str:
+        """Get full name for sanitization method"""
+        methods = {
+            "overwrite": "Overwrite (Clear)",
+            "discard": "Block discard / TRIM with zero read-back verification",
+            "secure_discard": "Secure block discard with zero read-back verification"
+        }
+        return methods.get(method, method)
+    
     def _get_compliance_text(self, standard: str) -> str:
         """Get compliance information for the standard"""
         compliance = {
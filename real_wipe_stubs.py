@@ -13,12 +13,18 @@ DO NOT ENABLE THESE FUNCTIONS WITHOUT:
 5. Compliance with organizational security policies
 """
 
-import os
 import logging
 import subprocess
 from typing import Dict, Optional
 import platform
 
+from wipe_engine import OverwriteEngine, DEFAULT_BLOCK_SIZE
+from wipe_io import create_io_backend
+from wipe_patterns import get_standard_passes, get_pattern_pool
+from wipe_verify import WipeVerifier
+from wipe_discard import discard_target
+from device_scanner import device_mounts
+
 logger = logging.getLogger(__name__)
 
 # Safety flag - MUST remain False for public demo
@@ -195,119 +201,135 @@ class RealWipeOperations:
         """
     
     @require_authorization
-    def multi_pass_overwrite(self, device_path: str, passes: int = 3, pattern: str = "dod") -> Dict:
+    def multi_pass_overwrite(self, device_path: str, passes: int = 3, pattern: str = "dod",
+                             device_type: str = "UNKNOWN", block_size: int = DEFAULT_BLOCK_SIZE,
+                             direct: bool = True, queue_depth: Optional[int] = None, verify: str = "full",
+                             verify_percent: float = 10.0, progress_callback=None) -> Dict:
         """
-        Multi-pass data overwrite using dd command
+        Multi-pass data overwrite using the in-process streaming engine
         
         ⚠️ WARNING: PERMANENTLY DESTROYS ALL DATA ON DEVICE
         
-        Real implementation would:
+        Implementation:
         1. Verify device is not mounted
-        2. Perform multiple overwrite passes
+        2. Perform multiple overwrite passes with aligned buffers (O_DIRECT when supported)
         3. Use different patterns (0x00, 0xFF, random)
-        4. Verify each pass completion
+        4. Sync each pass to stable storage before starting the next
+        5. Read the device back and compare it against the final pass
         
         Args:
-            device_path: Block device path (e.g., /dev/sdb)
+            device_path: Block device path (e.g., /dev/sdb), regular file or loop image
             passes: Number of overwrite passes
             pattern: Overwrite pattern (dod, nist, gutmann)
+            device_type: Scanner device type (HDD, SSD, NVME_SSD, USB, ...), which sets the queue depth
+            block_size: Bytes per write (multiple of 4096)
+            direct: Bypass the page cache with O_DIRECT where available
+            queue_depth: Writes kept in flight; defaults to wipe_io.QUEUE_DEPTH_BY_TYPE for device_type
+            verify: Read-back verification mode (none, sample, full)
+            verify_percent: Percentage of extents read back in sample mode
+            progress_callback: Optional callable(pass_index, bytes_done, total_bytes)
             
         Returns:
             Dict with operation status and results
         """
-        # STUB IMPLEMENTATION - ACTUAL CODE DISABLED
-        raise NotImplementedError(
-            "Multi-pass overwrite disabled in demo. "
-            "Real implementation requires:\n"
-            "- Root/administrator privileges\n"
-            "- Device unmounted\n"
-            "- Direct block device access\n"
-            "- Commands: dd if=/dev/zero of={device} bs=1M\n"
-            "           dd if=/dev/random of={device} bs=1M"
-        )
-        
-        """
-        # REAL IMPLEMENTATION STUB (COMMENTED OUT FOR SAFETY):
-        
         try:
-            # Check if device is mounted
-            mount_result = subprocess.run(
-                ['mount'], capture_output=True, text=True, check=True
-            )
-            
-            if device_path in mount_result.stdout:
+            if self._is_mounted(device_path):
                 raise RuntimeError(f"Device {device_path} is mounted - unmount first")
             
-            # Get device size
-            size_result = subprocess.run(
-                ['sudo', 'blockdev', '--getsize64', device_path],
-                capture_output=True, text=True, check=True
+            engine = OverwriteEngine(
+                block_size=block_size,
+                direct=direct,
+                io_backend=create_io_backend(device_type, queue_depth)
             )
-            device_size = int(size_result.stdout.strip())
-            
+            pool = get_pattern_pool(block_size)
             patterns = self._get_overwrite_patterns(pattern, passes)
+            for pattern_data in patterns:
+                pattern_data["source"] = pool.source_for(pattern_data)
             
-            results = []
-            for i, pattern_data in enumerate(patterns):
-                logger.info(f"Starting pass {i+1}/{len(patterns)}: {pattern_data['name']}")
-                
-                dd_cmd = [
-                    'sudo', 'dd',
-                    f"if={pattern_data['source']}",
-                    f"of={device_path}",
-                    'bs=1M',
-                    'conv=fdatasync'
-                ]
-                
-                dd_result = subprocess.run(
-                    dd_cmd, capture_output=True, text=True
+            try:
+                results = engine.run_passes(device_path, patterns, progress_callback)
+            finally:
+                engine.io_backend.close()
+            
+            verification = None
+            if verify != "none" and patterns:
+                verifier = WipeVerifier(chunk_size=block_size, direct=direct)
+                verification = verifier.verify(
+                    device_path, pool.source_for(patterns[-1]),
+                    mode=verify, sample_percent=verify_percent
+                )
+                if not verification['passed']:
+                    raise RuntimeError(
+                        f"Verification failed: {verification['mismatched_sectors']} mismatched sectors"
+                    )
+            for result in results:
+                logger.info(
+                    f"Pass {result['pass']}/{len(patterns)} ({result['pattern']}) wrote "
+                    f"{result['bytes_written']} bytes at {result['throughput'] / 1e6:.1f} MB/s"
                 )
-                
-                results.append({
-                    'pass': i+1,
-                    'pattern': pattern_data['name'],
-                    'status': 'completed' if dd_result.returncode == 0 else 'failed',
-                    'output': dd_result.stderr
-                })
             
             return {
                 'status': 'completed',
                 'method': 'multi_pass_overwrite',
                 'device': device_path,
                 'passes': len(patterns),
-                'results': results
+                'results': results,
+                'verification': verification
             }
             
-        except subprocess.CalledProcessError as e:
+        except OSError as e:
             logger.error(f"Multi-pass overwrite failed: {e}")
-            raise RuntimeError(f"Overwrite failed: {e.stderr}")
-        """
+            raise RuntimeError(f"Overwrite failed: {e}")
     
-    def _get_overwrite_patterns(self, pattern_type: str, passes: int) -> list:
-        """Get overwrite patterns for different standards"""
-        patterns = {
-            "dod": [
-                {"name": "Zero pass", "source": "/dev/zero"},
-                {"name": "Ones pass", "source": "/dev/zero"},  # Would use custom pattern
-                {"name": "Random pass", "source": "/dev/urandom"}
-            ],
-            "nist": [
-                {"name": "Cryptographic random", "source": "/dev/urandom"}
-            ],
-            "gutmann": []  # Would implement 35 specialized patterns
-        }
+    @require_authorization
+    def discard_sanitize(self, device_path: str, secure: bool = False,
+                         verify_percent: float = 10.0) -> Dict:
+        """
+        Discard-based sanitization (BLKDISCARD/BLKSECDISCARD or PUNCH_HOLE)
+        
+        ⚠️ WARNING: PERMANENTLY DESTROYS ALL DATA ON DEVICE
         
-        base_patterns = patterns.get(pattern_type, patterns["dod"])
+        Implementation:
+        1. Verify device is not mounted
+        2. Discard every block (punch out the whole file for file/loop targets)
+        3. Sample the target and confirm it reads back as zeroes
         
-        # Repeat or truncate to match requested passes
-        if len(base_patterns) < passes:
-            # Repeat patterns if more passes requested
-            result = base_patterns * (passes // len(base_patterns))
-            result.extend(base_patterns[:passes % len(base_patterns)])
-        else:
-            result = base_patterns[:passes]
+        Args:
+            device_path: Block device path, regular file or loop image
+            secure: Use BLKSECDISCARD (block devices only)
+            verify_percent: Percentage of extents read back
             
-        return result
+        Returns:
+            Dict with operation status and results
+        """
+        if self._is_mounted(device_path):
+            raise RuntimeError(f"Device {device_path} is mounted - unmount first")
+        
+        result = discard_target(device_path, secure=secure)
+        verification = WipeVerifier().verify(
+            device_path, get_pattern_pool().get(b"\x00"),
+            mode="sample", sample_percent=verify_percent
+        )
+        if not verification['passed']:
+            raise RuntimeError(
+                "Device does not read back zeroes after discard - use an overwrite method instead"
+            )
+        
+        return {
+            'status': 'completed',
+            'method': 'secure_discard' if secure else 'discard',
+            'device': device_path,
+            'result': result,
+            'verification': verification
+        }
+    
+    def _is_mounted(self, device_path: str) -> bool:
+        """Check the mount and swap tables for the device, its partitions and volumes stacked on them"""
+        return bool(device_mounts(device_path))
+    
+    def _get_overwrite_patterns(self, pattern_type: str, passes: int) -> list:
+        """Get overwrite patterns for different standards (pattern None means random data)"""
+        return get_standard_passes(pattern_type, passes)
 
 # Create instance (all methods disabled by decorator)
 real_wipe = RealWipeOperations()
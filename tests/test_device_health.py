@@ -0,0 +1,68 @@
+# Device health parser tests - tests/test_device_health.py
+"""
+The SMART parsers and the pre-wipe health gate, run against recorded
+`smartctl --json -a` and `nvme smart-log -o json` reports in fixtures/smart.
+"""
+
+import json
+from pathlib import Path
+
+from device_health import parse_smartctl, parse_nvme_smart_log, unhealthy_reason
+
+FIXTURES = Path(__file__).parent / "fixtures" / "smart"
+
+
+def load(name: str) -> dict:
+    return json.loads((FIXTURES / name).read_text())
+
+
+def test_healthy_sata_passes_the_gate():
+    health = parse_smartctl(load("smartctl_sata_healthy.json"))
+    assert health["available"] and health["status"] == "healthy"
+    assert health["serial"] == "S3Z2NB0K123456A"
+    assert health["temperature_c"] == 33
+    assert health["power_on_hours"] == 12873
+    assert health["attributes"] == {"reallocated_sectors": 0, "pending_sectors": 0, "offline_uncorrectable": 0}
+    assert unhealthy_reason(health) is None
+
+
+def test_failing_sata_is_rejected():
+    health = parse_smartctl(load("smartctl_sata_failing.json"))
+    assert health["status"] == "failing"
+    assert health["passed"] is False
+    assert health["attributes"]["reallocated_sectors"] == 61392
+    reason = unhealthy_reason(health)
+    assert "SMART overall health self-assessment failed" in reason
+    assert "Reallocated_Sector_Ct failing now" in reason
+
+
+def test_healthy_nvme_through_smartctl():
+    health = parse_smartctl(load("smartctl_nvme_healthy.json"))
+    assert health["status"] == "healthy"
+    assert health["attributes"]["percentage_used"] == 2
+    assert unhealthy_reason(health) is None
+
+
+def test_failing_nvme_through_nvme_cli():
+    health = parse_nvme_smart_log(load("nvme_smart_log_failing.json"))
+    assert health["source"] == "nvme-cli"
+    assert health["status"] == "failing"
+    assert health["temperature_c"] == 45  # reported in kelvin
+    reason = unhealthy_reason(health)
+    assert "NVM subsystem reliability degraded" in reason
+    assert "media placed in read-only mode" in reason
+    assert "Rated endurance used up (104%)" in health["reasons"]
+
+
+def test_process_exit_status_overrides_report():
+    # A prefail attribute at threshold only shows up in smartctl's exit status
+    health = parse_smartctl(load("smartctl_sata_healthy.json"), exit_status=0x10)
+    assert health["status"] == "failing"
+    assert unhealthy_reason(health) == "Pre-failure attributes at or below threshold"
+
+
+def test_unreadable_device_does_not_block_a_wipe():
+    health = parse_smartctl(load("smartctl_permission_denied.json"))
+    assert health == {"available": False, "reason": "Smartctl open device: /dev/sda failed: Permission denied"}
+    assert unhealthy_reason(health) is None
+    assert unhealthy_reason(None) is None
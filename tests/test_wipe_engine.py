@@ -0,0 +1,75 @@
+# Overwrite engine tests - tests/test_wipe_engine.py
+"""
+Passes written to real temporary files: the file must end up holding the
+pass, and the pass digest must be the SHA-256 of what was written whatever
+the queue depth, including an unaligned tail and a resumed pass.
+"""
+
+import os
+import hashlib
+
+import pytest
+
+from wipe_engine import OverwriteEngine
+from wipe_hashing import StreamHasher
+from wipe_io import create_io_backend
+from wipe_patterns import RANDOM, get_pattern_pool
+from wipe_random import KEYSTREAM_ALIGNMENT, KeystreamGenerator
+
+SEED = bytes(range(32))
+BLOCK = 64 * 1024
+SIZE = 5 * BLOCK + 1000  # the tail is not a multiple of 4096
+
+PASSES = {
+    "zeros": {"name": "Zero pass", "pattern": b"\x00"},
+    "gutmann": {"name": "0x92 0x49 0x24", "pattern": b"\x92\x49\x24"},
+    "random": {"name": "Random pass", "pattern": RANDOM, "seed": SEED},
+}
+
+
+def expected_bytes(pass_name: str, size: int) -> bytes:
+    pattern = PASSES[pass_name]["pattern"]
+    if pattern is RANDOM:
+        out = memoryview(bytearray(size + KEYSTREAM_ALIGNMENT))
+        KeystreamGenerator(SEED).fill(0, out, size)
+        return bytes(out[:size])
+    return (pattern * (size // len(pattern) + 1))[:size]
+
+
+def write_pass(path, pass_name: str, queue_depth: int, start_offset: int = 0) -> dict:
+    engine = OverwriteEngine(block_size=BLOCK, direct=True, io_backend=create_io_backend(queue_depth=queue_depth))
+    source = get_pattern_pool(BLOCK).source_for(dict(PASSES[pass_name]))
+    hasher = StreamHasher()
+    try:
+        return engine.write_pass(str(path), source, start_offset=start_offset, hasher=hasher)
+    finally:
+        hasher.close()
+        engine.io_backend.close()
+
+
+@pytest.fixture
+def target(tmp_path):
+    path = tmp_path / "target.img"
+    path.write_bytes(os.urandom(SIZE))
+    return path
+
+
+@pytest.mark.parametrize("pass_name", sorted(PASSES))
+@pytest.mark.parametrize("queue_depth", [1, 4])
+def test_pass_digest_matches_the_written_file(target, pass_name, queue_depth):
+    result = write_pass(target, pass_name, queue_depth)
+    written = target.read_bytes()
+    assert written == expected_bytes(pass_name, SIZE)
+    assert result["bytes_written"] == SIZE
+    assert result["digest"] == hashlib.sha256(written).hexdigest()
+
+
+@pytest.mark.parametrize("pass_name", sorted(PASSES))
+def test_resumed_pass_digest_covers_the_whole_pass(target, pass_name):
+    reference = write_pass(target, pass_name, queue_depth=1)["digest"]
+    # Whatever the disk holds before the resume point, the digest is of the whole pass
+    target.write_bytes(os.urandom(SIZE))
+    result = write_pass(target, pass_name, queue_depth=4, start_offset=2 * BLOCK)
+    assert result["bytes_written"] == SIZE - 2 * BLOCK
+    assert result["digest"] == reference
+    assert target.read_bytes()[2 * BLOCK:] == expected_bytes(pass_name, SIZE)[2 * BLOCK:]
@@ -0,0 +1,57 @@
+# Keystream tests - tests/test_wipe_random.py
+"""
+A random pass must replay byte for byte from its seed at any 16-byte aligned
+offset: resuming a pass mid-way and verifying it both depend on that.
+"""
+
+import pytest
+
+from wipe_random import (CRYPTOGRAPHY_AVAILABLE, KEYSTREAM_ALIGNMENT, PARALLEL_CHUNK_SIZE,
+                         KeystreamGenerator, KeystreamSource)
+
+SEED = bytes(range(32))
+BLOCK = 64 * 1024
+
+
+def keystream(offset: int, length: int, parallel: bool = True) -> bytes:
+    out = memoryview(bytearray(length + KEYSTREAM_ALIGNMENT))
+    KeystreamGenerator(SEED).fill(offset, out, length, parallel)
+    return bytes(out[:length])
+
+
+def test_replay_from_an_arbitrary_offset():
+    whole = keystream(0, 3 * PARALLEL_CHUNK_SIZE)
+    # Not chunk or block aligned, and long enough to be generated in parallel chunks
+    offset = PARALLEL_CHUNK_SIZE - 77 * KEYSTREAM_ALIGNMENT
+    length = PARALLEL_CHUNK_SIZE + 12345
+    assert keystream(offset, length) == whole[offset:offset + length]
+    assert keystream(offset, length, parallel=False) == whole[offset:offset + length]
+
+
+@pytest.mark.skipif(not CRYPTOGRAPHY_AVAILABLE, reason="cryptography is not installed")
+def test_aes_ctr_counter_is_the_offset_in_blocks():
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    offset = 4096 * 1000 + 48
+    counter = (offset // 16).to_bytes(16, "big")
+    encryptor = Cipher(algorithms.AES(SEED), modes.CTR(counter)).encryptor()
+    assert keystream(offset, 10000) == encryptor.update(bytes(10000))
+
+
+def test_source_resumes_mid_stream_and_after_release():
+    whole = keystream(0, 8 * BLOCK)
+    source = KeystreamSource(KeystreamGenerator(SEED), BLOCK)
+    source.reserve(4)
+
+    # A resumed pass starts at its checkpoint offset
+    for offset in range(3 * BLOCK, 5 * BLOCK, BLOCK):
+        assert bytes(source.view(offset, BLOCK)) == whole[offset:offset + BLOCK]
+    # A paused pass frees its buffers; the stream carries on where it was
+    source.release()
+    for offset in range(5 * BLOCK, 8 * BLOCK, BLOCK):
+        assert bytes(source.view(offset, BLOCK)) == whole[offset:offset + BLOCK]
+
+
+def test_misaligned_offset_is_rejected():
+    with pytest.raises(ValueError):
+        keystream(8, 64)
@@ -0,0 +1,129 @@
+# Wipe runner tests - tests/test_wipe_runner.py
+"""
+Real wipes of temporary files through EngineWipeRunner: a wipe interrupted in
+the middle of its random pass resumes from its checkpoint and ends with the
+same bytes and pass digests as an uninterrupted one.
+"""
+
+import asyncio
+import hashlib
+from datetime import datetime
+
+import pytest
+
+from models import WipeSession
+from wipe_journal import CheckpointJournal
+from wipe_random import KEYSTREAM_ALIGNMENT, KeystreamGenerator
+from wipe_runner import EngineWipeRunner
+from wipe_store import WipeStore
+
+BLOCK = 64 * 1024
+SIZE = 40 * BLOCK + 1000
+
+
+@pytest.fixture
+def journal(tmp_path):
+    store = WipeStore(str(tmp_path / "wipes.db"))
+    yield CheckpointJournal(store, interval=0.0)
+    store.close()
+
+
+@pytest.fixture
+def target(tmp_path):
+    path = tmp_path / "target.img"
+    path.write_bytes(b"\x5a" * SIZE)
+    return path
+
+
+def session(wipe_id: str) -> WipeSession:
+    return WipeSession(wipe_id=wipe_id, device_id="dev_test", mode="real", passes=3, standard="dod",
+                       verify="full", started_at=datetime.utcnow())
+
+
+def runner(wipe_id: str, target, journal, resume=None) -> EngineWipeRunner:
+    return EngineWipeRunner(session(wipe_id), str(target), block_size=BLOCK, direct=True,
+                            queue_depth=4, journal=journal, resume=resume)
+
+
+async def drive(wipe: EngineWipeRunner, on_progress=None) -> list:
+    updates = []
+    async for progress in wipe.run():
+        updates.append(progress)
+        if on_progress:
+            on_progress(progress)
+    return updates
+
+
+def keystream(seed: bytes, size: int) -> bytes:
+    out = memoryview(bytearray(size + KEYSTREAM_ALIGNMENT))
+    KeystreamGenerator(seed).fill(0, out, size)
+    return bytes(out[:size])
+
+
+def pause_in_pass(wipe: EngineWipeRunner, pass_number: int):
+    """Pause from the worker thread as soon as the pass has written a block"""
+    publish = wipe._publish
+
+    def hook(progress):
+        if wipe.current_pass == pass_number and progress.get("status") == "wiping":
+            wipe.pause()
+        publish(progress)
+
+    wipe._publish = hook
+
+
+def test_interrupted_wipe_resumes_to_the_same_bytes(target, journal):
+    first = runner("wipe_resume", target, journal)
+    pause_in_pass(first, 3)
+
+    def suspend_once_paused(progress):
+        if progress["status"] == "paused":
+            first.suspend()
+
+    updates = asyncio.run(drive(first, suspend_once_paused))
+    assert updates[-1]["status"] == "interrupted"
+    checkpoint = journal.load("wipe_resume")
+    assert checkpoint["pass_index"] == 2
+    assert 0 < checkpoint["offset"] < SIZE
+    assert checkpoint["keystream_counter"] == checkpoint["offset"] // 16
+    seed = bytes.fromhex(checkpoint["seeds"]["2"])
+
+    second = runner("wipe_resume", target, journal, resume=checkpoint)
+    updates = asyncio.run(drive(second))
+    summary = updates[-1]["summary"]
+    assert updates[-1]["status"] == "completed"
+    assert journal.load("wipe_resume") is None
+
+    written = target.read_bytes()
+    assert written == keystream(seed, SIZE)
+    digests = [p["digest"] for p in summary["pass_digests"]]
+    assert digests == [
+        hashlib.sha256(b"\x00" * SIZE).hexdigest(),
+        hashlib.sha256(b"\xff" * SIZE).hexdigest(),
+        hashlib.sha256(written).hexdigest(),
+    ]
+    assert summary["verification"]["passed"]
+
+
+def test_cancel_retires_the_checkpoint(target, journal):
+    wipe = runner("wipe_cancel", target, journal)
+    pause_in_pass(wipe, 1)
+
+    def cancel_once_paused(progress):
+        if progress["status"] == "paused":
+            wipe.cancel()
+
+    updates = asyncio.run(drive(wipe, cancel_once_paused))
+    assert updates[-1]["status"] == "cancelled"
+    assert updates[-1]["interrupted_at"]["pass"] == 1
+    assert journal.load("wipe_cancel") is None
+
+
+def test_failed_verify_keeps_the_checkpoint(target, journal):
+    wipe = runner("wipe_bad_verify", target, journal)
+    wipe.verifier.verify = lambda *args, **kwargs: {
+        "passed": False, "mismatched_sectors": 1, "first_mismatch_offset": 0
+    }
+    with pytest.raises(RuntimeError, match="Verification failed"):
+        asyncio.run(drive(wipe))
+    assert journal.load("wipe_bad_verify")["pass_index"] == 3
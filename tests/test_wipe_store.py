@@ -0,0 +1,77 @@
+# Wipe store tests - tests/test_wipe_store.py
+"""
+Keyset pagination of the audit listings, including the device filter that
+matches either a device id or a serial and merges one index seek per match.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import WipeSession
+from wipe_store import WipeStore
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WipeStore(str(tmp_path / "wipes.db"), flush_interval=3600)
+    yield store
+    store.close()
+
+
+def add_wipes(store: WipeStore) -> list:
+    sessions = []
+    for index in range(30):
+        sessions.append(WipeSession(
+            wipe_id=f"wipe_{index:02d}",
+            device_id=["dev_a", "dev_b", "SER1"][index % 3],
+            device_serial=["SER1", "SER2", "SER1", "SER3", None][index % 5],
+            mode="simulation", passes=1, standard="nist", status="completed",
+            # Pairs share a start time so ties are broken by wipe id
+            started_at=START + timedelta(minutes=index // 2)
+        ))
+    for session in sessions:
+        store.save_session(session)
+    store.flush()
+    return sessions
+
+
+def pages(store: WipeStore, limit: int, **filters) -> list:
+    items, cursor = [], None
+    while True:
+        page = store.list_wipes(cursor=cursor, limit=limit, **filters)
+        assert len(page["items"]) <= limit
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def newest_first(sessions: list) -> list:
+    return [s.wipe_id for s in sorted(sessions, key=lambda s: (s.started_at, s.wipe_id), reverse=True)]
+
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 100])
+def test_device_filter_matches_id_or_serial_once(store, limit):
+    sessions = add_wipes(store)
+    expected = newest_first([s for s in sessions if "SER1" in (s.device_id, s.device_serial)])
+    # Some rows match on both id and serial; they must come back exactly once
+    assert any(s.device_id == s.device_serial == "SER1" for s in sessions)
+    assert [row["wipe_id"] for row in pages(store, limit, device="SER1")] == expected
+
+
+def test_device_filter_combines_with_other_filters(store):
+    sessions = add_wipes(store)
+    since = (START + timedelta(minutes=5)).isoformat()
+    expected = newest_first([
+        s for s in sessions
+        if "dev_a" in (s.device_id, s.device_serial) and s.started_at.isoformat() >= since
+    ])
+    assert [row["wipe_id"] for row in pages(store, 3, device="dev_a", since=since)] == expected
+
+
+def test_unfiltered_pages_cover_every_wipe(store):
+    sessions = add_wipes(store)
+    assert [row["wipe_id"] for row in pages(store, 8)] == newest_first(sessions)
@@ -0,0 +1,75 @@
+# Verification tests - tests/test_wipe_verify.py
+"""
+Read-back verification against temporary files, clean and with corrupted
+sectors, in full and sampled mode.
+"""
+
+import pytest
+
+from wipe_patterns import get_pattern_pool
+from wipe_verify import SECTOR_SIZE, WipeVerifier
+
+EXTENT = 64 * 1024
+EXTENTS = 40
+SIZE = EXTENTS * EXTENT + 700  # plus an unaligned tail extent
+
+
+@pytest.fixture
+def target(tmp_path):
+    path = tmp_path / "target.img"
+    path.write_bytes(b"\xff" * SIZE)
+    return path
+
+
+def verify(path, mode: str, sample_seed: int = 1234) -> dict:
+    source = get_pattern_pool(EXTENT).get(b"\xff")
+    return WipeVerifier(chunk_size=EXTENT, direct=True).verify(
+        str(path), source, mode=mode, sample_percent=10.0, sample_seed=sample_seed
+    )
+
+
+def corrupt(path, offset: int):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(b"\x00")
+
+
+@pytest.mark.parametrize("mode", ["full", "sample"])
+def test_clean_target_passes(target, mode):
+    result = verify(target, mode)
+    assert result["passed"]
+    assert result["mismatched_sectors"] == 0
+    assert result["first_mismatch_offset"] is None
+
+
+def test_sample_checks_a_fraction_including_both_ends(target):
+    result = verify(target, "sample")
+    assert result["extents_checked"] == int((EXTENTS + 1) * 10 / 100)
+    assert result["bytes_verified"] < SIZE
+
+
+def test_sample_detects_a_bad_sector_in_every_sampled_extent(target):
+    # The same sector of every extent is bad, so whichever extents are sampled all fail
+    for extent in range(EXTENTS):
+        corrupt(target, extent * EXTENT + 3 * SECTOR_SIZE)
+    result = verify(target, "sample")
+    assert not result["passed"]
+    assert result["mismatched_sectors"] == result["extents_checked"] - 1  # the tail extent is clean
+    assert result["first_mismatch_offset"] == 3 * SECTOR_SIZE
+
+
+def test_sample_detects_corruption_in_the_unaligned_tail(target):
+    corrupt(target, SIZE - 1)
+    result = verify(target, "sample")
+    assert not result["passed"]
+    assert result["mismatched_sectors"] == 1
+    assert result["first_mismatch_offset"] == EXTENTS * EXTENT + SECTOR_SIZE
+
+
+def test_full_counts_every_bad_sector(target):
+    for offset in (0, 17 * EXTENT + 5 * SECTOR_SIZE + 9, 17 * EXTENT + 6 * SECTOR_SIZE):
+        corrupt(target, offset)
+    result = verify(target, "full")
+    assert not result["passed"]
+    assert result["mismatched_sectors"] == 3
+    assert result["first_mismatch_offset"] == 0
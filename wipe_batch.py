@@ -0,0 +1,194 @@
+# Batch Wipes - wipe_batch.py
+"""
+Fleet wipes submitted as one batch.
+
+A batch is a set of ordinary scheduled wipes under one batch id. Its aggregate
+progress and throughput are computed on demand from the latest snapshots the
+wipes publish to the progress hub, and once every wipe has finished a single
+certificate index listing each device's certificate is written next to the
+certificates themselves. With a store, batches live there: any server worker
+can report on a batch another worker created, and a wipe's outcome is merged
+into its batch by whichever worker finished it - including one that resumed
+the wipe after a restart.
+
+"interrupted" is not an outcome: an interrupted wipe resumes from its
+checkpoint, so until it finishes the batch reports its live status.
+"""
+
+import os
+import json
+import uuid
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from wipe_store import WipeStore
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("completed", "cancelled", "failed")
+
+
+class WipeBatch:
+    """One batch of wipes and the final outcome of each"""
+
+    def __init__(self, batch_id: str, wipes: List[Dict]):
+        self.batch_id = batch_id
+        self.created_at = datetime.utcnow()
+        self.completed_at: Optional[datetime] = None
+        # wipe_id -> {"wipe_id", "device_id", "device_size"} plus its outcome once finished
+        self.wipes: Dict[str, Dict] = {w["wipe_id"]: dict(w) for w in wipes}
+        self.index_path: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return all(w.get("status") in FINISHED_STATUSES for w in self.wipes.values())
+
+    def record(self, wipe_id: str, status: str, certificate_id: Optional[str] = None,
+               error: Optional[str] = None):
+        self.wipes[wipe_id].update(status=status, certificate_id=certificate_id, error=error)
+
+    def to_record(self) -> Dict:
+        return {
+            "batch_id": self.batch_id,
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "index_path": self.index_path,
+            "wipes": list(self.wipes.values())
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "WipeBatch":
+        batch = cls(record["batch_id"], record["wipes"])
+        batch.created_at = datetime.fromisoformat(record["created_at"])
+        if record.get("completed_at"):
+            batch.completed_at = datetime.fromisoformat(record["completed_at"])
+        batch.index_path = record.get("index_path")
+        return batch
+
+    def progress(self, snapshot_of: Callable[[str], Optional[Dict]]) -> Dict:
+        """Aggregate progress (weighted by device size where known) and combined throughput
+
+        snapshot_of(wipe_id) returns the latest progress snapshot of a wipe.
+        """
+        counts: Dict[str, int] = {}
+        weighted = 0.0
+        total_weight = 0
+        throughput = 0
+        wipes = []
+
+        for wipe in self.wipes.values():
+            snapshot = snapshot_of(wipe["wipe_id"]) or {}
+            status = wipe.get("status")
+            if status not in FINISHED_STATUSES:
+                # Not finished yet, or interrupted and (possibly) resumed since
+                status = snapshot.get("status") or status or "queued"
+            progress = 100 if status == "completed" else snapshot.get("progress", 0) or 0
+            counts[status] = counts.get(status, 0) + 1
+
+            weight = wipe.get("device_size") or 1
+            weighted += progress * weight
+            total_weight += weight
+            if status not in FINISHED_STATUSES:
+                throughput += snapshot.get("throughput") or 0
+
+            wipes.append({
+                "wipe_id": wipe["wipe_id"],
+                "device_id": wipe["device_id"],
+                "status": status,
+                "progress": progress,
+                "certificate_id": wipe.get("certificate_id")
+            })
+
+        return {
+            "batch_id": self.batch_id,
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "total": len(self.wipes),
+            "status_counts": counts,
+            "progress": round(weighted / total_weight, 1) if total_weight else 0,
+            "throughput": throughput,
+            "finished": self.finished,
+            "certificate_index": f"/api/wipe/batch/{self.batch_id}/certificates" if self.index_path else None,
+            "wipes": wipes
+        }
+
+    def certificate_index(self) -> Dict:
+        return {
+            "batch_id": self.batch_id,
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "certificates": [
+                {
+                    "wipe_id": w["wipe_id"],
+                    "device_id": w["device_id"],
+                    "status": w.get("status"),
+                    "certificate_id": w.get("certificate_id"),
+                    "download_url": f"/api/certificate/{w['certificate_id']}" if w.get("certificate_id") else None,
+                    "error": w.get("error")
+                }
+                for w in self.wipes.values()
+            ]
+        }
+
+
+class BatchRegistry:
+    """Tracks batches and writes each batch's certificate index when its last wipe finishes"""
+
+    def __init__(self, certificates_dir: str = "certificates", store: Optional[WipeStore] = None):
+        self.certificates_dir = certificates_dir
+        self.store = store
+        self.batches: Dict[str, WipeBatch] = {}
+        self._batch_of: Dict[str, str] = {}
+
+    def create(self, wipes: List[Dict]) -> WipeBatch:
+        batch = WipeBatch(str(uuid.uuid4()), wipes)
+        if self.store:
+            self._save(batch)
+        else:
+            self.batches[batch.batch_id] = batch
+            for wipe_id in batch.wipes:
+                self._batch_of[wipe_id] = batch.batch_id
+        logger.info(f"Created batch {batch.batch_id} with {len(batch.wipes)} wipes")
+        return batch
+
+    def get(self, batch_id: str) -> Optional[WipeBatch]:
+        """A batch as last saved by any worker (or, without a store, as held here)"""
+        if self.store:
+            record = self.store.load_batch(batch_id)
+            return WipeBatch.from_record(record) if record else None
+        return self.batches.get(batch_id)
+
+    def _save(self, batch: WipeBatch):
+        if self.store:
+            self.store.save_batch(batch.to_record())
+
+    def wipe_finished(self, wipe_id: str, status: str, certificate_id: Optional[str] = None,
+                      error: Optional[str] = None):
+        """Record a wipe's outcome; the last one in a batch writes the certificate index"""
+        if self.store:
+            # Recorded in one transaction, so of two workers finishing a batch's last
+            # wipes at the same time exactly one sees the batch finished
+            record = self.store.record_batch_wipe(
+                wipe_id, {"status": status, "certificate_id": certificate_id, "error": error})
+            batch = WipeBatch.from_record(record) if record else None
+        else:
+            batch = self.batches.get(self._batch_of.get(wipe_id, ""))
+            if batch:
+                batch.record(wipe_id, status, certificate_id, error)
+        if not batch:
+            return
+        if batch.finished and not batch.index_path:
+            batch.completed_at = datetime.utcnow()
+            self._write_index(batch)
+            if self.store:
+                self.store.complete_batch(batch.batch_id, batch.completed_at.isoformat(), batch.index_path)
+
+    def _write_index(self, batch: WipeBatch):
+        path = os.path.join(self.certificates_dir, f"batch_{batch.batch_id}.json")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(batch.certificate_index(), f, indent=2)
+        os.replace(temp_path, path)
+        batch.index_path = path
+        logger.info(f"Batch {batch.batch_id} finished; certificate index written to {path}")
@@ -0,0 +1,206 @@
+# Worker Cluster - wipe_cluster.py
+"""
+Coordination between server worker processes that share one wipe store.
+
+With several uvicorn workers each process has its own scheduler and progress
+hub, so a wipe runs in exactly one of them. Everything the other workers need
+goes through the SQLite store:
+
+- every progress update is mirrored to a snapshot row tagged with the owning
+  worker, so any worker can answer GET /api/wipe/{id} or relay a WebSocket or
+  SSE stream by following that row;
+- cancel/pause/resume for a wipe owned elsewhere is queued as a command that
+  the owning worker polls for;
+- device locks keep each physical device to a single writing worker.
+
+Workers register themselves and heartbeat from a background thread. A worker
+counts as dead when its heartbeat is stale or, on this host, its process no
+longer exists - so after a restart the new processes take over the locks and
+checkpoints of the old ones at once instead of waiting out a timeout.
+"""
+
+import os
+import uuid
+import socket
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Set
+
+from wipe_store import WipeStore, FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 5.0     # seconds between worker heartbeats
+WORKER_TIMEOUT = 30.0        # a worker silent for this long is considered dead
+COMMAND_POLL_INTERVAL = 0.5  # seconds between checks for commands from other workers
+DEVICE_LOCK_RETRY = 1.0      # seconds between attempts on a device another worker holds
+
+COMMANDS = ("cancel", "pause", "resume")
+
+
+def _process_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RemoteSubscription:
+    """Follows the stored snapshot of a wipe another worker runs
+
+    Same interface as wipe_progress.Subscription. Updates arrive at the pace of
+    the owner's store flushes rather than live, which is plenty for a viewer.
+    """
+
+    def __init__(self, store: WipeStore, wipe_id: str, interval: float = FLUSH_INTERVAL):
+        self.store = store
+        self.wipe_id = wipe_id
+        self.interval = interval
+        self.version = 0
+        self._closed = False
+
+    def close(self):
+        self._closed = True
+
+    async def __anext__(self) -> Dict:
+        while not self._closed:
+            record = self.store.load_snapshot(self.wipe_id)
+            if record is None:
+                break
+            if record["version"] != self.version and record["progress"] is not None:
+                self.version = record["version"]
+                # The final snapshot is still delivered; the iteration ends after it
+                self._closed = record["closed"]
+                return record["progress"]
+            if record["closed"]:
+                break
+            await asyncio.sleep(self.interval)
+        self._closed = True
+        raise StopAsyncIteration
+
+    def __aiter__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class WorkerNode:
+    """This process's membership among the workers sharing a wipe store"""
+
+    def __init__(self, store: WipeStore, heartbeat_interval: float = HEARTBEAT_INTERVAL,
+                 worker_timeout: float = WORKER_TIMEOUT):
+        self.store = store
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_timeout = worker_timeout
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+        self.worker_id = f"{self.host}:{self.pid}:{uuid.uuid4().hex[:8]}"
+        self._stopped = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+        self._command_task: Optional[asyncio.Task] = None
+
+    def start(self, apply_command: Callable[[str, str], None]):
+        """Register, start heartbeating and apply commands other workers send (call on the event loop)"""
+        self.store.register_worker(self.worker_id, self.host, self.pid)
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="worker-heartbeat", daemon=True)
+        self._heartbeat.start()
+        self._command_task = asyncio.create_task(self._command_loop(apply_command))
+        logger.info(f"Worker {self.worker_id} joined ({len(self.live_workers())} live)")
+
+    def stop(self):
+        """Unregister, releasing this worker's device locks"""
+        self._stopped.set()
+        if self._command_task:
+            self._command_task.cancel()
+        if self._heartbeat:
+            self._heartbeat.join()
+        self.store.remove_worker(self.worker_id)
+        logger.info(f"Worker {self.worker_id} left")
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            try:
+                self.store.heartbeat_worker(self.worker_id)
+            except Exception as e:
+                logger.error(f"Worker heartbeat failed: {e}")
+
+    async def _command_loop(self, apply_command: Callable[[str, str], None]):
+        while True:
+            await asyncio.sleep(COMMAND_POLL_INTERVAL)
+            try:
+                commands = self.store.pop_commands(self.worker_id)
+            except Exception as e:
+                logger.error(f"Could not read worker commands: {e}")
+                continue
+            for wipe_id, command in commands:
+                try:
+                    apply_command(wipe_id, command)
+                except Exception as e:
+                    logger.error(f"Command {command} for wipe {wipe_id} failed: {e}")
+
+    def live_workers(self) -> Set[str]:
+        """Ids of the workers that are still running (always including this one)"""
+        cutoff = (datetime.utcnow() - timedelta(seconds=self.worker_timeout)).isoformat()
+        live = {self.worker_id}
+        for worker in self.store.list_workers():
+            if worker["heartbeat_at"] < cutoff:
+                continue
+            if worker["host"] == self.host and not _process_exists(worker["pid"]):
+                continue
+            live.add(worker["worker_id"])
+        return live
+
+    # Device locks (used by WipeScheduler)
+
+    def try_lock_device(self, device_key: str, wipe_id: str) -> bool:
+        return self.store.lock_device(device_key, wipe_id, self.worker_id, self.live_workers())
+
+    def unlock_device(self, device_key: str):
+        self.store.unlock_device(device_key, self.worker_id)
+
+    # Wipe ownership and shared snapshots
+
+    def claim_wipe(self, wipe_id: str) -> bool:
+        """Take over a wipe (e.g. to resume its checkpoint) unless a live worker owns it"""
+        return self.store.claim_wipe(wipe_id, self.worker_id, self.live_workers())
+
+    def record_snapshot(self, wipe_id: str, progress: Dict):
+        """ProgressHub listener: mirror every update of the wipes this worker runs"""
+        self.store.save_snapshot(wipe_id, self.worker_id, progress)
+
+    def close_snapshot(self, wipe_id: str):
+        self.store.close_snapshot(wipe_id)
+
+    def snapshot(self, wipe_id: str) -> Optional[Dict]:
+        """Latest stored progress of a wipe with its version, whichever worker runs it"""
+        record = self.store.load_snapshot(wipe_id)
+        if not record or record["progress"] is None:
+            return None
+        return dict(record["progress"], version=record["version"])
+
+    def follow(self, wipe_id: str) -> Optional[RemoteSubscription]:
+        if not self.store.load_snapshot(wipe_id):
+            return None
+        return RemoteSubscription(self.store, wipe_id)
+
+    def remote_wipe(self, wipe_id: str) -> Optional[Dict]:
+        """Stored {"owner", "version", "closed", "progress"} record of a wipe"""
+        return self.store.load_snapshot(wipe_id)
+
+    def send_command(self, owner: str, wipe_id: str, command: str) -> bool:
+        """Queue cancel/pause/resume for the worker running a wipe (False if that worker is gone)"""
+        if command not in COMMANDS:
+            raise ValueError(f"Unknown command: {command}")
+        if owner not in self.live_workers():
+            return False
+        self.store.push_command(owner, wipe_id, command)
+        return True
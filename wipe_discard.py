@@ -0,0 +1,110 @@
+# Discard Sanitize - wipe_discard.py
+"""
+Discard-based sanitization for flash media and file targets.
+
+Block devices get BLKDISCARD (or BLKSECDISCARD for a secure discard) ioctls;
+regular files and loop images get fallocate(PUNCH_HOLE | KEEP_SIZE). On media
+with deterministic read-zero after trim this sanitizes in seconds without
+spending write endurance. Because not every device honours that guarantee, a
+discard is always followed by a sampled read-back that must return zeroes.
+
+⚠️ PERMANENTLY DESTROYS ALL DATA on the target. Linux only.
+"""
+
+import os
+import stat
+import time
+import struct
+import ctypes
+import ctypes.util
+import logging
+from typing import Callable, Dict, Optional
+
+from wipe_engine import WipeInterrupted
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DISCARD_METHODS = ("discard", "secure_discard")
+
+# linux/fs.h
+BLKDISCARD = 0x1277
+BLKSECDISCARD = 0x127D
+
+# linux/falloc.h
+FALLOC_FL_KEEP_SIZE = 0x01
+FALLOC_FL_PUNCH_HOLE = 0x02
+
+DISCARD_CHUNK_SIZE = 1024 * 1024 * 1024  # Discard in 1 GiB ranges so progress can be reported
+
+_libc = None
+
+
+def _fallocate(fd: int, mode: int, offset: int, length: int):
+    """Call fallocate(2) directly; os.posix_fallocate cannot punch holes"""
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        _libc.fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong]
+    if _libc.fallocate(fd, mode, offset, length) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def discard_target(path: str, secure: bool = False,
+                   progress_callback: Optional[Callable[[int, int], None]] = None,
+                   control=None) -> Dict:
+    """Discard every block of a block device, or punch out the whole of a regular file
+
+    control (wipe_engine.PassControl) is checked between discard ranges.
+    """
+    if not FCNTL_AVAILABLE:
+        raise RuntimeError("Discard sanitization is only supported on Linux")
+
+    fd = os.open(path, os.O_WRONLY | getattr(os, "O_CLOEXEC", 0))
+    started = time.monotonic()
+    try:
+        st = os.fstat(fd)
+        is_block = stat.S_ISBLK(st.st_mode)
+        if is_block:
+            total = os.lseek(fd, 0, os.SEEK_END)
+            operation = "BLKSECDISCARD" if secure else "BLKDISCARD"
+        else:
+            if secure:
+                raise RuntimeError("Secure discard requires a block device")
+            total = st.st_size
+            operation = "PUNCH_HOLE"
+
+        offset = 0
+        while offset < total:
+            if control is not None and control.interrupted and not control.wait():
+                raise WipeInterrupted(offset)
+            length = min(DISCARD_CHUNK_SIZE, total - offset)
+            try:
+                if is_block:
+                    request = BLKSECDISCARD if secure else BLKDISCARD
+                    fcntl.ioctl(fd, request, struct.pack("QQ", offset, length))
+                else:
+                    _fallocate(fd, FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE, offset, length)
+            except OSError as e:
+                raise RuntimeError(f"{operation} not supported by {path}: {e}")
+            offset += length
+            if progress_callback:
+                progress_callback(offset, total)
+
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    duration = time.monotonic() - started
+    logger.info(f"{operation} of {path} ({total} bytes) took {duration:.2f}s")
+    return {
+        "operation": operation,
+        "bytes_discarded": total,
+        "duration": round(duration, 3)
+    }
@@ -0,0 +1,285 @@
+# Overwrite Engine - wipe_engine.py
+"""
+In-process streaming overwrite engine.
+
+Writes each pass directly with os.pwrite from large page-aligned buffers
+instead of spawning a `dd` subprocess per pass. Works against block devices
+as well as regular files and loop images, so it can be exercised without root.
+
+⚠️ Writing to a block device PERMANENTLY DESTROYS its data. Callers are
+responsible for the safety checks in real_wipe_stubs.py.
+"""
+
+import os
+import mmap
+import stat
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from wipe_io import SyncIOBackend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024  # 4 MiB keeps the device busy between syscalls
+BUFFER_ALIGNMENT = 4096               # Satisfies O_DIRECT on 512e and 4Kn devices
+
+O_DIRECT = getattr(os, "O_DIRECT", 0)
+
+# progress_callback(bytes_done, total_bytes)
+ProgressCallback = Callable[[int, int], None]
+
+
+def aligned_block_size(logical_block_size: Optional[int] = None, physical_block_size: Optional[int] = None,
+                       preferred: int = DEFAULT_BLOCK_SIZE) -> int:
+    """I/O size for a device: preferred, rounded up to whole physical blocks
+
+    Writes that split a physical sector make 512e drives read-modify-write it.
+    """
+    unit = max(BUFFER_ALIGNMENT, logical_block_size or 0, physical_block_size or 0)
+    return -(-preferred // unit) * unit
+
+
+def allocate_aligned(size: int) -> mmap.mmap:
+    """Allocate a zero-filled, page-aligned buffer (anonymous mmaps are always page aligned)"""
+    return mmap.mmap(-1, max(size, 1))
+
+
+def open_target(path: str, direct: bool = False) -> Tuple[int, bool]:
+    """Open a wipe target for writing, returning (fd, direct_enabled)"""
+    flags = os.O_WRONLY | getattr(os, "O_CLOEXEC", 0)
+    if direct and O_DIRECT:
+        try:
+            return os.open(path, flags | O_DIRECT), True
+        except OSError as e:
+            # tmpfs and some filesystems reject O_DIRECT - fall back to buffered I/O
+            logger.warning(f"O_DIRECT unavailable for {path} ({e}), using buffered I/O")
+    return os.open(path, flags), False
+
+
+def get_target_size(fd: int) -> int:
+    """Get the size in bytes of a block device or regular file"""
+    st = os.fstat(fd)
+    if stat.S_ISBLK(st.st_mode):
+        # Block devices report st_size 0 - seeking to the end gives the capacity
+        size = os.lseek(fd, 0, os.SEEK_END)
+        os.lseek(fd, 0, os.SEEK_SET)
+        return size
+    return st.st_size
+
+
+def _sync(fd: int):
+    """Flush written data to stable storage (equivalent of dd conv=fdatasync)"""
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
+class WipeInterrupted(Exception):
+    """A pass was cancelled; offset is the end of the durably written prefix"""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Cancelled at offset {offset}")
+        self.offset = offset
+
+
+class PassControl:
+    """Cancel/pause switch shared between the event loop and an engine worker thread
+
+    The engine checks it before every I/O block, so requests take effect
+    within one block. on_pause is called from the worker once it has drained
+    its in-flight writes and is about to block.
+    """
+
+    def __init__(self):
+        self._cancelled = False
+        self._running = threading.Event()
+        self._running.set()
+        self.on_pause: Optional[Callable[[], None]] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def interrupted(self) -> bool:
+        return self._cancelled or not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled = True
+        self._running.set()
+
+    def pause(self):
+        if not self._cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def wait(self) -> bool:
+        """Block while paused; returns False if the wipe was cancelled"""
+        if self.paused and self.on_pause:
+            self.on_pause()
+        self._running.wait()
+        return not self._cancelled
+
+
+class OverwriteEngine:
+    """Streams overwrite passes to a target with aligned buffers and optional O_DIRECT
+
+    Writes go through an I/O backend (see wipe_io.py) that may keep several
+    blocks in flight; blocks are retired in offset order so progress always
+    reports a contiguous prefix of the target.
+    """
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE, direct: bool = False, sync: bool = True,
+                 io_backend=None):
+        if block_size <= 0 or block_size % BUFFER_ALIGNMENT:
+            raise ValueError(f"Block size must be a positive multiple of {BUFFER_ALIGNMENT}")
+        self.block_size = block_size
+        self.direct = direct
+        self.sync = sync
+        self.io_backend = io_backend or SyncIOBackend()
+
+    def write_pass(self, path: str, source, progress_callback: Optional[ProgressCallback] = None,
+                   size: Optional[int] = None, start_offset: int = 0,
+                   checkpoint_callback: Optional[Callable[[int], None]] = None,
+                   checkpoint_interval: float = 10.0, hasher=None,
+                   control: Optional[PassControl] = None) -> Dict:
+        """Overwrite the target once with data from source, starting at start_offset
+
+        checkpoint_callback(offset) is called at most every checkpoint_interval
+        seconds, after the data before offset has been synced to stable storage.
+        A hasher (wipe_hashing.StreamHasher) receives every written buffer and
+        ends up with the digest of the whole pass. A control pauses the pass
+        (after syncing and checkpointing) or cancels it with WipeInterrupted.
+        """
+        if start_offset % BUFFER_ALIGNMENT:
+            raise ValueError(f"Start offset must be a multiple of {BUFFER_ALIGNMENT}")
+        fd, direct_enabled = open_target(path, self.direct)
+        tail_fd = None
+        started = time.monotonic()
+        try:
+            total = size if size is not None else get_target_size(fd)
+            # O_DIRECT needs aligned lengths; an unaligned file tail goes through a buffered fd
+            aligned_end = total - (total % BUFFER_ALIGNMENT) if direct_enabled else total
+
+            # Sources that recycle buffers must not hand out one still being written
+            queue_depth = self.io_backend.queue_depth
+            if hasattr(source, "reserve"):
+                source.reserve(queue_depth)
+
+            in_flight = deque()  # (end_offset, futures) in submission order
+            offset = min(start_offset, total)
+            last_checkpoint = time.monotonic()
+
+            if hasher:
+                # A resumed pass regenerates its already-written prefix for the digest (no disk reads)
+                for prefix_offset in range(0, offset, self.block_size):
+                    length = min(self.block_size, offset - prefix_offset)
+                    hasher.submit(source.view(prefix_offset, length)).result()
+            try:
+                while offset < total:
+                    if control is not None and control.interrupted:
+                        # Settle everything submitted so the checkpoint is exact
+                        while in_flight:
+                            self._retire(in_flight, total, progress_callback)
+                        _sync(fd)
+                        if tail_fd is not None:
+                            _sync(tail_fd)
+                        if checkpoint_callback:
+                            checkpoint_callback(offset)
+                            last_checkpoint = time.monotonic()
+                        if control.paused and hasattr(source, "release"):
+                            # Nothing is in flight, so a paused pass need not hold its buffers
+                            source.release()
+                        if not control.wait():
+                            raise WipeInterrupted(offset)
+
+                    length = min(self.block_size, total - offset)
+                    target_fd = fd
+                    if offset + length > aligned_end:
+                        if offset < aligned_end:
+                            length = aligned_end - offset
+                        else:
+                            if tail_fd is None:
+                                tail_fd, _ = open_target(path, direct=False)
+                            target_fd = tail_fd
+
+                    if len(in_flight) >= queue_depth:
+                        done = self._retire(in_flight, total, progress_callback)
+                        if checkpoint_callback and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                            _sync(fd)
+                            checkpoint_callback(done)
+                            last_checkpoint = time.monotonic()
+
+                    view = source.view(offset, length)
+                    futures = (self.io_backend.submit(target_fd, view, offset),)
+                    if hasher:
+                        futures += (hasher.submit(view),)
+                    offset += length
+                    in_flight.append((offset, futures))
+
+                while in_flight:
+                    self._retire(in_flight, total, progress_callback)
+            finally:
+                # Never close the fd with writes still running against it
+                for _, futures in in_flight:
+                    for future in futures:
+                        future.exception()
+
+            if self.sync:
+                _sync(fd)
+                if tail_fd is not None:
+                    _sync(tail_fd)
+        finally:
+            os.close(fd)
+            if tail_fd is not None:
+                os.close(tail_fd)
+
+        duration = time.monotonic() - started
+        written = total - min(start_offset, total)
+        return {
+            "bytes_written": written,
+            "duration": round(duration, 3),
+            "throughput": written / duration if duration > 0 else 0.0,
+            "direct_io": direct_enabled,
+            "hash_algorithm": hasher.algorithm if hasher else None,
+            "digest": hasher.hexdigest() if hasher else None
+        }
+
+    def _retire(self, in_flight: deque, total: int, progress_callback: Optional[ProgressCallback]) -> int:
+        """Wait for the oldest in-flight block (write and hash) and report the contiguous bytes done"""
+        end_offset, futures = in_flight[0]
+        for future in futures:
+            future.result()
+        in_flight.popleft()
+        if progress_callback:
+            progress_callback(end_offset, total)
+        return end_offset
+
+    def run_passes(self, path: str, passes: List[Dict],
+                   progress_callback: Optional[Callable[[int, int, int], None]] = None) -> List[Dict]:
+        """Run a list of passes ({'name', 'source'}) and return per-pass results"""
+        results = []
+        for index, pass_data in enumerate(passes):
+            logger.info(f"Starting pass {index + 1}/{len(passes)}: {pass_data['name']}")
+
+            callback = None
+            if progress_callback:
+                callback = lambda done, total, i=index: progress_callback(i, done, total)
+
+            result = self.write_pass(path, pass_data["source"], callback)
+            result.update({"pass": index + 1, "pattern": pass_data["name"], "status": "completed"})
+            if pass_data.get("seed"):
+                # Recorded so verification can replay the random pass
+                result["seed"] = pass_data["seed"].hex()
+            results.append(result)
+        return results
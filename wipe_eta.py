@@ -0,0 +1,98 @@
+# ETA Model - wipe_eta.py
+"""
+Throughput model and ETA estimation for wipes.
+
+Before a wipe starts, its duration is predicted from the real device size and
+a baseline sequential throughput per device type. While it runs, the estimate
+follows the throughput actually observed: an exponentially weighted moving
+average (EWMA) of bytes/sec, time-weighted so the result does not depend on
+how often progress is reported, and seeded with the baseline so the first
+seconds of a pass are not wildly off.
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+# Baseline sustained sequential write throughput in bytes/sec, keyed by
+# DeviceScanner._determine_device_type
+BASELINE_THROUGHPUT = {
+    "NVME_SSD": 1500e6,
+    "SSD": 400e6,
+    "HDD": 150e6,
+    "USB": 30e6,
+    "SD_CARD": 20e6,
+    "UNKNOWN": 80e6
+}
+
+# Discards complete orders of magnitude faster than writes; only the read-back counts
+DISCARD_SECONDS = 5.0
+
+EWMA_TIME_CONSTANT = 10.0  # seconds; older throughput samples decay with this constant
+
+
+class ThroughputModel:
+    """Predicts wipe duration from device size, device type, standard and verification mode"""
+
+    def __init__(self, baseline: Optional[Dict[str, float]] = None):
+        self.baseline = dict(BASELINE_THROUGHPUT, **(baseline or {}))
+
+    def throughput(self, device_type: Optional[str]) -> float:
+        return self.baseline.get(device_type or "UNKNOWN", self.baseline["UNKNOWN"])
+
+    def work_bytes(self, total_size: int, passes: int, method: str = "overwrite",
+                   verify: str = "sample", verify_percent: float = 10.0) -> int:
+        """Total bytes the wipe moves: every pass plus the read-back"""
+        if verify == "full":
+            verify_bytes = total_size
+        elif verify == "sample" or method != "overwrite":
+            verify_bytes = int(total_size * verify_percent / 100)
+        else:
+            verify_bytes = 0
+        write_bytes = total_size * passes if method == "overwrite" else 0
+        return write_bytes + verify_bytes
+
+    def estimate_duration(self, total_size: int, passes: int, device_type: Optional[str] = None,
+                          method: str = "overwrite", verify: str = "sample",
+                          verify_percent: float = 10.0) -> float:
+        """Predicted seconds for the whole wipe"""
+        work = self.work_bytes(total_size, passes, method, verify, verify_percent)
+        seconds = work / self.throughput(device_type)
+        if method != "overwrite":
+            seconds += DISCARD_SECONDS
+        return seconds
+
+
+class EtaEstimator:
+    """Tracks observed throughput for one running wipe and projects the time remaining"""
+
+    def __init__(self, work_bytes: int, prior_throughput: float,
+                 time_constant: float = EWMA_TIME_CONSTANT):
+        self.work_bytes = work_bytes
+        self.rate = prior_throughput
+        self.time_constant = time_constant
+        self._last_time: Optional[float] = None
+        self._last_done = 0
+
+    def update(self, work_done: int, now: Optional[float] = None):
+        """Feed the cumulative bytes of work done so far"""
+        now = time.monotonic() if now is None else now
+        if self._last_time is None:
+            # The first observation only anchors the clock (it may follow a resume)
+            self._last_time, self._last_done = now, work_done
+            return
+
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return
+        sample = max(work_done - self._last_done, 0) / elapsed
+        weight = 1 - math.exp(-elapsed / self.time_constant)
+        self.rate += weight * (sample - self.rate)
+        self._last_time, self._last_done = now, work_done
+
+    def remaining(self, work_done: Optional[int] = None) -> float:
+        """Seconds left at the smoothed rate"""
+        done = self._last_done if work_done is None else work_done
+        if self.rate <= 0:
+            return float("inf")
+        return max(self.work_bytes - done, 0) / self.rate
@@ -0,0 +1,42 @@
+# Write Evidence Hashing - wipe_hashing.py
+"""
+Inline digests of the data each pass writes.
+
+A StreamHasher runs on its own thread and consumes the very buffers handed to
+the I/O backend, so evidence costs no extra copy and no extra read pass.
+hashlib releases the GIL while hashing large buffers, so the digest is
+computed concurrently with the writes. Blocks are hashed strictly in offset
+order because the single-thread executor runs submissions FIFO.
+"""
+
+import hashlib
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HASH_ALGORITHM = "sha256"
+
+
+class StreamHasher:
+    """Digest of one pass's output stream, fed block by block"""
+
+    def __init__(self, algorithm: str = DEFAULT_HASH_ALGORITHM):
+        self.algorithm = algorithm
+        self._hash = hashlib.new(algorithm)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wipe-hash")
+        self._digest = None
+
+    def submit(self, view: memoryview) -> Future:
+        """Queue a block for hashing; the buffer must stay unchanged until the future completes"""
+        return self._executor.submit(self._hash.update, view)
+
+    def hexdigest(self) -> str:
+        """Wait for every queued block and return the final digest"""
+        if self._digest is None:
+            self._executor.shutdown(wait=True)
+            self._digest = self._hash.hexdigest()
+        return self._digest
+
+    def close(self):
+        self._executor.shutdown(wait=True)
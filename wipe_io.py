@@ -0,0 +1,100 @@
+# Wipe I/O Backends - wipe_io.py
+"""
+I/O backends for the overwrite engine.
+
+A backend accepts positioned writes and returns a Future per write, so the
+engine can keep several writes in flight per device. The thread pool backend
+issues os.pwritev at independent offsets from `queue_depth` threads (the
+syscall releases the GIL), which is what NVMe drives need to reach their rated
+bandwidth; the synchronous backend keeps exactly one write in flight for
+devices that gain nothing from queueing (USB sticks, SD cards).
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Writes kept in flight per device, keyed by DeviceScanner._determine_device_type
+QUEUE_DEPTH_BY_TYPE = {
+    "NVME_SSD": 16,
+    "SSD": 8,
+    "HDD": 2,
+    "USB": 1,
+    "SD_CARD": 1,
+    "UNKNOWN": 1
+}
+
+
+def _pwrite_all(fd: int, view: memoryview, offset: int) -> int:
+    """Write a whole buffer at offset, retrying short writes"""
+    length = len(view)
+    while view:
+        written = os.pwritev(fd, [view], offset) if hasattr(os, "pwritev") else os.pwrite(fd, view, offset)
+        if written <= 0:
+            raise OSError(f"Short write at offset {offset}")
+        view = view[written:]
+        offset += written
+    return length
+
+
+class _TimedWrites:
+    """on_write(seconds), when set, receives the latency of every write (called on the writing thread)"""
+
+    on_write: Optional[Callable[[float], None]] = None
+
+    def _write(self, fd: int, view: memoryview, offset: int) -> int:
+        on_write = self.on_write
+        if on_write is None:
+            return _pwrite_all(fd, view, offset)
+        started = time.perf_counter()
+        written = _pwrite_all(fd, view, offset)
+        on_write(time.perf_counter() - started)
+        return written
+
+
+class SyncIOBackend(_TimedWrites):
+    """One write in flight: each submit completes before it returns"""
+
+    queue_depth = 1
+
+    def submit(self, fd: int, view: memoryview, offset: int) -> Future:
+        future = Future()
+        try:
+            future.set_result(self._write(fd, view, offset))
+        except OSError as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        pass
+
+
+class ThreadPoolIOBackend(_TimedWrites):
+    """Up to queue_depth concurrent positioned writes issued from a thread pool"""
+
+    def __init__(self, queue_depth: int):
+        if queue_depth < 1:
+            raise ValueError("Queue depth must be at least 1")
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=queue_depth, thread_name_prefix="wipe-io")
+
+    def submit(self, fd: int, view: memoryview, offset: int) -> Future:
+        return self._executor.submit(self._write, fd, view, offset)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def create_io_backend(device_type: Optional[str] = None, queue_depth: Optional[int] = None):
+    """Create the backend for a device type, or for an explicit queue depth"""
+    if queue_depth is None:
+        queue_depth = QUEUE_DEPTH_BY_TYPE.get(device_type or "UNKNOWN", 1)
+
+    logger.info(f"Using queue depth {queue_depth} for device type {device_type}")
+    if queue_depth == 1:
+        return SyncIOBackend()
+    return ThreadPoolIOBackend(queue_depth)
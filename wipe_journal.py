@@ -0,0 +1,73 @@
+# Checkpoint Journal - wipe_journal.py
+"""
+Checkpoint journal for resumable wipes.
+
+Each running wipe periodically records the pass it is on, the byte offset up
+to which that pass is durably written, and the keystream seeds of its random
+passes (the keystream counter is offset // 16, so the seed is all that is
+needed to continue or replay a random pass). Checkpoints are rows of the wipe
+store, each committed and synced in its own transaction before the engine
+writes past it, so a crash leaves either the previous or the new checkpoint,
+never a torn one.
+"""
+
+import time
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from wipe_store import WipeStore
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_INTERVAL = 10.0  # seconds between checkpoints of a running pass
+
+
+class CheckpointJournal:
+    """Per-wipe checkpoints kept in the wipe store"""
+
+    def __init__(self, store: WipeStore, interval: float = CHECKPOINT_INTERVAL):
+        self.store = store
+        self.interval = interval
+
+    def save(self, checkpoint: Dict):
+        """Replace the checkpoint for checkpoint['wipe_id']"""
+        self.store.save_checkpoint(dict(checkpoint, updated_at=datetime.utcnow().isoformat()))
+
+    def load(self, wipe_id: str) -> Optional[Dict]:
+        return self.store.load_checkpoint(wipe_id)
+
+    def load_all(self) -> List[Dict]:
+        """Load every checkpoint left behind by interrupted wipes"""
+        return self.store.load_checkpoints()
+
+    def remove(self, wipe_id: str):
+        self.store.remove_checkpoint(wipe_id)
+
+
+class Checkpointer:
+    """Rate-limits checkpoints for one wipe and fills in the fields common to every save"""
+
+    def __init__(self, journal: CheckpointJournal, base: Dict):
+        self.journal = journal
+        self.base = base
+        self.last_saved = 0.0
+
+    def due(self) -> bool:
+        return time.monotonic() - self.last_saved >= self.journal.interval
+
+    def save(self, pass_index: int, offset: int, seeds: Dict[int, str],
+             digests: Optional[Dict[int, str]] = None):
+        """Record that passes before pass_index are done and pass_index is durable up to offset"""
+        self.journal.save(dict(
+            self.base,
+            pass_index=pass_index,
+            offset=offset,
+            keystream_counter=offset // 16,
+            seeds={str(index): seed for index, seed in seeds.items()},
+            digests={str(index): digest for index, digest in (digests or {}).items()}
+        ))
+        self.last_saved = time.monotonic()
+
+    def clear(self):
+        self.journal.remove(self.base["wipe_id"])
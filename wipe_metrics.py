@@ -0,0 +1,223 @@
+# Metrics - wipe_metrics.py
+"""
+Prometheus-compatible metrics without a client library.
+
+Counters and histograms are recorded into per-thread shards: each engine,
+I/O and event-loop thread only ever touches its own shard, so the hot path
+is a dictionary update with no lock. A scrape merges every shard into the
+text exposition format. Wipes start fresh I/O and hashing threads, so the
+shards of threads that have exited are folded into one retired shard (a dead
+thread can no longer write to its shard) to keep their number bounded by the
+live threads. Gauges hold a single current value per label set
+and are plain assignments; gauges whose value lives elsewhere (scheduler
+counts) are read through callbacks at scrape time.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 14400, 28800)
+
+
+class _Shard:
+    """One thread's accumulators"""
+
+    def __init__(self, thread: Optional[threading.Thread] = None):
+        self.thread = thread
+        self.counters: Dict[Tuple, float] = {}
+        self.histograms: Dict[Tuple, List[float]] = {}  # bucket counts..., sum, count
+
+    def merge(self, other: "_Shard"):
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, state in other.histograms.items():
+            total = self.histograms.setdefault(key, [0.0] * len(state))
+            for i, value in enumerate(state):
+                total[i] += value
+
+
+class MetricsRegistry:
+    """Holds metric definitions and the per-thread shards they record into"""
+
+    def __init__(self):
+        self.metrics: List = []
+        self._retired = _Shard()  # Totals of threads that have exited
+        self._shards: List[_Shard] = [self._retired]
+        self._shards_lock = threading.Lock()  # Only taken when a thread records for the first time
+        self._local = threading.local()
+
+    def shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._shards_lock:
+                self._reap()
+                self._shards.append(shard)
+        return shard
+
+    def _reap(self):
+        """Fold the shards of exited threads into the retired shard (call with _shards_lock held)"""
+        live = [self._retired]
+        for shard in self._shards[1:]:
+            if shard.thread.is_alive():
+                live.append(shard)
+            else:
+                self._retired.merge(shard)
+        self._shards = live
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._shards_lock:
+            self._reap()
+            shards = list(self._shards)
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.collect(shards))
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def inc(self, value: float = 1, *labels: str):
+        counters = self.registry.shard().counters
+        key = (self.name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def collect(self, shards: Iterable[_Shard]) -> List[str]:
+        totals: Dict[Tuple, float] = {}
+        for shard in shards:
+            for (name, labels), value in list(shard.counters.items()):
+                if name == self.name:
+                    totals[labels] = totals.get(labels, 0) + value
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                for labels, value in sorted(totals.items())]
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        registry.register(self)
+
+    def observe(self, value: float, *labels: str):
+        histograms = self.registry.shard().histograms
+        key = (self.name, labels)
+        state = histograms.get(key)
+        if state is None:
+            state = histograms[key] = [0.0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[index] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def collect(self, shards: Iterable[_Shard]) -> List[str]:
+        merged: Dict[Tuple, List[float]] = {}
+        for shard in shards:
+            for (name, labels), state in list(shard.histograms.items()):
+                if name == self.name:
+                    total = merged.setdefault(labels, [0.0] * len(state))
+                    for i, value in enumerate(state):
+                        total[i] += value
+
+        lines = []
+        for labels, state in sorted(merged.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                bucket_labels = _labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {_number(cumulative)}")
+            inf_labels = _labels(self.labelnames, labels, 'le="+Inf"')
+            plain_labels = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_bucket{inf_labels} {_number(state[-1])}")
+            lines.append(f"{self.name}_sum{plain_labels} {_number(state[-2])}")
+            lines.append(f"{self.name}_count{plain_labels} {_number(state[-1])}")
+        return lines
+
+
+class Gauge:
+    type = "gauge"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._callback: Optional[Callable[[], Dict[Tuple, float]]] = None
+        registry.register(self)
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def remove(self, *labels: str):
+        self._values.pop(labels, None)
+
+    def set_function(self, callback: Callable[[], Dict[Tuple, float]]):
+        """Read values at scrape time: callback returns {label values tuple: value}"""
+        self._callback = callback
+
+    def collect(self, shards: Iterable[_Shard]) -> List[str]:
+        values = dict(self._values)
+        if self._callback:
+            values.update(self._callback())
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                for labels, value in sorted(values.items())]
+
+
+REGISTRY = MetricsRegistry()
+
+BYTES_WRITTEN = Counter(REGISTRY, "securewipe_bytes_written_total",
+                        "Bytes overwritten on each device", ["device"])
+BYTES_VERIFIED = Counter(REGISTRY, "securewipe_bytes_verified_total",
+                         "Bytes read back and verified on each device", ["device"])
+THROUGHPUT = Gauge(REGISTRY, "securewipe_throughput_bytes_per_second",
+                   "Current smoothed throughput of each running wipe", ["device"])
+PASS_DURATION = Histogram(REGISTRY, "securewipe_pass_duration_seconds",
+                          "Duration of completed overwrite passes", ["device_type"], DURATION_BUCKETS)
+WRITE_LATENCY = Histogram(REGISTRY, "securewipe_write_latency_seconds",
+                          "Latency of individual write syscalls", ["device"], LATENCY_BUCKETS)
+QUEUE_DEPTH = Gauge(REGISTRY, "securewipe_io_queue_depth",
+                    "Writes kept in flight for each running wipe", ["device"])
+WIPES = Gauge(REGISTRY, "securewipe_wipes", "Wipes by scheduler state", ["state"])
+CERTIFICATE_LATENCY = Histogram(REGISTRY, "securewipe_certificate_generation_seconds",
+                                "Time to generate a wipe certificate", (), LATENCY_BUCKETS + (5.0, 10.0))
+DEVICE_SCAN_LATENCY = Histogram(REGISTRY, "securewipe_device_scan_seconds",
+                                "Time to scan attached devices", (), LATENCY_BUCKETS + (5.0, 10.0))
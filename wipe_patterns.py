@@ -0,0 +1,143 @@
+# Overwrite Patterns - wipe_patterns.py
+"""
+Overwrite pattern definitions and a pool of preallocated pattern buffers.
+
+Every fixed pattern is built exactly once per block size as page-aligned,
+read-only buffers that are shared as memoryviews, so writers never allocate
+or copy per block. Periodic multi-byte patterns (e.g. Gutmann's 0x92 0x49 0x24)
+get one buffer per phase so any block-aligned offset maps to an aligned buffer.
+"""
+
+import threading
+import logging
+from typing import Dict, List
+
+from wipe_engine import DEFAULT_BLOCK_SIZE, allocate_aligned
+from wipe_random import KeystreamGenerator, KeystreamSource, new_seed
+
+logger = logging.getLogger(__name__)
+
+# A pass is {"name": str, "pattern": bytes} or {"name": str, "pattern": None} for random data.
+# Random passes get a "seed" when their source is built so they can be replayed.
+RANDOM = None
+
+DOD_PASSES = [
+    {"name": "Zero pass", "pattern": b"\x00"},
+    {"name": "Ones pass", "pattern": b"\xff"},
+    {"name": "Random pass", "pattern": RANDOM}
+]
+
+NIST_PASSES = [
+    {"name": "Cryptographic random", "pattern": RANDOM}
+]
+
+# Peter Gutmann, "Secure Deletion of Data from Magnetic and Solid-State Memory" (1996)
+GUTMANN_PASSES = (
+    [{"name": "Random", "pattern": RANDOM}] * 4 +
+    [
+        {"name": "0x55", "pattern": b"\x55"},
+        {"name": "0xAA", "pattern": b"\xaa"},
+        {"name": "0x92 0x49 0x24", "pattern": b"\x92\x49\x24"},
+        {"name": "0x49 0x24 0x92", "pattern": b"\x49\x24\x92"},
+        {"name": "0x24 0x92 0x49", "pattern": b"\x24\x92\x49"}
+    ] +
+    [{"name": f"0x{value:02X}", "pattern": bytes([value])} for value in range(0x00, 0x100, 0x11)] +
+    [
+        {"name": "0x92 0x49 0x24", "pattern": b"\x92\x49\x24"},
+        {"name": "0x49 0x24 0x92", "pattern": b"\x49\x24\x92"},
+        {"name": "0x24 0x92 0x49", "pattern": b"\x24\x92\x49"},
+        {"name": "0x6D 0xB6 0xDB", "pattern": b"\x6d\xb6\xdb"},
+        {"name": "0xB6 0xDB 0x6D", "pattern": b"\xb6\xdb\x6d"},
+        {"name": "0xDB 0x6D 0xB6", "pattern": b"\xdb\x6d\xb6"}
+    ] +
+    [{"name": "Random", "pattern": RANDOM}] * 4
+)
+
+STANDARD_PASSES = {
+    "dod": DOD_PASSES,
+    "nist": NIST_PASSES,
+    "gutmann": GUTMANN_PASSES
+}
+
+
+def get_standard_passes(standard: str, passes: int) -> List[Dict]:
+    """Get the pass list for a standard, repeated or truncated to the requested count"""
+    base_passes = STANDARD_PASSES.get(standard, DOD_PASSES)
+
+    if len(base_passes) < passes:
+        result = base_passes * (passes // len(base_passes))
+        result.extend(base_passes[:passes % len(base_passes)])
+    else:
+        result = base_passes[:passes]
+
+    return [dict(p) for p in result]
+
+
+class PatternBuffer:
+    """Read-only aligned buffers for one periodic pattern, one per phase"""
+
+    def __init__(self, pattern: bytes, block_size: int):
+        if not pattern:
+            raise ValueError("Pattern must not be empty")
+        self.pattern = pattern
+        self.block_size = block_size
+        self.period = len(pattern)
+        self._buffers = []
+        self._views = []
+
+        repeats = block_size // self.period + 1
+        for phase in range(self.period):
+            buffer = allocate_aligned(block_size)
+            if pattern != b"\x00" * self.period:
+                rotated = pattern[phase:] + pattern[:phase]
+                buffer.write((rotated * repeats)[:block_size])
+            self._buffers.append(buffer)
+            self._views.append(memoryview(buffer).toreadonly())
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """Return the pattern bytes for [offset, offset + length) without copying"""
+        if length > self.block_size:
+            raise ValueError(f"Requested {length} bytes from a {self.block_size} byte pattern buffer")
+        return self._views[offset % self.period][:length]
+
+
+class PatternBufferPool:
+    """Process-wide cache of pattern buffers shared by every writer"""
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+        self._buffers: Dict[bytes, PatternBuffer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, pattern: bytes) -> PatternBuffer:
+        """Get the shared buffer for a pattern, building it on first use"""
+        buffer = self._buffers.get(pattern)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.get(pattern)
+                if buffer is None:
+                    buffer = PatternBuffer(pattern, self.block_size)
+                    self._buffers[pattern] = buffer
+                    logger.debug(f"Built pattern buffer {pattern.hex()} ({self.block_size} bytes x {buffer.period})")
+        return buffer
+
+    def source_for(self, pass_data: Dict):
+        """Get an engine pattern source for a pass definition"""
+        if pass_data["pattern"] is RANDOM:
+            seed = pass_data.setdefault("seed", new_seed())
+            return KeystreamSource(KeystreamGenerator(seed), self.block_size)
+        return self.get(pass_data["pattern"])
+
+
+_pools: Dict[int, PatternBufferPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pattern_pool(block_size: int = DEFAULT_BLOCK_SIZE) -> PatternBufferPool:
+    """Get the shared pattern pool for a block size"""
+    with _pools_lock:
+        pool = _pools.get(block_size)
+        if pool is None:
+            pool = PatternBufferPool(block_size)
+            _pools[block_size] = pool
+        return pool
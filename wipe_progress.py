@@ -0,0 +1,242 @@
+# Progress Hub - wipe_progress.py
+"""
+In-memory broadcast of wipe progress.
+
+Wipes run as background tasks on the scheduler and publish every progress
+update to their ProgressChannel. A channel keeps the latest snapshot and fans
+each update out to any number of subscribers (WebSockets, SSE streams), so
+viewers can come and go - or reconnect - mid-wipe without affecting the wipe
+or each other. A new subscriber always starts from the latest snapshot.
+
+The snapshot is always current, but fan-out is throttled: updates within the
+same phase are coalesced to at most PROGRESS_MAX_RATE per second per wipe
+(the newest one wins), while phase transitions are delivered immediately.
+ProgressEncoder then shrinks what goes over the wire: after the first full
+snapshot only changed fields are sent, as compact JSON or msgpack.
+"""
+
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Union
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_BUFFER_SIZE = 256  # Oldest undelivered updates are dropped for slow subscribers
+PROGRESS_MAX_RATE = 4.0       # Deliveries per second per wipe within one phase
+
+# Fields whose change marks a phase transition, which is never throttled
+TRANSITION_FIELDS = ("status", "phase", "current_pass")
+
+ProgressListener = Callable[[str, Dict], None]
+CloseListener = Callable[[str], None]
+
+# WebSocket subprotocols a client may offer, in server preference order
+ENCODINGS = {"securewipe.msgpack": "msgpack", "securewipe.json": "json"}
+
+
+class Subscription:
+    """One subscriber's view of a channel: an async iterator of progress dicts"""
+
+    def __init__(self, channel: "ProgressChannel"):
+        self.channel = channel
+        self._pending: Deque[Dict] = deque(maxlen=SUBSCRIBER_BUFFER_SIZE)
+        self._wakeup = asyncio.Event()
+        self._closed = False
+
+    @property
+    def version(self) -> int:
+        return self.channel.version
+
+    def _push(self, progress: Dict):
+        self._pending.append(progress)
+        self._wakeup.set()
+
+    def _end(self):
+        self._closed = True
+        self._wakeup.set()
+
+    def close(self):
+        """Stop receiving updates"""
+        self.channel.unsubscribe(self)
+        self._end()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict:
+        while not self._pending:
+            if self._closed:
+                raise StopAsyncIteration
+            await self._wakeup.wait()
+            self._wakeup.clear()
+        return self._pending.popleft()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ProgressChannel:
+    """Latest progress snapshot of one wipe plus its live subscribers"""
+
+    def __init__(self, wipe_id: str, max_rate: float = PROGRESS_MAX_RATE,
+                 listeners: Optional[List[ProgressListener]] = None,
+                 close_listeners: Optional[List[CloseListener]] = None):
+        self.wipe_id = wipe_id
+        self.listeners = listeners if listeners is not None else []
+        self.close_listeners = close_listeners if close_listeners is not None else []
+        self.snapshot: Optional[Dict] = None
+        self.version = 0
+        self.closed = False
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self._subscribers: Set[Subscription] = set()
+        self._delivered: Optional[Dict] = None
+        self._delivered_at = 0.0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, progress: Dict):
+        self.snapshot = progress
+        self.version += 1
+        # Listeners (e.g. the persistent store) see every update, unthrottled
+        for listener in self.listeners:
+            listener(self.wipe_id, progress)
+
+        if self._is_transition(progress):
+            self._deliver()
+            return
+        wait = self._delivered_at + self.min_interval - time.monotonic()
+        if wait <= 0:
+            self._deliver()
+        elif self._flush_handle is None:
+            # Trailing delivery so the newest update of a burst is never lost
+            self._flush_handle = asyncio.get_running_loop().call_later(wait, self._deliver)
+
+    def _is_transition(self, progress: Dict) -> bool:
+        delivered = self._delivered
+        return delivered is None or any(progress.get(f) != delivered.get(f) for f in TRANSITION_FIELDS)
+
+    def _deliver(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        progress = self.snapshot
+        if progress is None or progress is self._delivered:
+            return
+        self._delivered = progress
+        self._delivered_at = time.monotonic()
+        for subscription in self._subscribers:
+            subscription._push(progress)
+
+    def close(self):
+        """The wipe is over: subscribers drain what they have and then finish"""
+        if self.closed:
+            return
+        self._deliver()
+        self.closed = True
+        for subscription in self._subscribers:
+            subscription._end()
+        self._subscribers.clear()
+        for listener in self.close_listeners:
+            listener(self.wipe_id)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self)
+        if self.snapshot is not None:
+            subscription._push(self.snapshot)
+        if self.closed:
+            subscription._end()
+        else:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+
+class ProgressHub:
+    """Registry of progress channels keyed by wipe id"""
+
+    def __init__(self):
+        self.channels: Dict[str, ProgressChannel] = {}
+        self.listeners: List[ProgressListener] = []
+        self.close_listeners: List[CloseListener] = []
+
+    def add_listener(self, listener: ProgressListener, on_close: Optional[CloseListener] = None):
+        """Call listener(wipe_id, progress) for every update of every wipe, and on_close(wipe_id) when one ends"""
+        self.listeners.append(listener)
+        if on_close:
+            self.close_listeners.append(on_close)
+
+    def open(self, wipe_id: str) -> ProgressChannel:
+        channel = self.channels.get(wipe_id)
+        if channel is None:
+            channel = self.channels[wipe_id] = ProgressChannel(wipe_id, listeners=self.listeners,
+                                                               close_listeners=self.close_listeners)
+        return channel
+
+    def get(self, wipe_id: str) -> Optional[ProgressChannel]:
+        return self.channels.get(wipe_id)
+
+    def subscribe(self, wipe_id: str) -> Optional[Subscription]:
+        channel = self.channels.get(wipe_id)
+        return channel.subscribe() if channel else None
+
+    def remove(self, wipe_id: str):
+        channel = self.channels.pop(wipe_id, None)
+        if channel:
+            channel.close()
+
+    def stats(self) -> Dict:
+        return {
+            "channels": len(self.channels),
+            "subscribers": sum(c.subscriber_count for c in self.channels.values())
+        }
+
+
+def negotiate_encoding(offered) -> Optional[str]:
+    """Pick the subprotocol to accept from those a WebSocket client offered (None means plain JSON)"""
+    for subprotocol, encoding in ENCODINGS.items():
+        if subprotocol in (offered or []) and (encoding != "msgpack" or MSGPACK_AVAILABLE):
+            return subprotocol
+    return None
+
+
+class ProgressEncoder:
+    """Per-connection encoder: a full snapshot first, then only the fields that changed"""
+
+    def __init__(self, encoding: str = "json", delta: bool = True):
+        if encoding == "msgpack" and not MSGPACK_AVAILABLE:
+            raise RuntimeError("msgpack encoding requested but msgpack is not installed")
+        self.encoding = encoding
+        self.delta = delta
+        self._last: Optional[Dict] = None
+
+    def encode(self, progress: Dict) -> Union[str, bytes]:
+        message = progress
+        last = self._last
+        if self.delta and last is not None:
+            message = {key: value for key, value in progress.items() if last.get(key) != value}
+            for key in last.keys() - progress.keys():
+                message[key] = None
+            message["wipe_id"] = progress.get("wipe_id")
+            message["delta"] = True
+        self._last = progress
+
+        if self.encoding == "msgpack":
+            return msgpack.packb(message, use_bin_type=True)
+        return json.dumps(message, separators=(",", ":"), default=str)
@@ -0,0 +1,178 @@
+# Random Pass Generator - wipe_random.py
+"""
+Seeded CSPRNG keystream for random overwrite passes.
+
+The keystream is AES-256-CTR keyed with a 32-byte seed from os.urandom, so any
+block can be generated independently from its offset: blocks are produced in
+parallel chunks across threads, and the verify stage can replay the exact
+bytes from the seed without storing them. Without the optional `cryptography`
+package it falls back to SHAKE-256 over fixed-size segments (slower, same
+replay properties).
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from wipe_engine import DEFAULT_BLOCK_SIZE, allocate_aligned
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SEED_SIZE = 32
+KEYSTREAM_ALIGNMENT = 16           # AES block - keystream offsets must be multiples of this
+PARALLEL_CHUNK_SIZE = 1024 * 1024  # Unit of work handed to each generator thread
+SHAKE_SEGMENT_SIZE = 64 * 1024
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_zero_chunk = bytes(PARALLEL_CHUNK_SIZE)
+
+
+def new_seed() -> bytes:
+    """Draw a fresh keystream seed from the OS CSPRNG"""
+    return os.urandom(SEED_SIZE)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Shared generator thread pool (lazily created, sized to the CPU count)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=min(8, os.cpu_count() or 1),
+                thread_name_prefix="keystream"
+            )
+        return _executor
+
+
+class KeystreamGenerator:
+    """Random-access keystream: the bytes at any offset depend only on the seed"""
+
+    def __init__(self, seed: Optional[bytes] = None):
+        self.seed = seed if seed is not None else new_seed()
+        if len(self.seed) != SEED_SIZE:
+            raise ValueError(f"Keystream seed must be {SEED_SIZE} bytes")
+        self.algorithm = "aes-256-ctr" if CRYPTOGRAPHY_AVAILABLE else "shake-256"
+
+    def fill(self, offset: int, out: memoryview, length: Optional[int] = None, parallel: bool = True):
+        """Fill out[:length] with the keystream bytes for [offset, offset + length)
+
+        Bytes of out beyond length are used as scratch slack so AES can encrypt
+        straight into the buffer; allocate buffers with KEYSTREAM_ALIGNMENT spare.
+        """
+        if offset % KEYSTREAM_ALIGNMENT:
+            raise ValueError(f"Keystream offset must be a multiple of {KEYSTREAM_ALIGNMENT}")
+        if length is None:
+            length = len(out)
+
+        if not parallel or length <= PARALLEL_CHUNK_SIZE:
+            self._fill_chunk(offset, out, 0, length)
+            return
+
+        futures = [
+            _get_executor().submit(self._fill_chunk, offset + start, out, start,
+                                   min(PARALLEL_CHUNK_SIZE, length - start))
+            for start in range(0, length, PARALLEL_CHUNK_SIZE)
+        ]
+        for future in futures:
+            future.result()
+
+    def _fill_chunk(self, offset: int, out: memoryview, start: int, length: int):
+        """Generate out[start:start + length] in the calling thread"""
+        if CRYPTOGRAPHY_AVAILABLE:
+            counter = (offset // KEYSTREAM_ALIGNMENT).to_bytes(16, "big")
+            encryptor = Cipher(algorithms.AES(self.seed), modes.CTR(counter)).encryptor()
+            position = 0
+            while position < length:
+                take = min(PARALLEL_CHUNK_SIZE, length - position)
+                # Encrypting zeroes yields the raw keystream
+                data = memoryview(_zero_chunk)[:take]
+                begin = start + position
+                if begin + take + KEYSTREAM_ALIGNMENT - 1 <= len(out):
+                    encryptor.update_into(data, out[begin:begin + take + KEYSTREAM_ALIGNMENT - 1])
+                else:
+                    out[begin:begin + take] = encryptor.update(data)
+                position += take
+            return
+
+        position = 0
+        while position < length:
+            segment, skip = divmod(offset + position, SHAKE_SEGMENT_SIZE)
+            digest = hashlib.shake_256(self.seed + segment.to_bytes(8, "big")).digest(SHAKE_SEGMENT_SIZE)
+            take = min(SHAKE_SEGMENT_SIZE - skip, length - position)
+            out[start + position:start + position + take] = digest[skip:skip + take]
+            position += take
+
+
+class KeystreamSource:
+    """Pattern source for random passes, generating the next block while the current one is written"""
+
+    def __init__(self, generator: Optional[KeystreamGenerator] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE, ring_size: int = 2):
+        self.generator = generator or KeystreamGenerator()
+        self.block_size = block_size
+        self._ring_size = max(ring_size, 2)
+        self._views = []
+        self._allocate()
+        self._slot = 0
+        self._prefetch = None  # (offset, length, slot, future)
+
+    @property
+    def seed(self) -> bytes:
+        return self.generator.seed
+
+    def reserve(self, in_flight: int):
+        """Grow the buffer ring so in_flight writes plus the prefetched block never share a buffer
+
+        Must be called before the first view().
+        """
+        self._ring_size = max(self._ring_size, in_flight + 2)
+        self._allocate()
+
+    def release(self):
+        """Free the buffer ring while the pass is paused; the next view() allocates it again"""
+        if self._prefetch:
+            self._prefetch[3].result()
+            self._prefetch = None
+        self._views = []
+        self._slot = 0
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """Return keystream bytes for [offset, offset + length) and start generating the next block"""
+        if not self._views:
+            self._allocate()
+        prefetch, self._prefetch = self._prefetch, None
+        if prefetch and prefetch[0] == offset and prefetch[1] == length:
+            _, _, slot, future = prefetch
+            future.result()
+        else:
+            if prefetch:
+                prefetch[3].result()
+            slot = self._next_slot()
+            self.generator.fill(offset, self._views[slot], length)
+
+        next_slot = self._next_slot()
+        next_offset = offset + length
+        self._prefetch = (
+            next_offset, length, next_slot,
+            _get_executor().submit(self.generator.fill, next_offset, self._views[next_slot], length, False)
+        )
+        return self._views[slot][:length]
+
+    def _allocate(self):
+        while len(self._views) < self._ring_size:
+            self._views.append(memoryview(allocate_aligned(self.block_size + KEYSTREAM_ALIGNMENT)))
+
+    def _next_slot(self) -> int:
+        slot = self._slot
+        self._slot = (self._slot + 1) % len(self._views)
+        return slot
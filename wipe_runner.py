@@ -0,0 +1,409 @@
+# Engine Wipe Runner - wipe_runner.py
+"""
+Async adapter that drives the real overwrite engine with the same progress
+interface as WipeSimulator (run() yields progress dicts; cancel(), pause() and
+resume() take effect within one I/O block).
+
+⚠️ DESTRUCTIVE: only constructed when REAL_WIPE_ENABLED is set.
+"""
+
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import AsyncGenerator, Dict, Optional
+
+from models import WipeSession
+from wipe_engine import OverwriteEngine, DEFAULT_BLOCK_SIZE, PassControl, WipeInterrupted
+from wipe_io import create_io_backend
+from wipe_patterns import get_standard_passes, get_pattern_pool
+from wipe_verify import WipeVerifier
+from wipe_journal import CheckpointJournal, Checkpointer
+from wipe_discard import DISCARD_METHODS, discard_target
+from wipe_hashing import StreamHasher, DEFAULT_HASH_ALGORITHM
+from wipe_eta import ThroughputModel, EtaEstimator
+from wipe_metrics import (BYTES_WRITTEN, BYTES_VERIFIED, THROUGHPUT, PASS_DURATION, WRITE_LATENCY,
+                          QUEUE_DEPTH)
+
+logger = logging.getLogger(__name__)
+
+
+class EngineWipeRunner:
+    """Runs overwrite passes on a worker thread and streams progress to the event loop"""
+
+    def __init__(self, session: WipeSession, device_path: str, device_type: str = "UNKNOWN",
+                 block_size: int = DEFAULT_BLOCK_SIZE, direct: bool = True,
+                 queue_depth: Optional[int] = None, journal: Optional[CheckpointJournal] = None,
+                 resume: Optional[Dict] = None, device_size: Optional[int] = None):
+        self.session = session
+        self.device_path = device_path
+        self.device_type = device_type
+        self.discard = session.method in DISCARD_METHODS
+        self.engine = OverwriteEngine(
+            block_size=block_size,
+            direct=direct,
+            # Discards are single ioctls - no write queue needed
+            io_backend=create_io_backend(device_type, 1 if self.discard else queue_depth)
+        )
+        self.engine.io_backend.on_write = lambda seconds: WRITE_LATENCY.observe(seconds, device_path)
+        self.verifier = WipeVerifier(chunk_size=block_size, direct=direct)
+        if self.discard:
+            # A discarded device must read back as zeroes
+            self.passes = [{"name": session.method.replace("_", " ").capitalize(), "pattern": b"\x00"}]
+        else:
+            self.passes = get_standard_passes(session.standard, session.passes)
+        self.current_pass = 0
+        self.progress_percent = 0
+        self.control = PassControl()
+        self.control.on_pause = self._on_pause
+        self.interrupted_at: Optional[Dict] = None
+        self.suspended = False
+        self.results = []
+        self.verification: Optional[Dict] = None
+
+        # Up-front estimate from the scanned size; the live ETA tracks measured throughput
+        self.throughput_model = ThroughputModel()
+        self.estimated_duration = None
+        if device_size:
+            self.estimated_duration = round(self.throughput_model.estimate_duration(
+                device_size, len(self.passes), device_type,
+                session.method, session.verify, session.verify_percent
+            ))
+        self.eta: Optional[EtaEstimator] = None
+        self.target_size: Optional[int] = None
+
+        # Resume point from an interrupted run: (pass index, byte offset within that pass)
+        self.resume_point = resume
+        self.start_pass = resume["pass_index"] if resume else 0
+        self.start_offset = resume["offset"] if resume else 0
+        if resume:
+            for index, seed in resume.get("seeds", {}).items():
+                self.passes[int(index)]["seed"] = bytes.fromhex(seed)
+            for index, digest in resume.get("digests", {}).items():
+                self.passes[int(index)]["digest"] = digest
+
+        self.checkpointer = None
+        if journal:
+            self.checkpointer = Checkpointer(journal, {
+                "wipe_id": session.wipe_id,
+                "mode": "real",
+                "device_path": device_path,
+                "device_type": device_type,
+                "session": session.model_dump(mode="json")
+            })
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._latest: Optional[Dict] = None
+        self._notify_pending = False
+
+        logger.info(f"Initialized EngineWipeRunner for {session.wipe_id} on {device_path}")
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.control.cancelled
+
+    def cancel(self):
+        """Cancel the wipe at the next I/O block"""
+        self.control.cancel()
+        logger.info(f"Wipe {self.session.wipe_id} cancelled")
+
+    def suspend(self):
+        """Stop at the next I/O block for a server shutdown, keeping the checkpoint so a restart resumes"""
+        self.suspended = True
+        if self.checkpointer and not self.checkpointer.last_saved:
+            # Nothing written yet: record where it would have started
+            self._checkpoint(self.start_pass, self.start_offset)
+        self.control.cancel()
+        logger.info(f"Wipe {self.session.wipe_id} suspended for shutdown")
+
+    def pause(self):
+        """Pause at the next I/O block, after syncing and checkpointing"""
+        self.control.pause()
+        logger.info(f"Wipe {self.session.wipe_id} paused")
+
+    def resume(self):
+        self.control.resume()
+        logger.info(f"Wipe {self.session.wipe_id} resumed")
+
+    async def run(self) -> AsyncGenerator[Dict, None]:
+        """Run every pass and yield progress updates as they arrive"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        started = self._started = time.monotonic()
+
+        status = self._status("initializing", "Device verification", started)
+        if self.resume_point:
+            status.update({
+                "resumed": True,
+                "details": f"Resuming pass {self.start_pass + 1} at byte {self.start_offset}"
+            })
+        yield status
+
+        QUEUE_DEPTH.set(self.engine.io_backend.queue_depth, self.device_path)
+        worker = self._loop.run_in_executor(None, self._run_passes, started)
+        worker.add_done_callback(lambda _: self.engine.io_backend.close())
+        while not worker.done():
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            await asyncio.wait({worker, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            self._wakeup.clear()
+            latest, self._latest = self._latest, None
+            if latest:
+                yield latest
+
+        QUEUE_DEPTH.remove(self.device_path)
+        THROUGHPUT.remove(self.device_path)
+
+        # Re-raises engine failures to the scheduler, keeping the checkpoint so
+        # a failed pass or verify can still be resumed
+        worker.result()
+
+        # Only a clean ending (or a user cancel) retires the checkpoint; if the
+        # server stops mid-wipe (or suspends it on shutdown) it survives for resume
+        if self.checkpointer and not self.suspended:
+            self.checkpointer.clear()
+
+        if self.suspended:
+            status = self._status("interrupted", "Interrupted by server shutdown", started)
+            status.update({
+                "interrupted_at": self.interrupted_at,
+                "details": "Resumes from its checkpoint when the server restarts"
+            })
+            yield status
+            return
+
+        if self.is_cancelled:
+            status = self._status("cancelled", "Operation cancelled by user", started)
+            status.update({
+                "cancelled": True,
+                "cancelled_at": datetime.utcnow().isoformat(),
+                "interrupted_at": self.interrupted_at
+            })
+            yield status
+            return
+
+        elapsed = round(time.monotonic() - started, 1)
+        status = self._status("completed", "Wipe completed successfully", started)
+        status.update({
+            "progress": 100,
+            "estimated_remaining": 0,
+            "details": "Secure wipe completed - generating certificate",
+            "completed": True,
+            "completed_at": datetime.utcnow().isoformat(),
+            "summary": {
+                "standard": self.session.standard.upper(),
+                "method": self.session.method,
+                "passes": len(self.passes),
+                "mode": "REAL",
+                "duration": elapsed,
+                "device_id": self.session.device_id,
+                "bytes_written": sum(r["bytes_written"] for r in self.results),
+                "pass_digests": [
+                    {
+                        "pass": index + 1,
+                        "pattern": p["name"],
+                        "algorithm": DEFAULT_HASH_ALGORITHM,
+                        "digest": p["digest"]
+                    }
+                    for index, p in enumerate(self.passes) if p.get("digest")
+                ],
+                "verification": self.verification
+            }
+        })
+        yield status
+
+    def _run_passes(self, started: float):
+        """Worker thread: run the wipe, stopping cleanly on cancellation"""
+        try:
+            self._run_all(started)
+        except WipeInterrupted as e:
+            # Data up to the offset is synced; the pass's buffers go with its source
+            self.interrupted_at = {"pass": self.current_pass, "offset": e.offset}
+            logger.info(f"Wipe {self.session.wipe_id} stopped in pass {self.current_pass} at offset {e.offset}")
+
+    def _run_all(self, started: float):
+        """Worker thread: write each pass, publishing per-block progress"""
+        pool = get_pattern_pool(self.engine.block_size)
+        if self.discard:
+            self._run_discard(pool, started)
+            return
+
+        for index, pass_data in enumerate(self.passes):
+            if index < self.start_pass:
+                continue
+            if self.is_cancelled:
+                return
+            self.current_pass = index + 1
+            source = pool.source_for(pass_data)
+            start_offset = self.start_offset if index == self.start_pass else 0
+
+            reported = [start_offset]
+
+            def on_block(done: int, total: int, pass_data=pass_data, reported=reported):
+                BYTES_WRITTEN.inc(done - reported[0], self.device_path)
+                reported[0] = done
+                self._publish(self._pass_status(pass_data, done, total, started))
+
+            on_checkpoint = None
+            if self.checkpointer:
+                # Record the pass (and its seed) before any of its data reaches the disk
+                self._checkpoint(index, start_offset)
+                on_checkpoint = lambda offset, index=index: self._checkpoint(index, offset)
+
+            hasher = StreamHasher(DEFAULT_HASH_ALGORITHM)
+            try:
+                result = self.engine.write_pass(
+                    self.device_path, source, on_block,
+                    start_offset=start_offset,
+                    checkpoint_callback=on_checkpoint,
+                    checkpoint_interval=self.checkpointer.journal.interval if self.checkpointer else 0,
+                    hasher=hasher,
+                    control=self.control
+                )
+            finally:
+                hasher.close()
+            PASS_DURATION.observe(result["duration"], self.device_type)
+            pass_data["digest"] = result["digest"]
+            result.update({"pass": index + 1, "pattern": pass_data["name"], "status": "completed"})
+            if pass_data.get("seed"):
+                result["seed"] = pass_data["seed"].hex()
+            self.results.append(result)
+
+        if self.checkpointer:
+            self._checkpoint(len(self.passes), 0)
+
+        if self.session.verify != "none" and self.passes and not self.is_cancelled:
+            self._verify_last_pass(pool, started)
+
+    def _run_discard(self, pool, started: float):
+        """Worker thread: discard the whole target, then sample it for zeroes"""
+        self.current_pass = 1
+        pass_data = self.passes[0]
+
+        def on_range(done: int, total: int):
+            status = self._pass_status(pass_data, done, total, started)
+            status.update({
+                "phase": f"{pass_data['name']} of all blocks",
+                "details": f"Discarding {self.device_path}"
+            })
+            self._publish(status)
+
+        result = discard_target(self.device_path, secure=self.session.method == "secure_discard",
+                                progress_callback=on_range, control=self.control)
+        result.update({"pass": 1, "pattern": pass_data["name"], "status": "completed",
+                       "bytes_written": 0})
+        self.results.append(result)
+
+        # Deterministic read-zero after trim is not guaranteed everywhere, so
+        # a discard always gets at least a sampled read-back
+        if self.session.verify == "none":
+            self.session.verify = "sample"
+        self._verify_last_pass(pool, started)
+
+    def _checkpoint(self, pass_index: int, offset: int):
+        seeds = {i: p["seed"].hex() for i, p in enumerate(self.passes) if p.get("seed")}
+        digests = {i: p["digest"] for i, p in enumerate(self.passes) if p.get("digest")}
+        self.checkpointer.save(pass_index, offset, seeds, digests)
+
+    def _verify_last_pass(self, pool, started: float):
+        """Worker thread: read the target back against the final pass"""
+        reported = [0]
+
+        def on_chunk(done: int, total: int):
+            BYTES_VERIFIED.inc(done - reported[0], self.device_path)
+            reported[0] = done
+            status = self._status("verifying", "Verification and validation", started)
+            target_size = self.target_size or total
+            written = 0 if self.discard else len(self.passes) * target_size
+            eta = self._eta(written + done, target_size)
+            status.update({
+                "verify_progress": round(done / total * 100, 1) if total else 100.0,
+                "estimated_remaining": round(eta.remaining(), 1),
+                "throughput": round(eta.rate),
+                "details": f"Verifying final pass ({self.session.verify} read-back)"
+            })
+            self._publish(status)
+
+        # Replays the final pass (random passes regenerate from the recorded seed)
+        source = pool.source_for(self.passes[-1])
+        self.verification = self.verifier.verify(
+            self.device_path, source,
+            mode=self.session.verify,
+            sample_percent=self.session.verify_percent,
+            progress_callback=on_chunk,
+            control=self.control
+        )
+        if not self.verification["passed"]:
+            raise RuntimeError(
+                f"Verification failed: {self.verification['mismatched_sectors']} sectors do not match "
+                f"the final pass (first at offset {self.verification['first_mismatch_offset']})"
+            )
+
+    def _on_pause(self):
+        """Worker thread: the engine has drained and synced and is about to block"""
+        status = self._status("paused", f"Paused in pass {self.current_pass}/{len(self.passes)}", self._started)
+        status["details"] = "Paused by operator - data written so far is synced and checkpointed"
+        self._publish(status)
+
+    def _publish(self, progress: Dict):
+        """Hand the newest progress to the event loop, coalescing updates it has not consumed yet"""
+        self._latest = progress
+        if not self._notify_pending:
+            self._notify_pending = True
+            self._loop.call_soon_threadsafe(self._notify)
+
+    def _notify(self):
+        self._notify_pending = False
+        self._wakeup.set()
+
+    def _eta(self, work_done: Optional[int], target_size: int) -> EtaEstimator:
+        """The live estimator, created once the real target size is known"""
+        if self.eta is None:
+            self.target_size = target_size
+            self.eta = EtaEstimator(
+                self.throughput_model.work_bytes(
+                    target_size, len(self.passes), self.session.method,
+                    self.session.verify, self.session.verify_percent
+                ),
+                prior_throughput=self.throughput_model.throughput(self.device_type)
+            )
+        if work_done is not None:
+            self.eta.update(work_done)
+        return self.eta
+
+    def _pass_status(self, pass_data: Dict, done: int, total: int, started: float) -> Dict:
+        total_passes = len(self.passes)
+        pass_fraction = done / total if total else 1.0
+        overall = (self.current_pass - 1 + pass_fraction) / total_passes
+        self.progress_percent = round(overall * 100, 1)
+        # Discards move no data through the host, so they do not feed the throughput average
+        work_done = None if self.discard else int((self.current_pass - 1 + pass_fraction) * total)
+        eta = self._eta(work_done, total)
+        THROUGHPUT.set(eta.rate, self.device_path)
+
+        status = self._status("wiping", f"Data overwrite pass {self.current_pass}/{total_passes}", started)
+        status.update({
+            "progress": self.progress_percent,
+            "pass_progress": round(pass_fraction * 100, 1),
+            "bytes_done": done,
+            "bytes_total": total,
+            "estimated_remaining": round(eta.remaining(), 1),
+            "throughput": round(eta.rate),
+            "details": f"Writing {pass_data['name']} to {self.device_path}",
+            "pattern": pass_data["name"]
+        })
+        return status
+
+    def _status(self, status: str, phase: str, started: float) -> Dict:
+        return {
+            "wipe_id": self.session.wipe_id,
+            "status": status,
+            "progress": self.progress_percent,
+            "current_pass": self.current_pass,
+            "total_passes": len(self.passes),
+            "phase": phase,
+            "elapsed_time": round(time.monotonic() - started, 1),
+            "estimated_remaining": None,
+            "mode": "REAL"
+        }
@@ -0,0 +1,431 @@
+# Wipe Scheduler - wipe_scheduler.py
+"""
+Multi-device wipe scheduler.
+
+Runs many wipes concurrently with one worker per physical device. A global
+concurrency cap bounds the number of running wipes, and a per-bus cap keeps
+drives behind the same HBA or USB hub from starving each other; jobs waiting
+for capacity are dispatched strictly in submission order among the buses that
+have room. Runners only need a run() async generator of progress dicts and
+cancel()/pause()/resume() methods, so WipeSimulator and the real engine are
+scheduled alike (plus suspend(), which stops for a server shutdown but keeps
+the checkpoint so the next start resumes the wipe).
+Wipes run whether or not anyone is watching; their progress is published to a
+ProgressHub that viewers subscribe to. A paused wipe gives its slot back so a
+waiting job can use the bus, and queues for a slot again when it is resumed
+(it keeps its device, which is part-way through the wipe). When several
+server processes share the machine, an optional device_locks object
+(wipe_cluster.WorkerNode) makes a device worker wait until no other process
+is writing the same device.
+"""
+
+import os
+import re
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+from models import WipeSession
+from wipe_progress import ProgressHub, ProgressChannel
+
+logger = logging.getLogger(__name__)
+
+FINISHED_RETENTION = 600.0  # seconds a finished wipe's final snapshot stays available
+DEVICE_LOCK_RETRY = 1.0     # seconds between attempts on a device locked by another process
+
+_PCI_ADDRESS = re.compile(r"^[0-9a-f]{4}:[0-9a-f]{2}:[0-9a-f]{2}\.[0-9a-f]$")
+_USB_PORT = re.compile(r"^\d+-[\d.]+$")
+
+
+def _sysfs_block_path(device_path: str) -> Optional[str]:
+    """Resolve /dev/<name> to its /sys/devices path (Linux only)"""
+    name = os.path.basename(os.path.realpath(device_path))
+    sys_path = f"/sys/class/block/{name}"
+    if not os.path.exists(sys_path):
+        return None
+    return os.path.realpath(sys_path)
+
+
+def physical_device_key(device_path: str) -> str:
+    """Key identifying the whole physical disk a path belongs to (partitions map to their disk)"""
+    sys_path = _sysfs_block_path(device_path)
+    if sys_path is None:
+        return device_path
+    if os.path.exists(os.path.join(sys_path, "partition")):
+        sys_path = os.path.dirname(sys_path)
+    return f"/dev/{os.path.basename(sys_path)}"
+
+
+def device_bus_key(device_path: str) -> str:
+    """Key identifying the shared path to a disk: its USB hub, or its PCI HBA/controller"""
+    sys_path = _sysfs_block_path(device_path)
+    if sys_path is None:
+        return device_path
+
+    segments = sys_path.split("/")
+    usb_ports = [s for s in segments if _USB_PORT.match(s)]
+    if usb_ports:
+        port = usb_ports[-1]
+        # 2-1.3 hangs off hub 2-1; 2-1 hangs off root hub usb2
+        return f"usb:{port.rsplit('.', 1)[0]}" if "." in port else f"usb:usb{port.split('-')[0]}"
+
+    pci = [s for s in segments if _PCI_ADDRESS.match(s)]
+    if pci:
+        return f"pci:{pci[-1]}"
+    return device_path
+
+
+class WipeJob:
+    """A scheduled wipe and the progress it has produced so far"""
+
+    def __init__(self, session: WipeSession, runner, device_key: str, bus_key: str):
+        self.session = session
+        self.runner = runner
+        self.device_key = device_key
+        self.bus_key = bus_key
+        self.status = "queued"
+        self.submitted_at = datetime.utcnow()
+        self.error: Optional[str] = None
+        self.certificate_id: Optional[str] = None
+        self.suspended = False
+        self.paused = False
+        self.holds_slot = False   # counted against the global and bus caps
+        self.parked = False       # paused after giving its slot back; resuming needs a new one
+        self.resume_wait: Optional[asyncio.Future] = None
+        self.channel: Optional[ProgressChannel] = None
+        self.done = asyncio.Event()
+
+    @property
+    def wipe_id(self) -> str:
+        return self.session.wipe_id
+
+    @property
+    def latest(self) -> Optional[Dict]:
+        return self.channel.snapshot if self.channel else None
+
+    def publish(self, progress: Dict):
+        """Broadcast progress to every subscriber of this wipe"""
+        self.channel.publish(progress)
+
+
+class WipeScheduler:
+    """Schedules wipe jobs onto per-device workers under global and per-bus caps"""
+
+    def __init__(self, max_concurrent: int = 8, max_per_bus: int = 2, hub: Optional[ProgressHub] = None,
+                 on_finished: Optional[Callable[[WipeJob], Awaitable[None]]] = None,
+                 retention: float = FINISHED_RETENTION, device_locks=None):
+        self.max_concurrent = max_concurrent
+        self.max_per_bus = max_per_bus
+        self.hub = hub or ProgressHub()
+        self.on_finished = on_finished
+        self.retention = retention
+        self.device_locks = device_locks  # try_lock_device(device_key, wipe_id) / unlock_device(device_key)
+        self.jobs: Dict[str, WipeJob] = {}
+        self._device_queues: Dict[str, Deque[WipeJob]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._waiting: List[tuple] = []  # (job, future) in submission order
+        self._lock_waits: Dict[str, asyncio.Event] = {}  # wipe_id -> set to cancel its wait for a device lock
+        self._running = 0
+        self._running_per_bus: Dict[str, int] = {}
+        logger.info(f"Initialized WipeScheduler (max_concurrent={max_concurrent}, max_per_bus={max_per_bus})")
+
+    def submit(self, job: WipeJob) -> WipeJob:
+        """Queue a job on its device worker, starting the worker if needed"""
+        self.jobs[job.wipe_id] = job
+        job.channel = self.hub.open(job.wipe_id)
+        job.publish({
+            "wipe_id": job.wipe_id,
+            "status": "queued",
+            "mode": "REAL" if job.session.mode == "real" else "SIMULATION",
+            "total_passes": job.session.passes
+        })
+        self._device_queues.setdefault(job.device_key, deque()).append(job)
+        if job.device_key not in self._workers:
+            self._workers[job.device_key] = asyncio.create_task(self._device_worker(job.device_key))
+        logger.info(f"Queued wipe {job.wipe_id} on {job.device_key} (bus {job.bus_key})")
+        return job
+
+    def get(self, wipe_id: str) -> Optional[WipeJob]:
+        return self.jobs.get(wipe_id)
+
+    def forget(self, wipe_id: str):
+        """Drop a finished job and its progress channel"""
+        job = self.jobs.get(wipe_id)
+        if job and job.done.is_set():
+            del self.jobs[wipe_id]
+            self.hub.remove(wipe_id)
+
+    def cancel(self, job: WipeJob):
+        """Cancel a job: a queued one never starts, a running one stops at its next I/O block"""
+        if job.done.is_set():
+            return
+        if not self._withdraw(job):
+            job.runner.cancel()
+
+    def suspend(self, job: WipeJob):
+        """Stop a job for a server shutdown; its checkpoint is kept so the next start resumes it"""
+        if job.done.is_set():
+            return
+        job.suspended = True
+        job.runner.suspend()
+        self._withdraw(job)
+
+    async def shutdown(self, timeout: float) -> bool:
+        """Suspend every job and wait for them (and their post-processing) to finish
+
+        Returns False if some were still busy when the timeout expired.
+        """
+        jobs = [job for job in self.jobs.values() if not job.done.is_set()]
+        for job in jobs:
+            self.suspend(job)
+        if not jobs:
+            return True
+        waiters = [asyncio.ensure_future(job.done.wait()) for job in jobs]
+        _, pending = await asyncio.wait(waiters, timeout=timeout)
+        for waiter in pending:
+            waiter.cancel()
+        return not pending
+
+    def _withdraw(self, job: WipeJob) -> bool:
+        """Take a job that has not started out of line (False if it is already running)"""
+        queue = self._device_queues.get(job.device_key)
+        if job.status == "queued" and queue and job in queue:
+            queue.remove(job)
+            asyncio.create_task(self._finish_unstarted(job))
+            return True
+        lock_wait = self._lock_waits.get(job.wipe_id)
+        if lock_wait:
+            lock_wait.set()
+            return True
+        for waiting_job, future in self._waiting:
+            if waiting_job is job and future is not job.resume_wait and not future.done():
+                # Wakes the device worker, which skips the job without taking a slot
+                future.set_result(False)
+                self._waiting = [(j, f) for j, f in self._waiting if f is not future]
+                return True
+        return False
+
+    def pause(self, job: WipeJob):
+        """Pause a job and hand its slot to the next waiting job"""
+        job.paused = True
+        job.runner.pause()
+        if self._drop_resume_wait(job):
+            job.holds_slot = True
+        if job.holds_slot:
+            self._park(job)
+
+    def resume(self, job: WipeJob):
+        """Resume a job, first queueing it for a slot if it gave its own up"""
+        job.paused = False
+        if not job.parked:
+            job.runner.resume()
+            return
+        if job.resume_wait is not None:
+            return
+        future = job.resume_wait = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda _: self._unpark(job, future))
+        self._waiting.append((job, future))
+        self._dispatch()
+        if not future.done():
+            job.publish(dict(job.latest or {}, details="Waiting for a free slot to resume"))
+
+    def queue_position(self, job: WipeJob) -> int:
+        """1-based position among jobs waiting for capacity (0 if not waiting)"""
+        for index, (waiting_job, _) in enumerate(self._waiting):
+            if waiting_job is job:
+                return index + 1
+        return 0
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._running,
+            "queued": sum(1 for job in self.jobs.values() if job.status == "queued"),
+            "max_concurrent": self.max_concurrent,
+            "running_per_bus": dict(self._running_per_bus)
+        }
+
+    async def _device_worker(self, device_key: str):
+        """Run the jobs for one physical device back to back"""
+        queue = self._device_queues[device_key]
+        try:
+            while queue:
+                job = queue.popleft()
+                if not await self._lock_device(job):
+                    await self._finish_unstarted(job)
+                    continue
+                try:
+                    started = await self._acquire(job)
+                    if started:
+                        job.holds_slot = True
+                        if job.paused:
+                            self._park(job)
+                        try:
+                            await self._run(job)
+                        finally:
+                            self._vacate(job)
+                finally:
+                    await self._unlock_device(job)
+                # The slot and the device are free before certificates and other post-processing run
+                if started:
+                    await self._finish(job)
+                else:
+                    await self._finish_unstarted(job)
+        finally:
+            del self._workers[device_key]
+            del self._device_queues[device_key]
+
+    async def _lock_device(self, job: WipeJob) -> bool:
+        """Wait until no other process is writing the job's device (False if cancelled meanwhile)"""
+        if not self.device_locks:
+            return True
+        cancelled = self._lock_waits[job.wipe_id] = asyncio.Event()
+        try:
+            waiting = False
+            while not await asyncio.to_thread(self.device_locks.try_lock_device, job.device_key, job.wipe_id):
+                if not waiting:
+                    waiting = True
+                    logger.info(f"Wipe {job.wipe_id} waiting for {job.device_key}, locked by another worker")
+                    job.publish(dict(job.latest or {}, details="Waiting for another worker to release the device"))
+                try:
+                    await asyncio.wait_for(cancelled.wait(), DEVICE_LOCK_RETRY)
+                    return False
+                except asyncio.TimeoutError:
+                    pass
+            if cancelled.is_set():
+                await self._unlock_device(job)
+                return False
+            return True
+        finally:
+            del self._lock_waits[job.wipe_id]
+
+    async def _unlock_device(self, job: WipeJob):
+        if self.device_locks:
+            await asyncio.to_thread(self.device_locks.unlock_device, job.device_key)
+
+    async def _acquire(self, job: WipeJob) -> bool:
+        """Wait until both the global and the bus cap allow this job to run (False if cancelled meanwhile)"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append((job, future))
+        self._dispatch()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(job)
+            else:
+                self._waiting = [(j, f) for j, f in self._waiting if f is not future]
+            raise
+
+    def _release(self, job: WipeJob):
+        self._running -= 1
+        self._running_per_bus[job.bus_key] -= 1
+        if not self._running_per_bus[job.bus_key]:
+            del self._running_per_bus[job.bus_key]
+        self._dispatch()
+
+    def _park(self, job: WipeJob):
+        """Give a paused job's slot back"""
+        job.holds_slot = False
+        job.parked = True
+        self._release(job)
+        logger.info(f"Wipe {job.wipe_id} paused; its slot on bus {job.bus_key} is free")
+
+    def _unpark(self, job: WipeJob, future: asyncio.Future):
+        """A parked job got a slot back: let its runner continue"""
+        if job.resume_wait is not future:
+            return
+        job.resume_wait = None
+        job.holds_slot = True
+        job.parked = False
+        job.runner.resume()
+
+    def _drop_resume_wait(self, job: WipeJob) -> bool:
+        """Stop a parked job waiting for a slot; True if one was already granted to it"""
+        future, job.resume_wait = job.resume_wait, None
+        if future is None:
+            return False
+        if future.done():
+            return future.result()
+        future.set_result(False)
+        self._waiting = [(j, f) for j, f in self._waiting if f is not future]
+        return False
+
+    def _vacate(self, job: WipeJob):
+        """Release whatever slot a job that stopped running still holds or waits for"""
+        if self._drop_resume_wait(job):
+            job.holds_slot = True
+        if job.holds_slot:
+            self._release(job)
+        job.holds_slot = job.parked = False
+
+    def _dispatch(self):
+        """Start waiting jobs in FIFO order, skipping ones whose bus is saturated"""
+        still_waiting = []
+        for job, future in self._waiting:
+            bus_running = self._running_per_bus.get(job.bus_key, 0)
+            if (self._running < self.max_concurrent and bus_running < self.max_per_bus
+                    and not future.done()):
+                self._running += 1
+                self._running_per_bus[job.bus_key] = bus_running + 1
+                future.set_result(True)
+            elif not future.done():
+                still_waiting.append((job, future))
+        self._waiting = still_waiting
+
+    async def _run(self, job: WipeJob):
+        """Drive a runner to completion, broadcasting its progress"""
+        job.status = "running"
+        job.session.status = "running"
+        logger.info(f"Running wipe {job.wipe_id} on {job.device_key}")
+        try:
+            async for progress in job.runner.run():
+                job.status = progress.get("status", job.status)
+                job.publish(progress)
+            if job.status not in ("completed", "cancelled", "interrupted"):
+                job.status = "completed"
+        except Exception as e:
+            logger.error(f"Wipe {job.wipe_id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+            job.publish({"wipe_id": job.wipe_id, "status": "failed", "error": str(e)})
+
+    async def _finish_unstarted(self, job: WipeJob):
+        """Retire a job cancelled (or suspended) before it got a slot"""
+        if job.suspended:
+            logger.info(f"Wipe {job.wipe_id} suspended before it started")
+            job.status = "interrupted"
+            job.publish({
+                "wipe_id": job.wipe_id,
+                "status": "interrupted",
+                "progress": 0,
+                "phase": "Interrupted by server shutdown",
+                "details": "Resumes from its checkpoint when the server restarts"
+            })
+            await self._finish(job)
+            return
+        logger.info(f"Wipe {job.wipe_id} cancelled before it started")
+        job.status = "cancelled"
+        job.publish({
+            "wipe_id": job.wipe_id,
+            "status": "cancelled",
+            "progress": 0,
+            "phase": "Operation cancelled by user",
+            "cancelled": True,
+            "cancelled_at": datetime.utcnow().isoformat()
+        })
+        await self._finish(job)
+
+    async def _finish(self, job: WipeJob):
+        """Run post-processing, close the progress channel and schedule the job's removal"""
+        job.session.status = job.status
+        if self.on_finished:
+            try:
+                await self.on_finished(job)
+            except Exception as e:
+                logger.error(f"Post-processing of wipe {job.wipe_id} failed: {e}")
+        job.channel.close()
+        job.done.set()
+        # Late viewers still get the final snapshot for a while
+        asyncio.get_running_loop().call_later(self.retention, self.forget, job.wipe_id)
@@ -4,50 +4,78 @@ import logging
 import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, AsyncGenerator
+from typing import Dict, AsyncGenerator, Optional
 from models import WipeSession
+from wipe_patterns import GUTMANN_PASSES
+from wipe_journal import CheckpointJournal, Checkpointer
+from wipe_eta import ThroughputModel, EtaEstimator, EWMA_TIME_CONSTANT
 
 logger = logging.getLogger(__name__)
 
+SIMULATED_DEVICE_SIZE = 16 * 1024**3  # Used when the target device is not attached (16GB USB drive)
+SETUP_SECONDS = 5                     # Playback time of the verification/initialization phases
+VERIFY_SECONDS = 3                    # Playback time of the read-back phase
+MAX_PLAYBACK_SECONDS = 120            # Simulations are compressed to at most 2 minutes for demo
+STEPS_PER_PASS = 21
+
 class WipeSimulator:
     """Safe wipe simulation with realistic progress and timing"""
     
-    def __init__(self, session: WipeSession):
+    def __init__(self, session: WipeSession, journal: Optional[CheckpointJournal] = None,
+                 resume: Optional[Dict] = None, device: Optional[Dict] = None):
         self.session = session
+        self.device_size = (device or {}).get("total_size") or SIMULATED_DEVICE_SIZE
+        self.device_type = (device or {}).get("type", "USB")
         self.start_time = datetime.utcnow()
         self.current_pass = 0
         self.progress_percent = 0
         self.is_cancelled = False
+        self.suspended = False
+        self._unpaused = asyncio.Event()
+        self._unpaused.set()
+        
+        # Simulated passes are checkpointed at pass granularity
+        self.start_pass = resume["pass_index"] if resume else 0
+        self.checkpointer = None
+        if journal:
+            self.checkpointer = Checkpointer(journal, {
+                "wipe_id": session.wipe_id,
+                "mode": "simulation",
+                "session": session.model_dump(mode="json")
+            })
         
-        # Calculate realistic timing based on standard and device size
+        # Project how long the wipe would take on the real device, then play it
+        # back compressed; the ETA follows the simulated throughput via the EWMA
+        model = ThroughputModel()
+        self.projected_duration = model.estimate_duration(
+            self.device_size, session.passes, self.device_type,
+            session.method, session.verify, session.verify_percent
+        )
         self.estimated_duration = self._calculate_duration()
+        self.time_scale = self.projected_duration / self.estimated_duration
+        self.eta = EtaEstimator(
+            self.device_size * session.passes,
+            prior_throughput=model.throughput(self.device_type) * self.time_scale,
+            time_constant=EWMA_TIME_CONSTANT / self.time_scale
+        )
         
         logger.info(f"Initialized WipeSimulator for {session.wipe_id}")
     
     def _calculate_duration(self) -> int:
-        """Calculate realistic duration based on wipe standard and simulated device size"""
-        # Simulated device size (in practice, would get from actual device)
-        simulated_size_gb = 16  # 16GB USB drive simulation
-        
-        # Time per GB for different standards
-        time_per_gb = {
-            "nist": 2,      # 2 minutes per GB for NIST SP 800-88
-            "dod": 6,       # 6 minutes per GB for DoD 5220.22-M
-            "gutmann": 70   # 70 minutes per GB for Gutmann 35-pass
-        }
-        
-        base_time = time_per_gb.get(self.session.standard, 6)
-        total_minutes = simulated_size_gb * base_time
-        
-        # Convert to seconds for simulation (scaled down for demo)
-        return min(total_minutes * 2, 120)  # Max 2 minutes for demo
+        """Playback duration: the projected duration, compressed to fit the demo window"""
+        return round(min(max(self.projected_duration, SETUP_SECONDS + VERIFY_SECONDS + 1),
+                         MAX_PLAYBACK_SECONDS))
+    
+    def run(self) -> AsyncGenerator[Dict, None]:
+        """Scheduler entry point (same interface as EngineWipeRunner)"""
+        return self.simulate_wipe()
     
     async def simulate_wipe(self) -> AsyncGenerator[Dict, None]:
         """Simulate the wipe process with realistic progress updates"""
         logger.info(f"Starting wipe simulation for {self.session.wipe_id}")
         
         # Initial status
-        yield {
+        yield self._track({
             "wipe_id": self.session.wipe_id,
             "status": "initializing",
             "progress": 0,
@@ -57,12 +85,17 @@ class WipeSimulator:
             "elapsed_time": 0,
             "estimated_remaining": self.estimated_duration,
             "mode": "SIMULATION"
-        }
+        })
         
         await asyncio.sleep(1)
+        async for status in self._hold_while_paused():
+            yield status
+        if self.is_cancelled:
+            yield self._stopped_status()
+            return
         
         # Phase 1: Device verification
-        yield {
+        yield self._track({
             "wipe_id": self.session.wipe_id,
             "status": "verifying",
             "progress": 5,
@@ -73,12 +106,17 @@ class WipeSimulator:
             "estimated_remaining": self.estimated_duration - 1,
             "mode": "SIMULATION",
             "details": "Verifying device accessibility and preparing secure channels"
-        }
+        })
         
         await asyncio.sleep(2)
+        async for status in self._hold_while_paused():
+            yield status
+        if self.is_cancelled:
+            yield self._stopped_status()
+            return
         
         # Phase 2: Security initialization
-        yield {
+        yield self._track({
             "wipe_id": self.session.wipe_id,
             "status": "initializing_security",
             "progress": 10,
@@ -89,26 +127,39 @@ class WipeSimulator:
             "estimated_remaining": self.estimated_duration - 3,
             "mode": "SIMULATION",
             "details": f"Initializing {self.session.standard.upper()} security protocols"
-        }
+        })
         
         await asyncio.sleep(2)
+        async for status in self._hold_while_paused():
+            yield status
+        if self.is_cancelled:
+            yield self._stopped_status()
+            return
         
         # Phase 3: Data overwrite passes
         progress_per_pass = 80 / self.session.passes  # 80% of progress for actual wiping
+        wipe_seconds = self.estimated_duration - SETUP_SECONDS - VERIFY_SECONDS
+        step_delay = wipe_seconds / (self.session.passes * STEPS_PER_PASS)
         
-        for pass_num in range(1, self.session.passes + 1):
+        for pass_num in range(self.start_pass + 1, self.session.passes + 1):
             self.current_pass = pass_num
+            if self.checkpointer:
+                self.checkpointer.save(pass_num - 1, 0, {})
             
             # Simulate pass progress
             for pass_progress in range(0, 101, 5):
+                async for status in self._hold_while_paused():
+                    yield status
                 if self.is_cancelled:
-                    yield self._cancelled_status()
+                    yield self._stopped_status()
                     return
                 
                 overall_progress = 10 + ((pass_num - 1) * progress_per_pass) + (pass_progress * progress_per_pass / 100)
                 elapsed = time.time() - self.start_time.timestamp()
+                bytes_done = int((pass_num - 1 + pass_progress / 100) * self.device_size)
+                self.eta.update(bytes_done)
                 
-                yield {
+                yield self._track({
                     "wipe_id": self.session.wipe_id,
                     "status": "wiping",
                     "progress": round(overall_progress, 1),
@@ -117,18 +168,24 @@ class WipeSimulator:
                     "pass_progress": pass_progress,
                     "phase": f"Data overwrite pass {pass_num}/{self.session.passes}",
                     "elapsed_time": round(elapsed, 1),
-                    "estimated_remaining": max(0, self.estimated_duration - elapsed),
+                    "estimated_remaining": round(self.eta.remaining(bytes_done) + VERIFY_SECONDS, 1),
+                    "projected_remaining": round((self.eta.remaining(bytes_done) + VERIFY_SECONDS) * self.time_scale),
+                    "throughput": round(self.eta.rate / self.time_scale),
                     "mode": "SIMULATION",
                     "details": self._get_pass_details(pass_num),
                     "pattern": self._get_overwrite_pattern(pass_num)
-                }
+                })
                 
-                # Variable delay to simulate realistic I/O patterns
-                delay = 0.3 + (0.2 * (pass_num / self.session.passes))
-                await asyncio.sleep(delay)
+                await asyncio.sleep(step_delay)
+        
+        async for status in self._hold_while_paused():
+            yield status
+        if self.is_cancelled:
+            yield self._stopped_status()
+            return
         
         # Phase 4: Verification
-        yield {
+        yield self._track({
             "wipe_id": self.session.wipe_id,
             "status": "verifying",
             "progress": 92,
@@ -136,18 +193,23 @@ class WipeSimulator:
             "total_passes": self.session.passes,
             "phase": "Verification and validation",
             "elapsed_time": round(time.time() - self.start_time.timestamp(), 1),
-            "estimated_remaining": 5,
+            "estimated_remaining": VERIFY_SECONDS,
             "mode": "SIMULATION",
-            "details": "Verifying successful data destruction"
-        }
+            "details": (
+                f"Verifying successful data destruction ({self.session.verify} read-back)"
+                if self.session.verify != "none" else "Read-back verification skipped"
+            )
+        })
         
-        await asyncio.sleep(3)
+        await asyncio.sleep(VERIFY_SECONDS)
         
         # Phase 5: Completion
+        if self.checkpointer:
+            self.checkpointer.clear()
         elapsed_total = time.time() - self.start_time.timestamp()
         completion_time = datetime.utcnow()
         
-        yield {
+        yield self._track({
             "wipe_id": self.session.wipe_id,
             "status": "completed",
             "progress": 100,
@@ -162,18 +224,24 @@ class WipeSimulator:
             "completed_at": completion_time.isoformat(),
             "summary": {
                 "standard": self.session.standard.upper(),
+                "method": self.session.method,
                 "passes": self.session.passes,
                 "mode": "SIMULATION",
                 "duration": round(elapsed_total, 1),
+                "projected_duration": round(self.projected_duration),
                 "device_id": self.session.device_id
             }
-        }
+        })
         
         logger.info(f"Wipe simulation completed for {self.session.wipe_id}")
     
     def _get_pass_details(self, pass_num: int) -> str:
         """Get detailed description of what happens in each pass"""
-        if self.session.standard == "nist":
+        if self.session.method == "discard":
+            return "Issuing BLKDISCARD (TRIM) for every block"
+        elif self.session.method == "secure_discard":
+            return "Issuing BLKSECDISCARD (secure TRIM) for every block"
+        elif self.session.standard == "nist":
             return "Cryptographic erase using secure random patterns"
         elif self.session.standard == "dod":
             if pass_num == 1:
@@ -189,18 +257,13 @@ class WipeSimulator:
     
     def _get_overwrite_pattern(self, pass_num: int) -> str:
         """Get the overwrite pattern being used"""
-        if self.session.standard == "dod":
+        if self.session.method != "overwrite":
+            return "Discard"
+        elif self.session.standard == "dod":
             patterns = ["0x00", "0xFF", "Random"]
             return patterns[min(pass_num - 1, len(patterns) - 1)]
         elif self.session.standard == "gutmann":
-            # Simplified Gutmann patterns for display
-            gutmann_patterns = [
-                "Random", "0x55", "0xAA", "0x92", "0x49", "0x24", "0x00", "0x11",
-                "0x22", "0x33", "0x44", "0x55", "0x66", "0x77", "0x88", "0x99",
-                "0xAA", "0xBB", "0xCC", "0xDD", "0xEE", "0xFF", "Random", "Random",
-                "Random", "Random", "0x6D", "0xB6", "0xDB", "Random", "Random",
-                "Random", "Random", "Random", "Random"
-            ]
+            gutmann_patterns = [p["name"] for p in GUTMANN_PASSES]
             return gutmann_patterns[min(pass_num - 1, len(gutmann_patterns) - 1)]
         else:
             return "Cryptographic Random"
@@ -208,10 +271,73 @@ class WipeSimulator:
     def cancel(self):
         """Cancel the wipe operation"""
         self.is_cancelled = True
+        self._unpaused.set()
         logger.info(f"Wipe {self.session.wipe_id} cancelled")
     
+    def suspend(self):
+        """Stop for a server shutdown, keeping a checkpoint so a restart resumes the current pass"""
+        self.suspended = True
+        if self.checkpointer:
+            self.checkpointer.save(max(self.current_pass - 1, self.start_pass), 0, {})
+        self.is_cancelled = True
+        self._unpaused.set()
+        logger.info(f"Wipe {self.session.wipe_id} suspended for shutdown")
+    
+    def pause(self):
+        """Pause before the next simulated block"""
+        if not self.is_cancelled:
+            self._unpaused.clear()
+            logger.info(f"Wipe {self.session.wipe_id} paused")
+    
+    def resume(self):
+        self._unpaused.set()
+        logger.info(f"Wipe {self.session.wipe_id} resumed")
+    
+    async def _hold_while_paused(self) -> AsyncGenerator[Dict, None]:
+        """Report a pause and wait for resume (or cancellation) between simulated steps"""
+        if not self._unpaused.is_set() and not self.is_cancelled:
+            yield self._paused_status()
+            await self._unpaused.wait()
+    
+    def _track(self, status: Dict) -> Dict:
+        """Remember the progress of each update so pause/cancel report where it stopped"""
+        self.progress_percent = status["progress"]
+        return status
+    
+    def _paused_status(self) -> Dict:
+        return {
+            "wipe_id": self.session.wipe_id,
+            "status": "paused",
+            "progress": self.progress_percent,
+            "current_pass": self.current_pass,
+            "total_passes": self.session.passes,
+            "phase": f"Paused in pass {self.current_pass}/{self.session.passes}",
+            "elapsed_time": round(time.time() - self.start_time.timestamp(), 1),
+            "estimated_remaining": None,
+            "mode": "SIMULATION",
+            "details": "Paused by operator"
+        }
+    
+    def _stopped_status(self) -> Dict:
+        return self._suspended_status() if self.suspended else self._cancelled_status()
+    
+    def _suspended_status(self) -> Dict:
+        """Return shutdown status (the checkpoint stays for the next start)"""
+        return {
+            "wipe_id": self.session.wipe_id,
+            "status": "interrupted",
+            "progress": self.progress_percent,
+            "current_pass": self.current_pass,
+            "total_passes": self.session.passes,
+            "phase": "Interrupted by server shutdown",
+            "mode": "SIMULATION",
+            "details": "Resumes from its checkpoint when the server restarts"
+        }
+    
     def _cancelled_status(self) -> Dict:
-        """Return cancellation status"""
+        """Return cancellation status (a cancelled wipe is never resumed, so its checkpoint goes)"""
+        if self.checkpointer:
+            self.checkpointer.clear()
         return {
             "wipe_id": self.session.wipe_id,
             "status": "cancelled",
@@ -0,0 +1,528 @@
+# Wipe Store - wipe_store.py
+"""
+Embedded SQLite store for wipe sessions, checkpoints and certificates.
+
+The database runs in WAL mode so API reads never block the writer. Writes are
+not issued one statement at a time from the event loop or the engine threads:
+they are queued, coalesced per row (a burst of progress updates for one wipe
+becomes one UPDATE) and committed in a single transaction by a background
+writer thread every flush_interval seconds. Indexes on device serial, status
+and dates keep audit queries ("every wipe of serial X", "all failed wipes
+this week") to index lookups.
+
+The store is also what several server worker processes share: progress
+snapshots, worker liveness, device locks and cross-worker commands live in
+tables of their own (see wipe_cluster). Writes that coordinate workers -
+taking a lock, claiming a wipe - are committed immediately in their own
+transaction instead of riding the batch, and so are wipe checkpoints, which
+must be on disk before the engine overwrites past them.
+"""
+
+import os
+import json
+import base64
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from models import WipeSession, Certificate
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = "securewipe.db"
+FLUSH_INTERVAL = 0.5  # seconds between batched commits
+MAX_PAGE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wipes (
+    wipe_id TEXT PRIMARY KEY,
+    device_id TEXT NOT NULL,
+    device_serial TEXT,
+    device_path TEXT,
+    mode TEXT NOT NULL,
+    method TEXT NOT NULL,
+    standard TEXT NOT NULL,
+    passes INTEGER NOT NULL,
+    verify TEXT,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    certificate_id TEXT,
+    started_at TEXT NOT NULL,
+    completed_at TEXT,
+    updated_at TEXT NOT NULL,
+    session TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS wipes_device_serial ON wipes (device_serial, started_at, wipe_id);
+CREATE INDEX IF NOT EXISTS wipes_device_id ON wipes (device_id, started_at, wipe_id);
+CREATE INDEX IF NOT EXISTS wipes_status ON wipes (status, started_at, wipe_id);
+CREATE INDEX IF NOT EXISTS wipes_started_at ON wipes (started_at, wipe_id);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    wipe_id TEXT PRIMARY KEY,
+    pass_index INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS certificates (
+    cert_id TEXT PRIMARY KEY,
+    wipe_id TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    device_serial TEXT,
+    standard TEXT,
+    generated_at TEXT NOT NULL,
+    file_path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS certificates_wipe_id ON certificates (wipe_id);
+CREATE INDEX IF NOT EXISTS certificates_device_id ON certificates (device_id, generated_at, cert_id);
+CREATE INDEX IF NOT EXISTS certificates_device_serial ON certificates (device_serial, generated_at, cert_id);
+CREATE INDEX IF NOT EXISTS certificates_generated_at ON certificates (generated_at, cert_id);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    wipe_id TEXT PRIMARY KEY,
+    owner TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    data TEXT,
+    closed INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    completed_at TEXT,
+    index_path TEXT,
+    wipes TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS batch_wipes (
+    wipe_id TEXT PRIMARY KEY,
+    batch_id TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    heartbeat_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS device_locks (
+    device_key TEXT PRIMARY KEY,
+    wipe_id TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    acquired_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS commands (
+    command_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL,
+    wipe_id TEXT NOT NULL,
+    command TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commands_owner ON commands (owner, command_id);
+"""
+
+_UPSERT_WIPE = """
+INSERT INTO wipes (wipe_id, device_id, device_serial, device_path, mode, method, standard, passes,
+                   verify, status, started_at, updated_at, session)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (wipe_id) DO UPDATE SET
+    device_serial = excluded.device_serial, device_path = excluded.device_path,
+    updated_at = excluded.updated_at, session = excluded.session
+"""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _encode_cursor(sort_value: str, key: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, key]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        sort_value, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(sort_value), str(key)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class WipeStore:
+    """SQLite store with a batching background writer"""
+
+    def __init__(self, path: str = DB_PATH, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        # Pending statements keyed by the row they affect; a newer write to the
+        # same key replaces the older one but keeps its place in the batch
+        self._pending: Dict[Tuple, Tuple[str, tuple]] = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._writer_conn = self._connect()
+        self._writer_conn.executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, name="wipe-store-writer", daemon=True)
+        self._writer.start()
+        logger.info(f"Opened wipe store {path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Per-thread read connection (WAL readers never wait for the writer)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # Writes
+
+    def _enqueue(self, key: Tuple, sql: str, params: tuple):
+        with self._pending_lock:
+            self._pending[key] = (sql, params)
+
+    def _write_loop(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Wipe store write failed: {e}")
+
+    def flush(self):
+        """Commit every pending write now (in the calling thread)"""
+        with self._write_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            conn = self._writer_conn
+            conn.execute("BEGIN")
+            try:
+                for sql, params in batch.values():
+                    conn.execute(sql, params)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    @contextmanager
+    def _immediate(self, durable: bool = False):
+        """Write transaction committed before returning, for coordination between workers
+
+        A durable transaction is also synced to disk on commit, so it survives
+        a power loss and not only a crash of the process.
+        """
+        with self._write_lock:
+            conn = self._writer_conn
+            if durable:
+                conn.execute("PRAGMA synchronous=FULL")
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            finally:
+                if durable:
+                    conn.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        self._stopped = True
+        self._wakeup.set()
+        self._writer.join()
+        self.flush()
+        self._writer_conn.close()
+
+    def save_session(self, session: WipeSession):
+        """Insert a wipe or refresh its session record"""
+        self._enqueue(("wipe", session.wipe_id), _UPSERT_WIPE, (
+            session.wipe_id, session.device_id, session.device_serial, session.device_path,
+            session.mode, session.method, session.standard, session.passes, session.verify,
+            session.status, session.started_at.isoformat(), _now(), session.model_dump_json()
+        ))
+
+    def record_progress(self, wipe_id: str, progress: Dict):
+        """Persist the latest status and progress of a wipe (coalesced per wipe)"""
+        status = progress.get("status")
+        if not status:
+            return
+        completed_at = progress.get("completed_at") or progress.get("cancelled_at")
+        self._enqueue(("progress", wipe_id), """
+            UPDATE wipes SET status = ?, progress = COALESCE(?, progress), error = COALESCE(?, error),
+                             completed_at = COALESCE(?, completed_at), updated_at = ?
+            WHERE wipe_id = ?
+        """, (status, progress.get("progress"), progress.get("error"), completed_at, _now(), wipe_id))
+
+    def save_certificate(self, certificate: Certificate):
+        self._enqueue(("certificate", certificate.cert_id), """
+            INSERT OR REPLACE INTO certificates
+                (cert_id, wipe_id, device_id, device_serial, standard, generated_at, file_path)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (certificate.cert_id, certificate.wipe_id, certificate.device_id, certificate.device_serial,
+              certificate.standard, certificate.generated_at.isoformat(), certificate.file_path))
+        self._enqueue(("certificate_link", certificate.wipe_id),
+                      "UPDATE wipes SET certificate_id = ? WHERE wipe_id = ?",
+                      (certificate.cert_id, certificate.wipe_id))
+
+    def save_checkpoint(self, checkpoint: Dict):
+        """Record a resume point; on disk before returning, since the engine writes past it next"""
+        with self._immediate(durable=True) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO checkpoints (wipe_id, pass_index, offset, data, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (checkpoint["wipe_id"], checkpoint["pass_index"], checkpoint["offset"],
+                  json.dumps(checkpoint), _now()))
+
+    def remove_checkpoint(self, wipe_id: str):
+        with self._immediate(durable=True) as conn:
+            conn.execute("DELETE FROM checkpoints WHERE wipe_id = ?", (wipe_id,))
+
+    def save_snapshot(self, wipe_id: str, owner: str, progress: Dict):
+        """Mirror a wipe's latest progress for other workers (coalesced per wipe)"""
+        self._enqueue(("snapshot", wipe_id), """
+            INSERT INTO snapshots (wipe_id, owner, version, data, closed, updated_at) VALUES (?, ?, 1, ?, 0, ?)
+            ON CONFLICT (wipe_id) DO UPDATE SET
+                owner = excluded.owner, version = snapshots.version + 1, data = excluded.data,
+                closed = 0, updated_at = excluded.updated_at
+        """, (wipe_id, owner, json.dumps(progress, default=str), _now()))
+
+    def close_snapshot(self, wipe_id: str):
+        """Mark a wipe's snapshot final: it will not change again"""
+        self._enqueue(("snapshot_closed", wipe_id),
+                      "UPDATE snapshots SET closed = 1, updated_at = ? WHERE wipe_id = ?", (_now(), wipe_id))
+
+    # Worker coordination (committed immediately)
+
+    def save_batch(self, batch: Dict):
+        """Save a batch and map its wipes to it, so whichever worker finishes a wipe can record it"""
+        with self._immediate() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO batches (batch_id, created_at, completed_at, index_path, wipes)
+                VALUES (?, ?, ?, ?, ?)
+            """, (batch["batch_id"], batch["created_at"], batch["completed_at"], batch["index_path"],
+                  json.dumps(batch["wipes"])))
+            conn.executemany("INSERT OR REPLACE INTO batch_wipes (wipe_id, batch_id) VALUES (?, ?)",
+                             [(wipe["wipe_id"], batch["batch_id"]) for wipe in batch["wipes"]])
+
+    def record_batch_wipe(self, wipe_id: str, outcome: Dict) -> Optional[Dict]:
+        """Merge a wipe's outcome into its batch; the updated batch, or None if the wipe is in none"""
+        with self._immediate() as conn:
+            row = conn.execute("""
+                SELECT b.* FROM batch_wipes bw JOIN batches b ON b.batch_id = bw.batch_id
+                WHERE bw.wipe_id = ?
+            """, (wipe_id,)).fetchone()
+            if not row:
+                return None
+            wipes = json.loads(row["wipes"])
+            for wipe in wipes:
+                if wipe["wipe_id"] == wipe_id:
+                    wipe.update(outcome)
+            conn.execute("UPDATE batches SET wipes = ? WHERE batch_id = ?", (json.dumps(wipes), row["batch_id"]))
+            return dict(row, wipes=wipes)
+
+    def complete_batch(self, batch_id: str, completed_at: str, index_path: str):
+        with self._immediate() as conn:
+            conn.execute("UPDATE batches SET completed_at = ?, index_path = ? WHERE batch_id = ?",
+                         (completed_at, index_path, batch_id))
+
+    def register_worker(self, worker_id: str, host: str, pid: int):
+        now = _now()
+        with self._immediate() as conn:
+            conn.execute("INSERT OR REPLACE INTO workers (worker_id, host, pid, started_at, heartbeat_at) "
+                         "VALUES (?, ?, ?, ?, ?)", (worker_id, host, pid, now, now))
+
+    def heartbeat_worker(self, worker_id: str):
+        with self._immediate() as conn:
+            conn.execute("UPDATE workers SET heartbeat_at = ? WHERE worker_id = ?", (_now(), worker_id))
+
+    def remove_worker(self, worker_id: str):
+        """Unregister a worker and release everything it held"""
+        with self._immediate() as conn:
+            conn.execute("DELETE FROM device_locks WHERE owner = ?", (worker_id,))
+            conn.execute("DELETE FROM commands WHERE owner = ?", (worker_id,))
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def lock_device(self, device_key: str, wipe_id: str, owner: str, live_workers: Set[str]) -> bool:
+        """Take a device lock unless a live worker other than owner holds it"""
+        with self._immediate() as conn:
+            row = conn.execute("SELECT owner FROM device_locks WHERE device_key = ?", (device_key,)).fetchone()
+            if row and row["owner"] != owner and row["owner"] in live_workers:
+                return False
+            conn.execute("INSERT OR REPLACE INTO device_locks (device_key, wipe_id, owner, acquired_at) "
+                         "VALUES (?, ?, ?, ?)", (device_key, wipe_id, owner, _now()))
+            return True
+
+    def unlock_device(self, device_key: str, owner: str):
+        with self._immediate() as conn:
+            conn.execute("DELETE FROM device_locks WHERE device_key = ? AND owner = ?", (device_key, owner))
+
+    def claim_wipe(self, wipe_id: str, owner: str, live_workers: Set[str]) -> bool:
+        """Become the owner of a wipe unless a live worker other than owner already is"""
+        with self._immediate() as conn:
+            row = conn.execute("SELECT owner FROM snapshots WHERE wipe_id = ?", (wipe_id,)).fetchone()
+            if row and row["owner"] != owner and row["owner"] in live_workers:
+                return False
+            conn.execute("""
+                INSERT INTO snapshots (wipe_id, owner, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT (wipe_id) DO UPDATE SET owner = excluded.owner, updated_at = excluded.updated_at
+            """, (wipe_id, owner, _now()))
+            return True
+
+    def push_command(self, owner: str, wipe_id: str, command: str):
+        with self._immediate() as conn:
+            conn.execute("INSERT INTO commands (owner, wipe_id, command, created_at) VALUES (?, ?, ?, ?)",
+                         (owner, wipe_id, command, _now()))
+
+    def pop_commands(self, owner: str) -> List[Tuple[str, str]]:
+        """Take the (wipe_id, command) pairs queued for a worker, oldest first"""
+        if not self._reader().execute("SELECT 1 FROM commands WHERE owner = ? LIMIT 1", (owner,)).fetchone():
+            return []
+        with self._immediate() as conn:
+            rows = conn.execute("SELECT command_id, wipe_id, command FROM commands WHERE owner = ? "
+                                "ORDER BY command_id", (owner,)).fetchall()
+            if rows:
+                conn.execute("DELETE FROM commands WHERE owner = ? AND command_id <= ?",
+                             (owner, rows[-1]["command_id"]))
+        return [(row["wipe_id"], row["command"]) for row in rows]
+
+    # Reads
+
+    def get_wipe(self, wipe_id: str) -> Optional[Dict]:
+        row = self._reader().execute("SELECT * FROM wipes WHERE wipe_id = ?", (wipe_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_certificate(self, cert_id: str) -> Optional[Dict]:
+        row = self._reader().execute("SELECT * FROM certificates WHERE cert_id = ?", (cert_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_wipes(self, device: Optional[str] = None, standard: Optional[str] = None,
+                   status: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                   cursor: Optional[str] = None, limit: int = 100) -> Dict:
+        """Newest-first page of wipes; pass the returned next_cursor to continue"""
+        where, params = [], []
+        # A device matches on its id or its serial: one index seek each, merged in _page
+        any_of = [("device_id = ?", device), ("device_serial = ?", device)] if device else []
+        for column, value in (("standard", standard), ("status", status)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+        return self._page(
+            "SELECT wipe_id, device_id, device_serial, device_path, mode, method, standard, passes, verify, "
+            "status, progress, error, certificate_id, started_at, completed_at FROM wipes",
+            where, params, "started_at", "wipe_id", since, until, cursor, limit, any_of
+        )
+
+    def list_certificates(self, device: Optional[str] = None, standard: Optional[str] = None,
+                          status: Optional[str] = None, since: Optional[str] = None,
+                          until: Optional[str] = None, cursor: Optional[str] = None, limit: int = 100) -> Dict:
+        """Newest-first page of certificates; status filters on the wipe the certificate covers"""
+        where, params = [], []
+        any_of = [("c.device_id = ?", device), ("c.device_serial = ?", device)] if device else []
+        if standard:
+            where.append("c.standard = ?")
+            params.append(standard)
+        if status:
+            where.append("EXISTS (SELECT 1 FROM wipes w WHERE w.wipe_id = c.wipe_id AND w.status = ?)")
+            params.append(status)
+        return self._page(
+            "SELECT c.cert_id, c.wipe_id, c.device_id, c.device_serial, c.standard, c.generated_at "
+            "FROM certificates c",
+            where, params, "c.generated_at", "c.cert_id", since, until, cursor, limit, any_of
+        )
+
+    def _page(self, select: str, where: List[str], params: list, sort_column: str, key_column: str,
+              since: Optional[str], until: Optional[str], cursor: Optional[str], limit: int,
+              any_of: Sequence[Tuple[str, object]] = ()) -> Dict:
+        """Keyset pagination on (sort_column, key_column) descending - no OFFSET, so every page is an index seek
+
+        any_of holds alternative (condition, value) filters. Rather than an OR, which
+        SQLite can only serve with a multi-index scan and a sort of every match, each
+        alternative runs as its own keyset query and the pages are merged.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where, params = list(where), list(params)
+        if since:
+            where.append(f"{sort_column} >= ?")
+            params.append(since)
+        if until:
+            where.append(f"{sort_column} < ?")
+            params.append(until)
+        if cursor:
+            sort_value, key = _decode_cursor(cursor)
+            where.append(f"({sort_column}, {key_column}) < (?, ?)")
+            params += [sort_value, key]
+
+        sort_name, key_name = sort_column.split(".")[-1], key_column.split(".")[-1]
+        rows: Dict[str, Dict] = {}
+        for condition, value in any_of or [(None, None)]:
+            branch_where, branch_params = where, params
+            if condition:
+                branch_where, branch_params = where + [condition], params + [value]
+            sql = select
+            if branch_where:
+                sql += " WHERE " + " AND ".join(branch_where)
+            sql += f" ORDER BY {sort_column} DESC, {key_column} DESC LIMIT ?"
+            for row in self._reader().execute(sql, branch_params + [limit + 1]):
+                rows[row[key_name]] = dict(row)  # A row matching several alternatives is kept once
+        rows = sorted(rows.values(), key=lambda row: (row[sort_name], row[key_name]), reverse=True)[:limit + 1]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(last[sort_name], last[key_name])
+        return {"items": rows, "next_cursor": next_cursor}
+
+    def load_checkpoint(self, wipe_id: str) -> Optional[Dict]:
+        row = self._reader().execute("SELECT data FROM checkpoints WHERE wipe_id = ?", (wipe_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def load_checkpoints(self) -> List[Dict]:
+        rows = self._reader().execute("SELECT data FROM checkpoints ORDER BY updated_at").fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def load_snapshot(self, wipe_id: str) -> Optional[Dict]:
+        """{"owner", "version", "closed", "progress"} of a wipe, whichever worker runs it"""
+        row = self._reader().execute("SELECT owner, version, data, closed FROM snapshots WHERE wipe_id = ?",
+                                     (wipe_id,)).fetchone()
+        if not row:
+            return None
+        return {
+            "owner": row["owner"],
+            "version": row["version"],
+            "closed": bool(row["closed"]),
+            "progress": json.loads(row["data"]) if row["data"] else None
+        }
+
+    def load_batch(self, batch_id: str) -> Optional[Dict]:
+        row = self._reader().execute("SELECT * FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        if not row:
+            return None
+        return dict(row, wipes=json.loads(row["wipes"]))
+
+    def list_workers(self) -> List[Dict]:
+        return [dict(row) for row in self._reader().execute("SELECT * FROM workers")]
+
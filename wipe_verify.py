@@ -0,0 +1,201 @@
+# Wipe Verification - wipe_verify.py
+"""
+Streaming read-back verification of the final overwrite pass.
+
+The target is read back in large aligned chunks (O_DIRECT where supported, so
+the media is checked rather than the page cache) and compared against the
+expected bytes of the last pass: fixed patterns come from prebuilt buffers and
+random passes are regenerated from their keystream seed. Comparisons are whole
+buffer compares (memcmp); per-sector scanning only happens on a mismatch.
+
+Modes:
+    full    - every byte of the target
+    sample  - a random N% of fixed-size extents, always including the first
+              and last extent (NIST SP 800-88 style verification sampling)
+"""
+
+import os
+import time
+import random
+import logging
+from typing import Callable, Dict, Optional
+
+from wipe_engine import (BUFFER_ALIGNMENT, DEFAULT_BLOCK_SIZE, O_DIRECT, PassControl, WipeInterrupted,
+                         allocate_aligned, get_target_size)
+
+logger = logging.getLogger(__name__)
+
+VERIFY_MODES = ("none", "sample", "full")
+DEFAULT_SAMPLE_PERCENT = 10.0
+SECTOR_SIZE = 512
+
+# progress_callback(bytes_checked, bytes_to_check)
+VerifyProgressCallback = Callable[[int, int], None]
+
+
+def open_for_read(path: str, direct: bool = False):
+    """Open a target for reading, returning (fd, direct_enabled)"""
+    flags = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0)
+    if direct and O_DIRECT:
+        try:
+            return os.open(path, flags | O_DIRECT), True
+        except OSError as e:
+            logger.warning(f"O_DIRECT unavailable for {path} ({e}), verifying through the page cache")
+    return os.open(path, flags), False
+
+
+def _pread_all(fd: int, view: memoryview, offset: int) -> int:
+    """Fill a buffer from offset, retrying short reads; returns bytes read"""
+    done = 0
+    while done < len(view):
+        count = os.preadv(fd, [view[done:]], offset + done) if hasattr(os, "preadv") \
+            else _pread_into(fd, view[done:], offset + done)
+        if count <= 0:
+            break
+        done += count
+    return done
+
+
+def _pread_into(fd: int, view: memoryview, offset: int) -> int:
+    data = os.pread(fd, len(view), offset)
+    view[:len(data)] = data
+    return len(data)
+
+
+class ExpectedData:
+    """Produces the expected bytes of a pass as bytearrays (bytearray == buffer is a memcmp)"""
+
+    def __init__(self, source, chunk_size: int):
+        self.source = source
+        self.chunk_size = chunk_size
+        self._phase_cache: Dict[int, bytearray] = {}
+        self._scratch = bytearray(chunk_size)
+
+    def chunk(self, offset: int, length: int) -> bytearray:
+        generator = getattr(self.source, "generator", None)
+        if generator is not None:
+            # Random pass: replay the keystream from its seed
+            expected = self._scratch if length == self.chunk_size else bytearray(length)
+            generator.fill(offset, memoryview(expected), length)
+            return expected
+
+        period = getattr(self.source, "period", None)
+        if period is not None and length == self.chunk_size:
+            phase = offset % period
+            expected = self._phase_cache.get(phase)
+            if expected is None:
+                expected = bytearray(self.source.view(offset, length))
+                self._phase_cache[phase] = expected
+            return expected
+
+        return bytearray(self.source.view(offset, length))
+
+
+class WipeVerifier:
+    """Reads a target back and compares it against the expected last-pass data"""
+
+    def __init__(self, chunk_size: int = DEFAULT_BLOCK_SIZE, direct: bool = True):
+        if chunk_size <= 0 or chunk_size % BUFFER_ALIGNMENT:
+            raise ValueError(f"Chunk size must be a positive multiple of {BUFFER_ALIGNMENT}")
+        self.chunk_size = chunk_size
+        self.direct = direct
+
+    def verify(self, path: str, source, mode: str = "full", sample_percent: float = DEFAULT_SAMPLE_PERCENT,
+               size: Optional[int] = None, sample_seed: Optional[int] = None,
+               progress_callback: Optional[VerifyProgressCallback] = None,
+               control: Optional[PassControl] = None) -> Dict:
+        """Verify the target holds the data source produces; returns a result dict"""
+        if mode not in ("sample", "full"):
+            raise ValueError(f"Unknown verification mode: {mode}")
+
+        fd, direct_enabled = open_for_read(path, self.direct)
+        tail_fd = None
+        started = time.monotonic()
+        buffer = allocate_aligned(self.chunk_size)
+        read_view = memoryview(buffer)
+        expected_data = ExpectedData(source, self.chunk_size)
+
+        try:
+            total = size if size is not None else get_target_size(fd)
+            aligned_end = total - (total % BUFFER_ALIGNMENT) if direct_enabled else total
+            extent_count = (total + self.chunk_size - 1) // self.chunk_size
+
+            if mode == "full" or extent_count <= 2:
+                extents = range(extent_count)
+            else:
+                if sample_seed is None:
+                    sample_seed = random.SystemRandom().getrandbits(64)
+                wanted = max(2, int(extent_count * sample_percent / 100))
+                rng = random.Random(sample_seed)
+                # range() sampling never materializes the extent list, even for huge disks
+                middle = rng.sample(range(1, extent_count - 1), min(wanted - 2, extent_count - 2))
+                extents = [0] + sorted(middle) + [extent_count - 1]
+
+            bytes_to_check = sum(min(self.chunk_size, total - e * self.chunk_size) for e in extents) \
+                if mode == "sample" else total
+            bytes_checked = 0
+            mismatched_sectors = 0
+            first_mismatch = None
+
+            for extent in extents:
+                if control is not None and control.interrupted and not control.wait():
+                    raise WipeInterrupted(bytes_checked)
+                offset = extent * self.chunk_size
+                length = min(self.chunk_size, total - offset)
+
+                # Aligned part through the O_DIRECT fd, any unaligned tail through a buffered one
+                direct_length = max(0, min(length, aligned_end - offset))
+                got = _pread_all(fd, read_view[:direct_length], offset) if direct_length else 0
+                if direct_length < length:
+                    if tail_fd is None:
+                        tail_fd, _ = open_for_read(path, direct=False)
+                    got += _pread_all(tail_fd, read_view[direct_length:length], offset + direct_length)
+
+                expected = expected_data.chunk(offset, length)
+                actual = read_view[:length]
+                if got < length or expected != actual:
+                    bad = self._count_bad_sectors(expected, actual, got)
+                    mismatched_sectors += bad["count"]
+                    if first_mismatch is None:
+                        first_mismatch = offset + bad["first"]
+
+                bytes_checked += length
+                if progress_callback:
+                    progress_callback(bytes_checked, bytes_to_check)
+        finally:
+            os.close(fd)
+            if tail_fd is not None:
+                os.close(tail_fd)
+
+        duration = time.monotonic() - started
+        passed = mismatched_sectors == 0
+        if not passed:
+            logger.error(f"Verification of {path} failed: {mismatched_sectors} mismatched sectors, "
+                         f"first at offset {first_mismatch}")
+
+        return {
+            "mode": mode,
+            "passed": passed,
+            "bytes_total": total,
+            "bytes_verified": bytes_checked,
+            "extents_checked": len(extents),
+            "extent_size": self.chunk_size,
+            "sample_percent": sample_percent if mode == "sample" else 100.0,
+            "sample_seed": sample_seed if mode == "sample" else None,
+            "mismatched_sectors": mismatched_sectors,
+            "first_mismatch_offset": first_mismatch,
+            "direct_io": direct_enabled,
+            "duration": round(duration, 3)
+        }
+
+    def _count_bad_sectors(self, expected: bytearray, actual: memoryview, got: int) -> Dict:
+        """Slow path after a failed chunk compare: locate the differing sectors"""
+        count = 0
+        first = None
+        for start in range(0, len(expected), SECTOR_SIZE):
+            end = min(start + SECTOR_SIZE, len(expected))
+            if end > got or expected[start:end] != actual[start:end].tobytes():
+                count += 1
+                if first is None:
+                    first = start
+        return {"count": count, "first": first or 0}